@@ -0,0 +1,58 @@
+"""
+Memoized conversions between legacy addresses, cash addresses and public
+key hashes.
+
+The same few thousand addresses repeat across millions of memo txs, so
+converted addresses are kept in bounded LRU caches (``functools.lru_cache``
+is thread-safe) and interned, so one address is one string in memory.
+"""
+import sys
+from functools import lru_cache
+
+from bitcash.format import address_to_public_key_hash as _address_to_public_key_hash
+from cashaddress.convert import Address
+from cashaddress import convert as cashaddress
+
+ADDRESS_CACHE_SIZE = 65536  # entries per conversion
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def to_cash_address(address):
+    """Return the interned cash address of a legacy or cash address."""
+    return sys.intern(cashaddress.to_cash_address(address))
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def to_legacy_address(address):
+    """Return the interned legacy address of a legacy or cash address."""
+    return sys.intern(cashaddress.to_legacy_address(address))
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def public_key_hash_to_cash_address(public_key_hash):
+    """Return the interned P2PKH cash address of a public key hash.
+
+    :param public_key_hash: 20 bytes public key hash
+    :type public_key_hash: ``bytes``
+    """
+    return sys.intern(Address(payload=list(public_key_hash), version='P2PKH').cash_address())
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def address_to_public_key_hash(address):
+    """Return the 20 bytes public key hash of a legacy or cash address."""
+    return _address_to_public_key_hash(address)
+
+
+def cache_info():
+    return {'to_cash_address': to_cash_address.cache_info(),
+            'to_legacy_address': to_legacy_address.cache_info(),
+            'public_key_hash_to_cash_address': public_key_hash_to_cash_address.cache_info(),
+            'address_to_public_key_hash': address_to_public_key_hash.cache_info()}
+
+
+def clear_cache():
+    to_cash_address.cache_clear()
+    to_legacy_address.cache_clear()
+    public_key_hash_to_cash_address.cache_clear()
+    address_to_public_key_hash.cache_clear()
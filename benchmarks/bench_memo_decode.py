@@ -0,0 +1,84 @@
+"""
+Throughput of decoding memos from tx dicts: the single-pass ``Memo.parse``
+against the former ``is_memo`` + ``form_transaction_dict`` path.
+
+    $ python benchmarks/bench_memo_decode.py [number of txs]
+"""
+import sys
+import time
+
+from cashaddress.convert import to_cash_address
+
+from bchmemo.memo import Memo
+from bchmemo.memo import SUPPORTED_PREFIX
+
+LEGACY_ADDRESSES = ['1BpEi6DfDAUFd7GtittLSdBeYJvcoaVggu',
+                    '1KXrWXciRDZUpQwQmuM1DbwsKDLYAYsVLR',
+                    '16UwLL9Risc3QfPqBUvKofHmBQ7wMtjvM']
+
+
+def make_transactions(n):
+    txs = []
+    for i in range(n):
+        sender = LEGACY_ADDRESSES[i % len(LEGACY_ADDRESSES)]
+        vout = [{'value': '0.00100000',
+                 'scriptPubKey': {'hex': '76a914' + '00' * 20 + '88ac', 'addresses': [sender]}}]
+        if i % 4:  # one tx in four is not a memo
+            message = 'memo number {}'.format(i).encode().hex()
+            script = '6a026d02' + '{:02x}'.format(len(message) // 2) + message
+            vout.insert(0, {'value': '0.00000000', 'scriptPubKey': {'hex': script}})
+        txs.append({'txid': '{:064x}'.format(i), 'blockheight': 530000, 'time': 1525000000 + i,
+                    'vin': [{'addr': sender}, {'addr': sender}], 'vout': vout})
+    return txs
+
+
+def legacy_is_memo(transaction):
+    for vout in transaction['vout']:
+        if vout['scriptPubKey']['hex'][0:2] == '6a' \
+                and vout['scriptPubKey']['hex'][4:8] in SUPPORTED_PREFIX:
+            return True
+    return False
+
+
+def legacy_parse(transaction):
+    if not legacy_is_memo(transaction):
+        return None
+    legacy_is_memo(transaction)
+    memo = Memo()
+    memo.transaction_dict = transaction
+    memo.transaction_hash = transaction['txid']
+    memo.blockheight = transaction['blockheight']
+    memo.transfer = [(to_cash_address(vout['scriptPubKey']['addresses'][0]), vout['value'])
+                     for vout in transaction['vout'] if 'addresses' in vout['scriptPubKey']]
+    for vout in transaction['vout']:
+        if vout['scriptPubKey']['hex'][0:2] == '6a' \
+                and vout['scriptPubKey']['hex'][4:8] in SUPPORTED_PREFIX:
+            memo.prefix = vout['scriptPubKey']['hex'][4:8]
+            memo.values = vout['scriptPubKey']['hex'][10:]
+            break
+    addr_vin = [to_cash_address(vin['addr']) for vin in transaction['vin'] if 'addr' in vin]
+    if addr_vin:
+        memo.sender = addr_vin[0]
+    memo.transaction_time = transaction['time']
+    return memo
+
+
+def bench(name, parse, txs):
+    started = time.perf_counter()
+    memos = [memo for memo in map(parse, txs) if memo is not None]
+    elapsed = time.perf_counter() - started
+    print('{:<8} {:>8} memos in {:.3f}s  {:>10,.0f} memos/sec'.format(
+        name, len(memos), elapsed, len(memos) / elapsed))
+    return memos
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    txs = make_transactions(n)
+    legacy = bench('legacy', legacy_parse, txs)
+    single = bench('parse', Memo.parse, txs)
+    assert [memo.message for memo in legacy] == [memo.message for memo in single]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Memory held per memo: ``Memo`` objects (which keep their tx dict alive)
+against compact ``MemoRecord`` tuples (which drop it after parsing).
+
+    $ python benchmarks/bench_memo_memory.py [number of txs]
+"""
+import gc
+import sys
+import tracemalloc
+
+from bchmemo.memo import Memo
+from bchmemo.memo import MemoRecord
+
+from bench_memo_decode import make_transactions
+
+
+def measure(name, parse, n):
+    gc.collect()
+    tracemalloc.start()
+    # The tx dicts come and go as in a crawl; only what the parser keeps
+    # is still allocated at the end.
+    memos = [memo for memo in map(parse, make_transactions(n)) if memo is not None]
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print('{:<7} {:>7} memos  {:>6,.0f} bytes/memo held  peak {:,.0f} KiB'.format(
+        name, len(memos), held / len(memos), peak / 1024))
+    return held / len(memos)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    memo_size = measure('Memo', Memo.parse, n)
+    record_size = measure('Record', MemoRecord.parse, n)
+    print('saving: {:,.0f} bytes/memo ({:.0%})'.format(memo_size - record_size,
+                                                      1 - record_size / memo_size))
+
+
+if __name__ == '__main__':
+    main()
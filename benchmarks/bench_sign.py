@@ -0,0 +1,107 @@
+"""
+Time of signing P2PKH transactions from 1 to 1000 inputs: the preallocated
+serializer of ``create_p2pkh_transaction`` against the former ``bytes +=``
+one. Signing is deterministic, so both must produce the same hex.
+
+    $ python benchmarks/bench_sign.py [max number of inputs]
+"""
+import sys
+import time
+
+from bitcash import PrivateKey
+from bitcash.crypto import double_sha256, sha256
+from bitcash.network.meta import Unspent
+from bitcash.format import address_to_public_key_hash
+from bitcash.utils import bytes_to_hex, hex_to_bytes, int_to_unknown_bytes, int_to_varint
+
+from bchmemo.bitcash_modified.transaction import HASH_TYPE, LOCK_TIME, SEQUENCE, VERSION_1
+from bchmemo.bitcash_modified.transaction import OP_CHECKSIG, OP_DUP, OP_EQUALVERIFY
+from bchmemo.bitcash_modified.transaction import OP_HASH160, OP_PUSH_20, OP_RETURN, TxIn
+from bchmemo.bitcash_modified.transaction import create_p2pkh_transaction
+
+SECRET = 0x1f2e3d4c5b6a7988
+INPUT_COUNTS = (1, 10, 100, 250, 500, 1000)
+
+
+def make_unspents(private_key, n):
+    script = bytes_to_hex(private_key.scriptcode)
+    return [Unspent(1000, 1, script, '{:064x}'.format(i + 1), i % 3) for i in range(n)]
+
+
+def legacy_construct_output_block(outputs):
+    output_block = b''
+    for dest, amount in outputs:
+        if amount:
+            script = (OP_DUP + OP_HASH160 + OP_PUSH_20 + address_to_public_key_hash(dest) +
+                      OP_EQUALVERIFY + OP_CHECKSIG)
+        else:
+            script = OP_RETURN + dest
+        output_block += amount.to_bytes(8, byteorder='little')
+        output_block += int_to_unknown_bytes(len(script), byteorder='little')
+        output_block += script
+    return output_block
+
+
+def legacy_create_p2pkh_transaction(private_key, unspents, outputs):
+    public_key = private_key.public_key
+    public_key_len = len(public_key).to_bytes(1, byteorder='little')
+    scriptCode = private_key.scriptcode
+    scriptCode_len = int_to_varint(len(scriptCode))
+    input_count = int_to_unknown_bytes(len(unspents), byteorder='little')
+    output_count = int_to_unknown_bytes(len(outputs), byteorder='little')
+    output_block = legacy_construct_output_block(outputs)
+
+    inputs = []
+    for unspent in unspents:
+        script = hex_to_bytes(unspent.script)
+        inputs.append(TxIn(script, int_to_unknown_bytes(len(script), byteorder='little'),
+                           hex_to_bytes(unspent.txid)[::-1],
+                           unspent.txindex.to_bytes(4, byteorder='little'),
+                           unspent.amount.to_bytes(8, byteorder='little')))
+
+    hashPrevouts = double_sha256(b''.join([i.txid + i.txindex for i in inputs]))
+    hashSequence = double_sha256(b''.join([SEQUENCE for i in inputs]))
+    hashOutputs = double_sha256(output_block)
+
+    for txin in inputs:
+        to_be_hashed = (VERSION_1 + hashPrevouts + hashSequence + txin.txid + txin.txindex +
+                        scriptCode_len + scriptCode + txin.amount + SEQUENCE + hashOutputs +
+                        LOCK_TIME + HASH_TYPE)
+        signature = private_key.sign(sha256(to_be_hashed)) + b'\x41'
+        txin.script = (len(signature).to_bytes(1, byteorder='little') + signature +
+                       public_key_len + public_key)
+        txin.script_len = int_to_unknown_bytes(len(txin.script), byteorder='little')
+
+    input_block = b''
+    for txin in inputs:
+        input_block += txin.txid + txin.txindex + txin.script_len + txin.script + SEQUENCE
+
+    return bytes_to_hex(VERSION_1 + input_count + input_block + output_count +
+                        output_block + LOCK_TIME)
+
+
+def bench(sign, private_key, unspents, outputs):
+    started = time.perf_counter()
+    tx_hex = sign(private_key, unspents, outputs)
+    return tx_hex, time.perf_counter() - started
+
+
+def main():
+    max_inputs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    private_key = PrivateKey.from_int(SECRET)
+    outputs = [(private_key.address, 500), (b'\x02\x6d\x02\x05hello', 0)]
+
+    print('{:>7} {:>12} {:>12} {:>12}'.format('inputs', 'legacy', 'buffer', 'per input'))
+    for n in INPUT_COUNTS:
+        if n > max_inputs:
+            break
+        unspents = make_unspents(private_key, n)
+        legacy, legacy_time = bench(legacy_create_p2pkh_transaction, private_key, unspents, outputs)
+        tx_hex, buffer_time = bench(create_p2pkh_transaction, private_key, unspents, outputs)
+        assert tx_hex == legacy
+        print('{:>7} {:>11.4f}s {:>11.4f}s {:>10.1f}us'.format(
+            n, legacy_time, buffer_time, buffer_time / n * 1e6))
+
+
+if __name__ == '__main__':
+    main()
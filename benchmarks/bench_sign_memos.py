@@ -0,0 +1,48 @@
+"""
+Throughput of offline signing: a chain of memo transactions signed with
+``sign_memos`` from a single unspent, without any network request.
+
+    $ python benchmarks/bench_sign_memos.py [number of memos]
+"""
+import sys
+import time
+
+from bitcash import PrivateKey
+from bitcash.network.meta import Unspent
+
+from bchmemo.memo import Memo
+from bchmemo.wallet import p2pkh_script
+from bchmemo.wallet import sign_memos
+
+SECRET = 0x1f2e3d4c5b6a7988
+FOLLOWED = 'bitcoincash:qzdxp2z5yuxzlskafh2d8wsq7grg7rt46csg3qcn80'
+
+
+def make_memos(sender, n):
+    memos = []
+    for i in range(n):
+        action = i % 3
+        if action == 0:
+            memos.append(Memo.post_memo('campaign memo {}'.format(i), sender))
+        elif action == 1:
+            memos.append(Memo.like_memo('{:064x}'.format(i), sender, tip_amount=546,
+                                        sender_of_liked_memo=FOLLOWED))
+        else:
+            memos.append(Memo.follow(FOLLOWED, sender))
+    return memos
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    private_key = PrivateKey.from_int(SECRET)
+    memos = make_memos(private_key.address, n)
+    unspents = [Unspent(10 ** 8, 1, p2pkh_script(private_key.address), 'ab' * 32, 0)]
+
+    started = time.perf_counter()
+    txs = sign_memos(private_key, memos, unspents)
+    elapsed = time.perf_counter() - started
+    print('{:>8} txs in {:.3f}s  {:>10,.0f} txs/sec'.format(len(txs), elapsed, len(txs) / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,488 @@
+"""
+asyncio counterpart of :mod:`bchmemo.bitcash_modified.services`.
+
+``AsyncNetworkAPI`` has the same surface and provider failover as
+``NetworkAPI`` with coroutines, so thousands of lookups can share one event
+loop. It needs the optional ``aiohttp`` package.
+"""
+import asyncio
+import time
+from datetime import date, datetime, timezone
+from itertools import chain
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from bitcash.network import currency_to_satoshi
+from bitcash.network.meta import Unspent
+
+from bchmemo.addresses import to_legacy_address
+from bchmemo.bitcash_modified import services
+from bchmemo.bitcash_modified.services import BCCBlockAPI, BlockdozerAPI, InsightAPI
+from bchmemo.bitcash_modified.services import BroadcastRejected, CircuitOpenError, ProviderHealth
+from bchmemo.bitcash_modified.services import remove_duplicate_txs
+
+DEFAULT_ASYNC_CONNECTIONS = 100  # connections per provider shared by all coroutines
+
+_closing = set()  # close tasks of stale sessions, referenced until done
+
+
+def _close_in_background(session):
+    task = asyncio.ensure_future(session.close())
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+class AsyncInsightAPI:
+    """Insight API client whose requests are coroutines.
+
+    Endpoints are the ones of :class:`~bchmemo.bitcash_modified.services.InsightAPI`;
+    set ``MAIN_ENDPOINT`` of a provider to point it to another server.
+    """
+    MAIN_ENDPOINT = ''
+
+    MAIN_ADDRESS_API = InsightAPI.MAIN_ADDRESS_API
+    MAIN_BALANCE_API = InsightAPI.MAIN_BALANCE_API
+    MAIN_UNSPENT_API = InsightAPI.MAIN_UNSPENT_API
+    MAIN_TX_PUSH_API = InsightAPI.MAIN_TX_PUSH_API
+    MAIN_TX_API = InsightAPI.MAIN_TX_API
+    MAIN_RAWTX_API = InsightAPI.MAIN_RAWTX_API
+    MAIN_TXS_BY_ADDRESSES_API = InsightAPI.MAIN_TXS_BY_ADDRESSES_API
+    TX_PUSH_PARAM = InsightAPI.TX_PUSH_PARAM
+    MAIN_TXS_BY_BLOCK = InsightAPI.MAIN_TXS_BY_BLOCK
+    MAIN_BLOCK_SUMMARIES_BY_DATE = InsightAPI.MAIN_BLOCK_SUMMARIES_BY_DATE
+    MAIN_BLOCKHASH_BY_HEIGHT = InsightAPI.MAIN_BLOCKHASH_BY_HEIGHT
+
+    NEW_ADDRESS_SUPPORTED = True
+
+    CONNECTIONS = DEFAULT_ASYNC_CONNECTIONS
+    HTTP_HEADERS = InsightAPI.HTTP_HEADERS
+
+    _sessions = None  # event loop -> aiohttp.ClientSession, per provider class
+
+    @classmethod
+    def _loop_sessions(cls):
+        if cls.__dict__.get('_sessions') is None:
+            cls._sessions = {}
+        return cls._sessions
+
+    @classmethod
+    def get_session(cls):
+        """Return the ``aiohttp.ClientSession`` of the provider for the
+        running event loop, creating it on first use.
+
+        A session only works on the loop it was created on, so every loop
+        gets its own; sessions of loops closed since then are closed here.
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncNetworkAPI requires aiohttp: pip install aiohttp')
+        loop = asyncio.get_running_loop()
+        sessions = cls._loop_sessions()
+        for stale_loop in [stale_loop for stale_loop in sessions if stale_loop.is_closed()]:
+            _close_in_background(sessions.pop(stale_loop))
+        session = sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=cls.CONNECTIONS)
+            session = aiohttp.ClientSession(connector=connector, headers=cls.HTTP_HEADERS)
+            sessions[loop] = session
+        return session
+
+    @classmethod
+    async def close_session(cls):
+        """Close the sessions of the provider on every event loop."""
+        sessions = cls._loop_sessions()
+        running_loop = asyncio.get_running_loop()
+        while sessions:
+            loop, session = sessions.popitem()
+            if loop is running_loop or loop.is_closed() or not loop.is_running():
+                await session.close()
+            else:
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), loop))
+
+    @classmethod
+    def _timeout(cls):
+        return aiohttp.ClientTimeout(total=services.DEFAULT_TIMEOUT)
+
+    @classmethod
+    async def _get_json(cls, path):
+        async with cls.get_session().get(cls.MAIN_ENDPOINT + path, timeout=cls._timeout()) as r:
+            if r.status != 200:
+                raise ConnectionError
+            return await r.json(content_type=None)
+
+    @classmethod
+    def _address(cls, address):
+        return address if cls.NEW_ADDRESS_SUPPORTED else to_legacy_address(address)
+
+    @classmethod
+    async def get_balance(cls, address):
+        return await cls._get_json(cls.MAIN_BALANCE_API.format(cls._address(address)))
+
+    @classmethod
+    async def get_transactions(cls, address):
+        data = await cls._get_json(cls.MAIN_ADDRESS_API + cls._address(address))
+        return data['transactions']
+
+    @classmethod
+    async def get_tx(cls, txid):
+        return await cls._get_json(cls.MAIN_TX_API + txid)
+
+    @classmethod
+    async def get_rawtx(cls, txid):
+        data = await cls._get_json(cls.MAIN_RAWTX_API + txid)
+        return data['rawtx']
+
+    @classmethod
+    async def get_unspent(cls, address):
+        data = await cls._get_json(cls.MAIN_UNSPENT_API.format(cls._address(address)))
+        return [
+            Unspent(currency_to_satoshi(tx['amount'], 'bch'),
+                    tx['confirmations'],
+                    tx['scriptPubKey'],
+                    tx['txid'],
+                    tx['vout'])
+            for tx in data
+        ]
+
+    @classmethod
+    async def broadcast_tx(cls, tx_hex):  # pragma: no cover
+        async with cls.get_session().post(cls.MAIN_ENDPOINT + cls.MAIN_TX_PUSH_API,
+                                          data={cls.TX_PUSH_PARAM: tx_hex},
+                                          timeout=cls._timeout()) as r:
+            if r.status >= 500:
+                raise ConnectionError(await r.read())
+            if r.status != 200:
+                raise BroadcastRejected(await r.read())
+            return True
+
+    @classmethod
+    async def get_transactions_by_addresses(cls, addresses, start_index=0, stop_index=50):
+        if stop_index - start_index > 50:
+            raise ValueError('Range between start_index ({}) and stop_index '
+                             '({}) less than or equal to 50!'.format(start_index, stop_index))
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses_str = ','.join(cls._address(address) for address in addresses)
+        data = await cls._get_json(cls.MAIN_TXS_BY_ADDRESSES_API.format(addresses_str, start_index, stop_index))
+        return data['totalItems'], data['items']
+
+    @classmethod
+    async def get_all_transactions_by_address(cls, address):
+        """Get all txs related to an address, the pages after the first one
+        fetched concurrently."""
+        total_txs, txs = await cls.get_transactions_by_addresses(address)
+        if total_txs <= 50:
+            return txs
+        pages = await asyncio.gather(*(
+            cls.get_transactions_by_addresses(address, start_index, min(start_index + 50, total_txs))
+            for start_index in range(50, total_txs, 50)))
+        return remove_duplicate_txs(chain(txs, *(page for _, page in pages)))
+
+    @classmethod
+    async def get_transactions_by_block(cls, block_hash, page_num=0):
+        data = await cls._get_json(cls.MAIN_TXS_BY_BLOCK.format(block_hash, page_num))
+        return int(data['pagesTotal']), data['txs']
+
+    @classmethod
+    async def get_all_transactions_by_block(cls, block_hash):
+        pages_total, txs = await cls.get_transactions_by_block(block_hash)
+        pages = await asyncio.gather(*(cls.get_transactions_by_block(block_hash, page_num)
+                                       for page_num in range(1, pages_total)))
+        return list(chain(txs, *(page for _, page in pages)))
+
+    @classmethod
+    async def get_block_summaries_by_date(cls, datestr=None):
+        """
+        :param datestr: 2016-06-12, today (UTC) by default
+        """
+        if datestr is None:
+            datestr = datetime.now().astimezone(timezone.utc).date().isoformat()
+        data = await cls._get_json(cls.MAIN_BLOCK_SUMMARIES_BY_DATE.format(datestr))
+        return list(reversed(data['blocks']))
+
+    @classmethod
+    async def get_block_summaries_by_from_to(cls, t_start, t_stop):
+        """
+        :param t_start: Unix timestamp
+        :param t_stop:  Unix timestamp
+        :return: block summaries that block time>=t_start and block.time<=t_stop
+        """
+        date_start = datetime.fromtimestamp(t_start, timezone.utc).date()
+        date_stop = datetime.fromtimestamp(t_stop, timezone.utc).date()
+        days = [date.fromordinal(day) for day in range(date_start.toordinal(), date_stop.toordinal() + 1)]
+
+        summaries_by_day = await asyncio.gather(*(cls.get_block_summaries_by_date(day.isoformat())
+                                                  for day in days))
+        return [block_summary for block_summary in chain.from_iterable(summaries_by_day)
+                if t_start <= int(block_summary['time']) <= t_stop]
+
+    @classmethod
+    async def get_blockhash_by_heigth(cls, height):
+        data = await cls._get_json(cls.MAIN_BLOCKHASH_BY_HEIGHT + str(height))
+        return data['blockHash']
+
+
+class AsyncBCCBlockAPI(AsyncInsightAPI):
+    MAIN_ENDPOINT = BCCBlockAPI.MAIN_ENDPOINT
+    NEW_ADDRESS_SUPPORTED = BCCBlockAPI.NEW_ADDRESS_SUPPORTED
+
+
+class AsyncBlockdozerAPI(AsyncInsightAPI):
+    MAIN_ENDPOINT = BlockdozerAPI.MAIN_ENDPOINT
+    NEW_ADDRESS_SUPPORTED = BlockdozerAPI.NEW_ADDRESS_SUPPORTED
+
+
+class AsyncNetworkAPI:
+    """Coroutine version of :class:`~bchmemo.bitcash_modified.services.NetworkAPI`.
+
+    Providers are tried healthiest first and skipped while their circuit is
+    open; reads are hedged when ``HEDGE_DELAY`` is set.
+    """
+    IGNORED_ERRORS = (ConnectionError, asyncio.TimeoutError) + \
+                     ((aiohttp.ClientError,) if aiohttp is not None else ())
+
+    PROVIDERS = [AsyncBCCBlockAPI, AsyncBlockdozerAPI]
+
+    GET_BALANCE_MAIN = [AsyncBCCBlockAPI.get_balance,
+                        AsyncBlockdozerAPI.get_balance]
+    GET_TRANSACTIONS_MAIN = [AsyncBCCBlockAPI.get_transactions,
+                             AsyncBlockdozerAPI.get_transactions]
+    GET_UNSPENT_MAIN = [AsyncBCCBlockAPI.get_unspent,
+                        AsyncBlockdozerAPI.get_unspent]
+    BROADCAST_TX_MAIN = [AsyncBCCBlockAPI.broadcast_tx,
+                         AsyncBlockdozerAPI.broadcast_tx]
+    GET_TX_MAIN = [AsyncBCCBlockAPI.get_tx,
+                   AsyncBlockdozerAPI.get_tx]
+    GET_RAWTX_MAIN = [AsyncBCCBlockAPI.get_rawtx,
+                      AsyncBlockdozerAPI.get_rawtx]
+    GET_ALL_TXS_BY_ADDRESS = [AsyncBCCBlockAPI.get_all_transactions_by_address,
+                              AsyncBlockdozerAPI.get_all_transactions_by_address]
+    GET_TXS_BY_ADDRESSES = [AsyncBCCBlockAPI.get_transactions_by_addresses,
+                            AsyncBlockdozerAPI.get_transactions_by_addresses]
+    GET_TXS_BY_BLOCK = [AsyncBCCBlockAPI.get_transactions_by_block,
+                        AsyncBlockdozerAPI.get_transactions_by_block]
+    GET_ALL_TXS_BY_BLOCK = [AsyncBCCBlockAPI.get_all_transactions_by_block,
+                            AsyncBlockdozerAPI.get_all_transactions_by_block]
+    GET_BLOCK_SUMMARIES_BY_FROM_TO = [AsyncBCCBlockAPI.get_block_summaries_by_from_to,
+                                      AsyncBlockdozerAPI.get_block_summaries_by_from_to]
+    BLOCKHASH_BY_HEIGHT = [AsyncBCCBlockAPI.get_blockhash_by_heigth,
+                           AsyncBlockdozerAPI.get_blockhash_by_heigth]
+
+    HEDGE_DELAY = None  # seconds; None disables hedging of reads
+
+    FAILURE_THRESHOLD = services.DEFAULT_FAILURE_THRESHOLD
+    CIRCUIT_RESET_TIMEOUT = services.DEFAULT_CIRCUIT_RESET_TIMEOUT
+
+    _health = {}
+
+    @classmethod
+    def set_endpoints(cls, *endpoints):
+        """Point the providers, in order, to other Insight API servers, e.g.
+        a local one."""
+        for provider, endpoint in zip(cls.PROVIDERS, endpoints):
+            provider.MAIN_ENDPOINT = endpoint
+
+    @classmethod
+    async def close(cls):
+        """Close the HTTP sessions of all providers."""
+        for provider in cls.PROVIDERS:
+            await provider.close_session()
+
+    @staticmethod
+    def _health_key(api_call):
+        provider = getattr(api_call, '__self__', None)
+        return (getattr(provider, '__name__', str(provider)), api_call.__name__)
+
+    @classmethod
+    def get_health(cls, api_call):
+        """Return the :class:`~bchmemo.bitcash_modified.services.ProviderHealth`
+        of a provider endpoint."""
+        key = cls._health_key(api_call)
+        health = cls._health.get(key)
+        if health is None:
+            health = cls._health.setdefault(
+                key, ProviderHealth(cls.FAILURE_THRESHOLD, cls.CIRCUIT_RESET_TIMEOUT))
+        return health
+
+    @classmethod
+    def health_stats(cls):
+        return {key: health.to_dict() for key, health in list(cls._health.items())}
+
+    @classmethod
+    def reset_health(cls):
+        cls._health = {}
+
+    @classmethod
+    def _order_apis(cls, api_calls):
+        available = [api_call for api_call in api_calls
+                     if cls.get_health(api_call).is_available()]
+        return sorted(available, key=lambda api_call: cls.get_health(api_call).score())
+
+    @classmethod
+    async def _tracked_call(cls, api_call, *args, **kwargs):
+        health = cls.get_health(api_call)
+        if not health.acquire():
+            raise CircuitOpenError('Circuit of {}.{} is open.'.format(*cls._health_key(api_call)))
+        started = time.monotonic()
+        try:
+            result = await api_call(*args, **kwargs)
+        except cls.IGNORED_ERRORS:
+            health.record_failure()
+            raise
+        except BaseException:
+            health.release()
+            raise
+        health.record_success(time.monotonic() - started)
+        return result
+
+    @classmethod
+    async def _call_apis(cls, api_calls, *args, hedge=False, **kwargs):
+        """Await providers in order until one of them answers, hedging like
+        ``NetworkAPI._call_apis``. Requests that lost the race are cancelled."""
+        api_calls = cls._order_apis(api_calls)
+
+        if not hedge or cls.HEDGE_DELAY is None or len(api_calls) < 2:
+            for api_call in api_calls:
+                try:
+                    return await cls._tracked_call(api_call, *args, **kwargs)
+                except cls.IGNORED_ERRORS:
+                    pass
+
+            raise ConnectionError('All APIs are unreachable.')
+
+        not_started = iter(api_calls)
+        pending = set()
+
+        def start_next():
+            api_call = next(not_started, None)
+            if api_call is not None:
+                pending.add(asyncio.ensure_future(cls._tracked_call(api_call, *args, **kwargs)))
+
+        start_next()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=cls.HEDGE_DELAY,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    start_next()
+                    continue
+                for task in done:
+                    pending.remove(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    if not isinstance(error, cls.IGNORED_ERRORS):
+                        raise error
+                    start_next()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise ConnectionError('All APIs are unreachable.')
+
+    @classmethod
+    async def get_balance(cls, address):
+        """Gets the balance of an address in satoshi.
+
+        :raises ConnectionError: If all API services fail.
+        :rtype: ``int``
+        """
+        return await cls._call_apis(cls.GET_BALANCE_MAIN, address)
+
+    @classmethod
+    async def get_transactions(cls, address):
+        """Gets the ID of all transactions related to an address.
+
+        :rtype: ``list`` of ``str``
+        """
+        return await cls._call_apis(cls.GET_TRANSACTIONS_MAIN, address)
+
+    @classmethod
+    async def get_tx(cls, txid):
+        """Gets tx dict by txid.
+
+        :rtype: ``dict``
+        """
+        return await cls._call_apis(cls.GET_TX_MAIN, txid, hedge=True)
+
+    @classmethod
+    async def get_rawtx(cls, txid):
+        """Gets rawtx by txid.
+
+        :rtype: ``str``
+        """
+        return await cls._call_apis(cls.GET_RAWTX_MAIN, txid)
+
+    @classmethod
+    async def get_unspent(cls, address):
+        """Gets all unspent transaction outputs belonging to an address.
+
+        :rtype: ``list`` of :class:`~bitcash.network.meta.Unspent`
+        """
+        return await cls._call_apis(cls.GET_UNSPENT_MAIN, address, hedge=True)
+
+    @classmethod
+    async def get_transactions_by_addresses(cls, addresses, start_index=0, stop_index=50):
+        """Gets transactions in dict related to address(es) from start_index
+        to stop_index, newest first.
+
+        :rtype: ``int``, ``list`` of ``dict``
+        :return: Number of all transactions and the transactions of the range
+        """
+        return await cls._call_apis(cls.GET_TXS_BY_ADDRESSES, addresses, start_index, stop_index, hedge=True)
+
+    @classmethod
+    async def get_all_transactions_by_address(cls, address):
+        """Gets all transactions in dict related to an address.
+
+        :rtype: ``list`` of ``dict``
+        """
+        return await cls._call_apis(cls.GET_ALL_TXS_BY_ADDRESS, address)
+
+    @classmethod
+    async def get_transactions_by_block(cls, block_hash, page_num=0):
+        """Gets one page of transactions in dict of a block.
+
+        :rtype: ``int``, ``list`` of ``dict``
+        :return: number of pages and transactions of the page
+        """
+        return await cls._call_apis(cls.GET_TXS_BY_BLOCK, block_hash, page_num, hedge=True)
+
+    @classmethod
+    async def get_all_transactions_by_block(cls, block_hash):
+        """Gets all transactions in dict of a block.
+
+        :rtype: ``list`` of ``dict``
+        """
+        return await cls._call_apis(cls.GET_ALL_TXS_BY_BLOCK, block_hash)
+
+    @classmethod
+    async def get_block_summaries_by_from_to(cls, t_start, t_stop):
+        """Gets summaries of blocks mined between two Unix timestamps, oldest
+        first.
+
+        :rtype: ``list`` of ``dict``
+        """
+        return await cls._call_apis(cls.GET_BLOCK_SUMMARIES_BY_FROM_TO, t_start, t_stop)
+
+    @classmethod
+    async def get_blockhash_by_height(cls, height):
+        return await cls._call_apis(cls.BLOCKHASH_BY_HEIGHT, height, hedge=True)
+
+    @classmethod
+    async def broadcast_tx(cls, tx_hex):  # pragma: no cover
+        """Broadcasts a transaction to the blockchain.
+
+        :raises ConnectionError: If all API services fail.
+        :raises BroadcastRejected: If a service rejects the transaction.
+        """
+        for api_call in cls._order_apis(cls.BROADCAST_TX_MAIN):
+            try:
+                await cls._tracked_call(api_call, tx_hex)
+                return
+            except cls.IGNORED_ERRORS:
+                pass
+
+        raise ConnectionError('All APIs are unreachable.')
@@ -1,22 +1,84 @@
 import logging
+import threading
+import time
 
 import requests
-from cashaddress import convert as cashaddress
+from requests.adapters import HTTPAdapter
 
 from bitcash.network import currency_to_satoshi
 from bitcash.network.meta import Unspent
 
 from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import chain
 
 from datetime import datetime,timezone,date
 
+from bchmemo.addresses import to_legacy_address
+from bchmemo.cache import BlockSummaryCache
+
 DEFAULT_TIMEOUT = 30
 
+DEFAULT_POOL_CONNECTIONS = 4  # number of hosts kept in a provider's pool
+DEFAULT_POOL_MAXSIZE = 16  # keep-alive connections kept per host
+DEFAULT_PAGE_FETCH_WORKERS = 4  # pages of one address fetched concurrently
+DEFAULT_HEDGE_WORKERS = 16  # threads shared by all hedged NetworkAPI reads
+DEFAULT_FAILURE_THRESHOLD = 3  # consecutive failures that open a circuit
+DEFAULT_CIRCUIT_RESET_TIMEOUT = 60  # seconds before an open circuit is probed
+DEFAULT_REORG_DEPTH = 10  # blocks below the best height a block hash is final
+MAX_BLOCK_TIME_DRIFT = 2 * 60 * 60  # seconds a block time may be ahead of the clock
+
 
 def set_service_timeout(seconds):
     global DEFAULT_TIMEOUT
     DEFAULT_TIMEOUT = seconds
 
+def remove_duplicate_txs(txs):
+    """Remove txs with a txid seen before, keeping the order of first appearance.
+
+    :param txs: iterable of tx dicts
+    :rtype: ``list`` of ``dict``
+    """
+    txs_no_duplicate=OrderedDict()
+    for tx in txs:
+        txs_no_duplicate.setdefault(tx['txid'],tx)
+    return list(txs_no_duplicate.values())
+
+def iter_address_pages(get_transactions_by_addresses,addresses,start_index=0,t=None):
+    """Yield txs related to address(es) page by page, newest first.
+
+    Only one page is held at a time. A tx shifted into the next page by a new
+    tx is skipped, as each page is checked against the txids of the one
+    before it.
+
+    :param get_transactions_by_addresses: function fetching one page
+    :param t: Unix timestamp; stop after the page reaching a tx older than t
+    """
+    previous_txids=set()
+    while True:
+        total_txs,txs=get_transactions_by_addresses(addresses,start_index,start_index+50)
+        for tx in txs:
+            if tx['txid'] not in previous_txids:
+                yield tx
+        start_index+=50
+        if start_index>=total_txs or not txs:
+            return
+        if t is not None and int(txs[-1]['time'])<t:
+            return
+        previous_txids={tx['txid'] for tx in txs}
+
+def iter_block_pages(get_transactions_by_block,block_hash):
+    """Yield txs of a block page by page.
+
+    :param get_transactions_by_block: function fetching one page
+    """
+    page_num=0
+    pages_total=1
+    while page_num<pages_total:
+        pages_total,txs=get_transactions_by_block(block_hash,page_num)
+        yield from txs
+        page_num+=1
+
 class InsightAPI:
     MAIN_ENDPOINT = ''
     # MAIN_ADDRESS_API = ''
@@ -40,15 +102,94 @@ class InsightAPI:
     MAIN_BLOCK_SUMMARIES_BY_DATE='blocks?blockDate={}'  # date: 2016-4-20
 
     MAIN_BLOCKHASH_BY_HEIGHT= 'block-index/'
+    MAIN_BLOCK_API = 'block/'
+    MAIN_STATUS_API = 'status?q=getInfo'
 
 
     NEW_ADDRESS_SUPPORTED=True
 
+    PAGE_FETCH_WORKERS = DEFAULT_PAGE_FETCH_WORKERS
+
+    BLOCK_SUMMARY_CACHE = BlockSummaryCache()  # summaries of completed days, shared by providers
+
+    POOL_CONNECTIONS = DEFAULT_POOL_CONNECTIONS
+    POOL_MAXSIZE = DEFAULT_POOL_MAXSIZE
+    HTTP_HEADERS = {'Accept-Encoding': 'gzip, deflate',
+                    'Connection': 'keep-alive'}
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls):
+        """Return the keep-alive session owned by this provider class.
+
+        Every provider class gets its own :class:`requests.Session`, so
+        connections to one host are pooled and reused across calls.
+        """
+        session = cls.__dict__.get('_session')
+        if session is None:
+            with cls._session_lock:
+                session = cls.__dict__.get('_session')
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=cls.POOL_CONNECTIONS,
+                                          pool_maxsize=cls.POOL_MAXSIZE)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update(cls.HTTP_HEADERS)
+                    cls._session = session
+        return session
+
+    @classmethod
+    def close_session(cls):
+        with cls._session_lock:
+            session = cls.__dict__.get('_session')
+            cls._session = None
+        if session is not None:
+            session.close()
+
+    @classmethod
+    def set_pool_size(cls, pool_connections=None, pool_maxsize=None):
+        """Resize the connection pool of this provider.
+
+        :param pool_connections: number of hosts to keep pools for
+        :param pool_maxsize: number of keep-alive connections per host
+        """
+        if pool_connections is not None:
+            cls.POOL_CONNECTIONS = pool_connections
+        if pool_maxsize is not None:
+            cls.POOL_MAXSIZE = pool_maxsize
+        cls.close_session()
+
+    @classmethod
+    def connection_stats(cls):
+        """Return request and connection counters of this provider's pool.
+
+        ``reused`` is the number of requests served by an already open
+        connection, i.e. the TCP+TLS handshakes saved by keep-alive.
+
+        :rtype: ``dict``
+        """
+        stats = {'requests': 0, 'connections': 0}
+        session = cls.__dict__.get('_session')
+        if session is not None:
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    stats['requests'] += pool.num_requests
+                    stats['connections'] += pool.num_connections
+        stats['reused'] = stats['requests'] - stats['connections']
+        return stats
+
     @classmethod
     def get_balance(cls, address):
         if not cls.NEW_ADDRESS_SUPPORTED:
-            address = cashaddress.to_legacy_address(address)
-        r = requests.get((cls.MAIN_ENDPOINT+cls.MAIN_BALANCE_API).format(address), timeout=DEFAULT_TIMEOUT)
+            address = to_legacy_address(address)
+        r = cls.get_session().get((cls.MAIN_ENDPOINT+cls.MAIN_BALANCE_API).format(address), timeout=DEFAULT_TIMEOUT)
         if r.status_code != 200:  # pragma: no cover
             raise ConnectionError
         return r.json()
@@ -61,15 +202,15 @@ class InsightAPI:
         :return:list of transaction hash
         """
         if not cls.NEW_ADDRESS_SUPPORTED:
-            address = cashaddress.to_legacy_address(address)
-        r = requests.get(cls.MAIN_ENDPOINT+cls.MAIN_ADDRESS_API + address, timeout=DEFAULT_TIMEOUT)
+            address = to_legacy_address(address)
+        r = cls.get_session().get(cls.MAIN_ENDPOINT+cls.MAIN_ADDRESS_API + address, timeout=DEFAULT_TIMEOUT)
         if r.status_code != 200:  # pragma: no cover
             raise ConnectionError
         return r.json()['transactions']
 
     @classmethod
     def get_tx_amount(cls, txid, txindex):
-        r = requests.get(cls.MAIN_ENDPOINT+cls.MAIN_TX_API+txid, timeout=DEFAULT_TIMEOUT)
+        r = cls.get_session().get(cls.MAIN_ENDPOINT+cls.MAIN_TX_API+txid, timeout=DEFAULT_TIMEOUT)
         if r.status_code != 200:  # pragma: no cover
             raise ConnectionError
         response = r.json()
@@ -77,7 +218,7 @@ class InsightAPI:
 
     @classmethod
     def get_tx(cls, txid):
-        r = requests.get(cls.MAIN_ENDPOINT+cls.MAIN_TX_API+txid, timeout=DEFAULT_TIMEOUT)
+        r = cls.get_session().get(cls.MAIN_ENDPOINT+cls.MAIN_TX_API+txid, timeout=DEFAULT_TIMEOUT)
         if r.status_code != 200:  # pragma: no cover
             raise ConnectionError
         response = r.json()
@@ -85,7 +226,7 @@ class InsightAPI:
 
     @classmethod
     def get_rawtx(cls, txid):
-        r = requests.get(cls.MAIN_ENDPOINT+cls.MAIN_RAWTX_API+txid, timeout=DEFAULT_TIMEOUT)
+        r = cls.get_session().get(cls.MAIN_ENDPOINT+cls.MAIN_RAWTX_API+txid, timeout=DEFAULT_TIMEOUT)
         if r.status_code != 200:  # pragma: no cover
             raise ConnectionError
         response = r.json()
@@ -94,8 +235,8 @@ class InsightAPI:
     @classmethod
     def get_unspent(cls, address):
         if not cls.NEW_ADDRESS_SUPPORTED:
-            address = cashaddress.to_legacy_address(address)
-        r = requests.get((cls.MAIN_ENDPOINT+cls.MAIN_UNSPENT_API).format(address), timeout=DEFAULT_TIMEOUT)
+            address = to_legacy_address(address)
+        r = cls.get_session().get((cls.MAIN_ENDPOINT+cls.MAIN_UNSPENT_API).format(address), timeout=DEFAULT_TIMEOUT)
         if r.status_code != 200:  # pragma: no cover
             raise ConnectionError
         return [
@@ -109,10 +250,12 @@ class InsightAPI:
 
     @classmethod
     def broadcast_tx(cls, tx_hex):  # pragma: no cover
-        r = requests.post(cls.MAIN_ENDPOINT+cls.MAIN_TX_PUSH_API, data={cls.TX_PUSH_PARAM: tx_hex}, timeout=DEFAULT_TIMEOUT)
+        r = cls.get_session().post(cls.MAIN_ENDPOINT+cls.MAIN_TX_PUSH_API, data={cls.TX_PUSH_PARAM: tx_hex}, timeout=DEFAULT_TIMEOUT)
+        if r.status_code>=500:
+            raise ConnectionError(r.content)
         if r.status_code!=200:
-            raise Exception(r.content)
-        return True if r.status_code == 200 else False
+            raise BroadcastRejected(r.content)
+        return True
 
     @classmethod
     def get_transactions_by_addresses(cls,addresses,start_index=0,stop_index=50):
@@ -122,10 +265,10 @@ class InsightAPI:
         if isinstance(addresses,str):
             addresses=[addresses]
         if not cls.NEW_ADDRESS_SUPPORTED:
-            addresses = [cashaddress.to_legacy_address(address) for address in addresses]
+            addresses = [to_legacy_address(address) for address in addresses]
         addresses_str=','.join(addresses)
 
-        r=requests.get((cls.MAIN_ENDPOINT + cls.MAIN_TXS_BY_ADDRESSES_API).
+        r=cls.get_session().get((cls.MAIN_ENDPOINT + cls.MAIN_TXS_BY_ADDRESSES_API).
                        format(addresses_str,start_index,stop_index), timeout=DEFAULT_TIMEOUT)
         if r.status_code!=200:
             raise ConnectionError
@@ -136,31 +279,37 @@ class InsightAPI:
         return total_txs,txs
 
     @classmethod
-    def get_all_transactions_by_address(cls,address):
+    def get_all_transactions_by_address(cls,address,max_workers=None):
         """
         Get all txs related to an address
         :param address:
+        :param max_workers: number of pages fetched concurrently, default is
+            ``PAGE_FETCH_WORKERS`` of the provider. 1 fetches pages one by one.
         :return:
         """
         total_txs,txs=cls.get_transactions_by_addresses(address)
         if total_txs<=50:
             return txs
         else:
-            # if total_txs>50*10:
-            #     raise TooManyTxs('Too many txs!')
-            #     # todo: deal with too many txs
+            if max_workers is None:
+                max_workers=cls.PAGE_FETCH_WORKERS
             start_indexes=list(range(50,total_txs,50))
             stop_indexes=list(range(100,total_txs,50))+[total_txs]
-            for start_index,stop_index in zip(start_indexes,stop_indexes):
-                total_txs, txs_follow_up = cls.get_transactions_by_addresses\
-                    (address,start_index=start_index,stop_index=stop_index)
-                txs=txs+txs_follow_up
 
-            txs_id=[tx['txid'] for tx in txs]
-            normal_dict=dict(zip(txs_id,txs))
-            txs_id_no_duplicate=list(OrderedDict.fromkeys(txs_id).keys())  # remove duplicate txs
-            txs_no_duplicate=[normal_dict[txid] for txid in txs_id_no_duplicate]
-            return txs_no_duplicate
+            def fetch_page(window):
+                start_index,stop_index=window
+                return cls.get_transactions_by_addresses\
+                    (address,start_index=start_index,stop_index=stop_index)[1]
+
+            windows=zip(start_indexes,stop_indexes)
+            pages=[txs]
+            if max_workers<=1:
+                pages.extend(map(fetch_page,windows))
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    pages.extend(executor.map(fetch_page,windows))
+
+            return remove_duplicate_txs(chain.from_iterable(pages))
 
     @classmethod
     def get_transactions_by_address_from(cls,address,t):
@@ -185,19 +334,15 @@ class InsightAPI:
             for start_index,stop_index in zip(start_indexes,stop_indexes):
                 total_txs, txs_follow_up = cls.get_transactions_by_addresses\
                     (address,start_index=start_index,stop_index=stop_index)
-                txs=txs+txs_follow_up
+                txs.extend(txs_follow_up)
                 if int(txs[-1]['time']) < t:
                     break
 
-            txs_id=[tx['txid'] for tx in txs]
-            normal_dict=dict(zip(txs_id,txs))
-            txs_id_no_duplicate=list(OrderedDict.fromkeys(txs_id).keys())  # remove duplicate txs
-            txs_no_duplicate=[normal_dict[txid] for txid in txs_id_no_duplicate]
-            return txs_no_duplicate
+            return remove_duplicate_txs(txs)
 
     @classmethod
     def get_transactions_by_block(cls,block_hash,page_num=0):
-        r=requests.get((cls.MAIN_ENDPOINT+cls.MAIN_TXS_BY_BLOCK).format(block_hash,page_num),timeout=DEFAULT_TIMEOUT)
+        r=cls.get_session().get((cls.MAIN_ENDPOINT+cls.MAIN_TXS_BY_BLOCK).format(block_hash,page_num),timeout=DEFAULT_TIMEOUT)
         if r.status_code!=200:
             raise  ConnectionError
         data=r.json()
@@ -207,11 +352,26 @@ class InsightAPI:
 
     @classmethod
     def get_all_transactions_by_block(cls,block_hash):
-        pages_total,txs=cls.get_transactions_by_block(block_hash,0)
-        for i in range(1,pages_total):
-            pt,txs_new=cls.get_transactions_by_block(block_hash,i)
-            txs+=txs_new
-        return txs
+        return list(cls.iter_transactions_by_block(block_hash))
+
+    @classmethod
+    def iter_transactions_by_address(cls,address,start_index=0):
+        """
+        Yield txs related to an address (or a list of addresses), newest
+        first, fetching one page at a time.
+        """
+        return iter_address_pages(cls.get_transactions_by_addresses,address,start_index)
+
+    @classmethod
+    def iter_transactions_by_address_from(cls,address,t):
+        """
+        Yield txs related to an address after t, some tx before t may included
+        """
+        return iter_address_pages(cls.get_transactions_by_addresses,address,t=t)
+
+    @classmethod
+    def iter_transactions_by_block(cls,block_hash):
+        return iter_block_pages(cls.get_transactions_by_block,block_hash)
 
     @classmethod
     def get_block_summaries_by_date(cls,datestr=None):
@@ -223,7 +383,7 @@ class InsightAPI:
         if datestr is None:
             datestr=datetime.now().astimezone(timezone.utc).date().isoformat()
         
-        r=requests.get((cls.MAIN_ENDPOINT+cls.MAIN_BLOCK_SUMMARIES_BY_DATE).format(datestr),timeout=DEFAULT_TIMEOUT)
+        r=cls.get_session().get((cls.MAIN_ENDPOINT+cls.MAIN_BLOCK_SUMMARIES_BY_DATE).format(datestr),timeout=DEFAULT_TIMEOUT)
         if r.status_code!=200:
             raise  ConnectionError
         data=r.json()
@@ -244,30 +404,98 @@ class InsightAPI:
         dates_ordinal_list=list(range(date_start.toordinal(),date_stop.toordinal()))+[(date_stop.toordinal())]
         dates=[date.fromordinal(day) for day in dates_ordinal_list]
 
-        block_summaries=[]
-        for day in dates:
-            block_summaries+=cls.get_block_summaries_by_date(day.isoformat())
+        summaries_by_day=cls.get_block_summaries_by_dates([day.isoformat() for day in dates])
 
-        block_summaries=[block_summary for block_summary in block_summaries
-                         if int(block_summary['time'])>=t_start and int(block_summary['time']<=t_stop)]
+        block_summaries=[block_summary for block_summary in chain.from_iterable(summaries_by_day)
+                         if int(block_summary['time'])>=t_start and int(block_summary['time'])<=t_stop]
         return block_summaries
 
     @classmethod
-    def get_transactions_from_to(cls,t_start,t_stop):
-        block_summaries=cls.get_block_summaries_by_from_to(t_start,t_stop)
+    def get_block_summaries_by_dates(cls,datestrs,max_workers=None):
+        """
+        Get block summaries of several days.
+
+        Summaries of completed UTC days come from ``BLOCK_SUMMARY_CACHE``
+        once fetched; missing days are fetched concurrently.
+
+        :param datestrs: list of dates like 2016-06-12
+        :param max_workers: number of days fetched concurrently, default is
+            ``PAGE_FETCH_WORKERS``
+        :return: list of the block summaries of every day, in the order of datestrs
+        """
+        summary_cache=cls.BLOCK_SUMMARY_CACHE
+        # A day is over once no block can be stamped with it anymore.
+        last_completed=datetime.fromtimestamp(time.time()-MAX_BLOCK_TIME_DRIFT,timezone.utc).date()
+        completed=[date.fromisoformat(datestr)<last_completed for datestr in datestrs]
+
+        summaries_by_day=[summary_cache.get_day(datestr) if summary_cache is not None and is_completed else None
+                          for datestr,is_completed in zip(datestrs,completed)]
+        missing=[i for i,block_summaries in enumerate(summaries_by_day) if block_summaries is None]
+
+        if max_workers is None:
+            max_workers=cls.PAGE_FETCH_WORKERS
+        missing_datestrs=[datestrs[i] for i in missing]
+        if max_workers<=1 or len(missing)<=1:
+            fetched=list(map(cls.get_block_summaries_by_date,missing_datestrs))
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                fetched=list(executor.map(cls.get_block_summaries_by_date,missing_datestrs))
+
+        for i,block_summaries in zip(missing,fetched):
+            summaries_by_day[i]=block_summaries
+            if summary_cache is not None and completed[i]:
+                summary_cache.put_day(datestrs[i],block_summaries)
+        return summaries_by_day
+
+    @classmethod
+    def get_transactions_from_to(cls,t_start,t_stop,block_index=None):
+        """
+        Get txs of blocks mined between two Unix timestamps.
+
+        :param block_index: find the blocks by binary search over heights
+            instead of by daily block summaries
+        :type block_index: :class:`~bchmemo.blocktime.BlockTimeIndex`
+        """
+        if block_index is not None:
+            start_height,stop_height=block_index.height_range(t_start,t_stop)
+            # Through NetworkAPI, so that the hashes are cached and another
+            # provider is tried when this one fails.
+            block_hashes=[NetworkAPI.get_blockhash_by_height(height) for height in range(start_height,stop_height+1)]
+        else:
+            block_hashes=[block['hash'] for block in cls.get_block_summaries_by_from_to(t_start,t_stop)]
         txs=[]
-        for block in block_summaries:
-            txs+=cls.get_all_transactions_by_block(block['hash'])
+        for block_hash in block_hashes:
+            txs+=cls.get_all_transactions_by_block(block_hash)
         return txs
 
     @classmethod
     def get_blockhash_by_heigth(cls,height):
-        r=requests.get(cls.MAIN_ENDPOINT+ cls.MAIN_BLOCKHASH_BY_HEIGHT+str(height))
+        r=cls.get_session().get(cls.MAIN_ENDPOINT+ cls.MAIN_BLOCKHASH_BY_HEIGHT+str(height),timeout=DEFAULT_TIMEOUT)
         if r.status_code!=200:
             raise  ConnectionError
         data=r.json()
         return data['blockHash']
 
+    @classmethod
+    def get_block(cls,block_hash):
+        """
+        :return: block dict (hash, height, time, tx, ...)
+        """
+        r=cls.get_session().get(cls.MAIN_ENDPOINT+cls.MAIN_BLOCK_API+block_hash,timeout=DEFAULT_TIMEOUT)
+        if r.status_code!=200:
+            raise  ConnectionError
+        return r.json()
+
+    @classmethod
+    def get_block_count(cls):
+        """
+        :return: height of the best block
+        """
+        r=cls.get_session().get(cls.MAIN_ENDPOINT+cls.MAIN_STATUS_API,timeout=DEFAULT_TIMEOUT)
+        if r.status_code!=200:
+            raise  ConnectionError
+        return int(r.json()['info']['blocks'])
+
 
 class BCCBlockAPI(InsightAPI):
     """
@@ -336,21 +564,21 @@ class BlockdozerAPI(InsightAPI):
 
     @classmethod
     def get_balance_testnet(cls, address):
-        r = requests.get(cls.TEST_BALANCE_API.format(address), timeout=DEFAULT_TIMEOUT)
+        r = cls.get_session().get(cls.TEST_BALANCE_API.format(address), timeout=DEFAULT_TIMEOUT)
         if r.status_code != 200:  # pragma: no cover
             raise ConnectionError
         return r.json()
 
     @classmethod
     def get_transactions_testnet(cls, address):
-        r = requests.get(cls.TEST_ADDRESS_API + address, timeout=DEFAULT_TIMEOUT)
+        r = cls.get_session().get(cls.TEST_ADDRESS_API + address, timeout=DEFAULT_TIMEOUT)
         if r.status_code != 200:  # pragma: no cover
             raise ConnectionError
         return r.json()['transactions']
 
     @classmethod
     def get_unspent_testnet(cls, address):
-        r = requests.get(cls.TEST_UNSPENT_API.format(address), timeout=DEFAULT_TIMEOUT)
+        r = cls.get_session().get(cls.TEST_UNSPENT_API.format(address), timeout=DEFAULT_TIMEOUT)
         if r.status_code != 200:  # pragma: no cover
             raise ConnectionError
         return [
@@ -364,19 +592,172 @@ class BlockdozerAPI(InsightAPI):
 
     @classmethod
     def broadcast_tx_testnet(cls, tx_hex):  # pragma: no cover
-        r = requests.post(cls.TEST_TX_PUSH_API, data={cls.TX_PUSH_PARAM: tx_hex}, timeout=DEFAULT_TIMEOUT)
+        r = cls.get_session().post(cls.TEST_TX_PUSH_API, data={cls.TX_PUSH_PARAM: tx_hex}, timeout=DEFAULT_TIMEOUT)
         if r.status_code == 200:
             return True
         else:
             logging.error(r.text)
             return False
 
+class CircuitOpenError(ConnectionError):
+    pass
+
+class BroadcastRejected(Exception):
+    """A provider refused a transaction, e.g. because its unspents were
+    already used; unlike a ConnectionError, sending it again won't help."""
+
+class ProviderHealth:
+    """
+    Latency and error statistics of one endpoint of one provider, with a
+    circuit breaker.
+
+    The circuit opens after ``failure_threshold`` consecutive failures. Once
+    ``reset_timeout`` seconds have passed, a single half-open probe is let
+    through: its success closes the circuit, its failure opens it again.
+    """
+    CLOSED='closed'
+    OPEN='open'
+    HALF_OPEN='half-open'
+
+    SMOOTHING=0.2  # weight of the newest sample in the moving averages
+
+    def __init__(self,failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold=failure_threshold
+        self.reset_timeout=reset_timeout
+
+        self.state=self.CLOSED
+        self.latency=None  # moving average in seconds
+        self.error_rate=0.0  # moving average between 0 and 1
+        self.consecutive_failures=0
+        self.requests=0
+        self.failures=0
+
+        self._opened_at=None
+        self._probing=False
+        self._lock=threading.Lock()
+
+    def _cooled_down(self):
+        return time.monotonic()-self._opened_at>=self.reset_timeout
+
+    def is_available(self):
+        """Return whether or not a request may be sent now (a probe included)."""
+        with self._lock:
+            if self.state==self.CLOSED:
+                return True
+            if self.state==self.OPEN:
+                return self._cooled_down()
+            return not self._probing
+
+    def acquire(self):
+        """Reserve a request slot, turning an open circuit half-open if it is due."""
+        with self._lock:
+            if self.state==self.CLOSED:
+                return True
+            if self.state==self.OPEN:
+                if not self._cooled_down():
+                    return False
+                self.state=self.HALF_OPEN
+                self._probing=False
+            if self._probing:
+                return False
+            self._probing=True
+            return True
+
+    def release(self):
+        with self._lock:
+            self._probing=False
+
+    def record_success(self,latency):
+        with self._lock:
+            self.requests+=1
+            self.consecutive_failures=0
+            self.latency=latency if self.latency is None \
+                else self.latency+self.SMOOTHING*(latency-self.latency)
+            self.error_rate-=self.SMOOTHING*self.error_rate
+            self.state=self.CLOSED
+            self._probing=False
+
+    def record_failure(self):
+        with self._lock:
+            self.requests+=1
+            self.failures+=1
+            self.consecutive_failures+=1
+            self.error_rate+=self.SMOOTHING*(1-self.error_rate)
+            if self.state==self.HALF_OPEN or self.consecutive_failures>=self.failure_threshold:
+                self.state=self.OPEN
+                self._opened_at=time.monotonic()
+            self._probing=False
+
+    def score(self):
+        """Expected cost of a request in seconds, lower is better.
+
+        A failure is charged as a full ``DEFAULT_TIMEOUT``. Providers without
+        samples score 0 so that they get tried.
+        """
+        return (self.latency or 0)+self.error_rate*DEFAULT_TIMEOUT
+
+    def to_dict(self):
+        return {'state':self.state,
+                'latency':self.latency,
+                'error_rate':self.error_rate,
+                'requests':self.requests,
+                'failures':self.failures}
+
+class SingleFlight:
+    """
+    Coalescer of identical concurrent calls.
+
+    The first caller of a key runs the call; callers arriving with the same
+    key while it is in flight wait for it and get the same result (or
+    exception) instead of issuing their own. Results are shared, so callers
+    must not mutate them.
+    """
+
+    def __init__(self):
+        self.calls=0  # calls actually run
+        self.collapsed=0  # calls served by another in-flight call
+        self._in_flight={}  # key -> Future
+        self._lock=threading.Lock()
+
+    def do(self,key,fn,*args,**kwargs):
+        with self._lock:
+            future=self._in_flight.get(key)
+            leader=future is None
+            if leader:
+                future=self._in_flight[key]=Future()
+                self.calls+=1
+            else:
+                self.collapsed+=1
+        if not leader:
+            return future.result()
+
+        try:
+            result=fn(*args,**kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self):
+        with self._lock:
+            return {'calls':self.calls,
+                    'collapsed':self.collapsed,
+                    'in_flight':len(self._in_flight)}
+
 class NetworkAPI:
     IGNORED_ERRORS = (ConnectionError,
                       requests.exceptions.ConnectionError,
                       requests.exceptions.Timeout,
                       requests.exceptions.ReadTimeout)
 
+    PROVIDERS = [BCCBlockAPI, BlockdozerAPI]
+
     GET_BALANCE_MAIN = [BCCBlockAPI.get_balance,
                         BlockdozerAPI.get_balance]
     GET_TRANSACTIONS_MAIN = [BCCBlockAPI.get_transactions,
@@ -400,14 +781,261 @@ class NetworkAPI:
     GET_TXS_BY_ADDRESS_FROM=[BCCBlockAPI.get_transactions_by_address_from,
                         BlockdozerAPI.get_transactions_by_address_from]
 
+    GET_TXS_BY_BLOCK=[BCCBlockAPI.get_transactions_by_block,
+                      BlockdozerAPI.get_transactions_by_block]
+
+    GET_BLOCK_SUMMARIES_BY_FROM_TO=[BCCBlockAPI.get_block_summaries_by_from_to,
+                                    BlockdozerAPI.get_block_summaries_by_from_to]
+
     BLOCKHASH_BY_HEIGHT=[BCCBlockAPI.get_blockhash_by_heigth,
                          BlockdozerAPI.get_blockhash_by_heigth]
 
+    GET_BLOCK=[BCCBlockAPI.get_block,
+               BlockdozerAPI.get_block]
+
+    GET_BLOCK_COUNT=[BCCBlockAPI.get_block_count,
+                     BlockdozerAPI.get_block_count]
+
     GET_BALANCE_TEST = [BlockdozerAPI.get_balance_testnet]
     GET_TRANSACTIONS_TEST = [BlockdozerAPI.get_transactions_testnet]
     GET_UNSPENT_TEST = [BlockdozerAPI.get_unspent_testnet]
     BROADCAST_TX_TEST = [BlockdozerAPI.broadcast_tx_testnet]
 
+    HEDGE_DELAY = None  # seconds; None disables hedging of reads
+    HEDGE_WORKERS = DEFAULT_HEDGE_WORKERS
+
+    _hedge_executor = None
+    _hedge_lock = threading.Lock()
+
+    FAILURE_THRESHOLD = DEFAULT_FAILURE_THRESHOLD
+    CIRCUIT_RESET_TIMEOUT = DEFAULT_CIRCUIT_RESET_TIMEOUT
+
+    _health = {}
+    _health_lock = threading.Lock()
+
+    TX_CACHE = None  # bchmemo.cache.TxCache of confirmed txs
+
+    SINGLE_FLIGHT = SingleFlight()  # coalesces identical concurrent reads
+
+    RESPONSE_CACHE = None  # bchmemo.cache.TTLCache of recent reads
+    RESPONSE_TTLS = {'get_balance': 10,
+                     'get_unspent': 10,
+                     'get_transactions_by_addresses': 10,  # first page only
+                     'get_blockhash_by_height': 24 * 60 * 60}  # seconds
+    REORG_DEPTH = DEFAULT_REORG_DEPTH
+
+    _best_height = -1  # highest block height seen in responses
+    _best_height_lock = threading.Lock()
+
+    @classmethod
+    def set_tx_cache(cls, tx_cache):
+        """Keep confirmed txs fetched by get_tx and get_rawtx in a cache.
+
+        :param tx_cache: the cache, ``None`` to disable caching
+        :type tx_cache: :class:`~bchmemo.cache.TxCache`
+        """
+        cls.TX_CACHE = tx_cache
+
+    @classmethod
+    def set_block_summary_cache(cls, summary_cache):
+        """Keep the block summaries of completed days in another cache, e.g.
+        a persistent one, for all providers.
+
+        :param summary_cache: the cache, ``None`` to disable caching
+        :type summary_cache: :class:`~bchmemo.cache.BlockSummaryCache`
+        """
+        InsightAPI.BLOCK_SUMMARY_CACHE = summary_cache
+
+    @classmethod
+    def set_response_cache(cls, response_cache, **ttls):
+        """Keep recent balances, unspents, first pages of address txs and
+        block hashes in an in-memory cache.
+
+        A block hash is only cached once it is ``REORG_DEPTH`` blocks below
+        the best height seen.
+
+        :param response_cache: the cache, ``None`` to disable caching
+        :type response_cache: :class:`~bchmemo.cache.TTLCache`
+        :param ttls: seconds per endpoint, overriding ``RESPONSE_TTLS``,
+            e.g. ``get_unspent=5``
+        """
+        cls.RESPONSE_CACHE = response_cache
+        cls.RESPONSE_TTLS = dict(cls.RESPONSE_TTLS, **ttls)
+
+    @classmethod
+    def invalidate_response(cls, endpoint, *args):
+        """Drop a cached response, e.g. ``invalidate_response('get_unspent', address)``."""
+        response_cache = cls.RESPONSE_CACHE
+        if response_cache is not None:
+            response_cache.discard((endpoint,) + args)
+
+    @classmethod
+    def _cached(cls, endpoint, args, fetch, cacheable=None):
+        response_cache = cls.RESPONSE_CACHE
+        if response_cache is None:
+            return fetch()
+        key = (endpoint,) + args
+        response = response_cache.get(key)
+        if response is not response_cache.MISSING:
+            return response
+        response = fetch()
+        if cacheable is None or cacheable(response):
+            response_cache.put(key, response, cls.RESPONSE_TTLS[endpoint])
+        return response
+
+    @classmethod
+    def _see_heights(cls, txs):
+        cls._see_height(max((tx.get('blockheight') or -1 for tx in txs), default=-1))
+
+    @classmethod
+    def _see_height(cls, height):
+        # Hedged reads run in worker threads: only ever raise the best height.
+        with cls._best_height_lock:
+            if height > cls._best_height:
+                cls._best_height = height
+
+    @staticmethod
+    def _health_key(api_call):
+        provider = getattr(api_call, '__self__', None)
+        return (getattr(provider, '__name__', str(provider)), api_call.__name__)
+
+    @classmethod
+    def get_health(cls, api_call):
+        """Return the :class:`ProviderHealth` of a provider endpoint."""
+        key = cls._health_key(api_call)
+        health = cls._health.get(key)
+        if health is None:
+            with cls._health_lock:
+                health = cls._health.setdefault(
+                    key, ProviderHealth(cls.FAILURE_THRESHOLD, cls.CIRCUIT_RESET_TIMEOUT))
+        return health
+
+    @classmethod
+    def health_stats(cls):
+        """Return latency, error rate and circuit state per provider endpoint.
+
+        :rtype: ``dict`` of ``(provider, endpoint)`` to ``dict``
+        """
+        return {key: health.to_dict() for key, health in list(cls._health.items())}
+
+    @classmethod
+    def reset_health(cls):
+        with cls._health_lock:
+            cls._health = {}
+
+    @classmethod
+    def _order_apis(cls, api_calls):
+        """Drop providers with an open circuit and sort the rest by health score."""
+        available = [api_call for api_call in api_calls
+                     if cls.get_health(api_call).is_available()]
+        return sorted(available, key=lambda api_call: cls.get_health(api_call).score())
+
+    @classmethod
+    def _tracked_call(cls, api_call, *args, **kwargs):
+        health = cls.get_health(api_call)
+        if not health.acquire():
+            raise CircuitOpenError('Circuit of {}.{} is open.'.format(*cls._health_key(api_call)))
+        started = time.monotonic()
+        try:
+            result = api_call(*args, **kwargs)
+        except cls.IGNORED_ERRORS:
+            health.record_failure()
+            raise
+        except BaseException:
+            health.release()
+            raise
+        health.record_success(time.monotonic() - started)
+        return result
+
+    @classmethod
+    def set_hedge_delay(cls, seconds):
+        """Enable hedged reads.
+
+        A hedged read is sent to the next provider when the previous one has
+        not answered within ``seconds``. The first good answer wins.
+
+        :param seconds: hedge delay, ``None`` for serial failover
+        """
+        cls.HEDGE_DELAY = seconds
+
+    @classmethod
+    def _get_hedge_executor(cls):
+        if cls._hedge_executor is None:
+            with cls._hedge_lock:
+                if cls._hedge_executor is None:
+                    cls._hedge_executor = ThreadPoolExecutor(max_workers=cls.HEDGE_WORKERS)
+        return cls._hedge_executor
+
+    @classmethod
+    def _call_apis(cls, api_calls, *args, hedge=False, **kwargs):
+        """Call providers in order until one of them answers.
+
+        With ``hedge`` and a ``HEDGE_DELAY`` set, a provider is also started
+        when the previous ones are still running after the delay, or right
+        away when they failed. Requests that lost the race are cancelled if
+        not started yet; running ones are left to finish in the background.
+
+        Providers are tried healthiest first and skipped while their circuit
+        is open.
+        """
+        api_calls = cls._order_apis(api_calls)
+
+        if not hedge or cls.HEDGE_DELAY is None or len(api_calls) < 2:
+            for api_call in api_calls:
+                try:
+                    return cls._tracked_call(api_call, *args, **kwargs)
+                except cls.IGNORED_ERRORS:
+                    pass
+
+            raise ConnectionError('All APIs are unreachable.')
+
+        executor = cls._get_hedge_executor()
+        not_started = iter(api_calls)
+        pending = set()
+
+        def start_next():
+            api_call = next(not_started, None)
+            if api_call is not None:
+                pending.add(executor.submit(cls._tracked_call, api_call, *args, **kwargs))
+
+        start_next()
+        try:
+            while pending:
+                done, _ = wait(pending, timeout=cls.HEDGE_DELAY, return_when=FIRST_COMPLETED)
+                if not done:
+                    start_next()
+                    continue
+                for future in done:
+                    pending.remove(future)
+                    error = future.exception()
+                    if error is None:
+                        return future.result()
+                    if not isinstance(error, cls.IGNORED_ERRORS):
+                        raise error
+                    start_next()
+        finally:
+            for future in pending:
+                future.cancel()
+
+        raise ConnectionError('All APIs are unreachable.')
+
+    @classmethod
+    def coalescing_stats(cls):
+        """Return how many reads were run and how many were collapsed into
+        an identical in-flight read.
+
+        :rtype: ``dict``
+        """
+        return cls.SINGLE_FLIGHT.stats()
+
+    @classmethod
+    def connection_stats(cls):
+        """Return connection reuse counters of every provider.
+
+        :rtype: ``dict`` of provider name to ``dict``
+        """
+        return {api.__name__: api.connection_stats() for api in cls.PROVIDERS}
+
     @classmethod
     def get_balance(cls, address):
         """Gets the balance of an address in satoshi.
@@ -418,13 +1046,8 @@ class NetworkAPI:
         :rtype: ``int``
         """
 
-        for api_call in cls.GET_BALANCE_MAIN:
-            try:
-                return api_call(address)
-            except cls.IGNORED_ERRORS:
-                pass
-
-        raise ConnectionError('All APIs are unreachable.')
+        return cls._cached('get_balance', (address,),
+                           lambda: cls._call_apis(cls.GET_BALANCE_MAIN, address))
 
     @classmethod
     def get_balance_testnet(cls, address):
@@ -436,13 +1059,7 @@ class NetworkAPI:
         :rtype: ``int``
         """
 
-        for api_call in cls.GET_BALANCE_TEST:
-            try:
-                return api_call(address)
-            except cls.IGNORED_ERRORS:
-                pass
-
-        raise ConnectionError('All APIs are unreachable.')
+        return cls._call_apis(cls.GET_BALANCE_TEST, address)
 
     @classmethod
     def get_transactions(cls, address):
@@ -454,13 +1071,7 @@ class NetworkAPI:
         :rtype: ``list`` of ``str``
         """
 
-        for api_call in cls.GET_TRANSACTIONS_MAIN:
-            try:
-                return api_call(address)
-            except cls.IGNORED_ERRORS:
-                pass
-
-        raise ConnectionError('All APIs are unreachable.')
+        return cls._call_apis(cls.GET_TRANSACTIONS_MAIN, address)
 
     @classmethod
     def get_transactions_testnet(cls, address):
@@ -473,13 +1084,7 @@ class NetworkAPI:
         :rtype: ``list`` of ``str``
         """
 
-        for api_call in cls.GET_TRANSACTIONS_TEST:
-            try:
-                return api_call(address)
-            except cls.IGNORED_ERRORS:
-                pass
-
-        raise ConnectionError('All APIs are unreachable.')
+        return cls._call_apis(cls.GET_TRANSACTIONS_TEST, address)
 
     @classmethod
     def get_tx_amount(cls, txid, txindex):
@@ -493,17 +1098,12 @@ class NetworkAPI:
         :rtype: ``list`` of ``str``
         """
 
-        for api_call in cls.GET_TX_AMOUNT:
-            try:
-                return api_call(txid, txindex)
-            except cls.IGNORED_ERRORS:
-                pass
-
-        raise ConnectionError('All APIs are unreachable.')
+        return cls._call_apis(cls.GET_TX_AMOUNT, txid, txindex)
 
     @classmethod
     def get_tx(cls, txid):
-        """Gets tx dict by txid.
+        """Gets tx dict by txid. Identical concurrent calls share one
+        request and its result.
 
         :param txid: The transaction id in question.
         :type txid: ``str``
@@ -511,13 +1111,17 @@ class NetworkAPI:
         :rtype: ``dict``
         """
 
-        for api_call in cls.GET_TX_MAIN:
-            try:
-                return api_call(txid)
-            except cls.IGNORED_ERRORS:
-                pass
+        tx_cache = cls.TX_CACHE
+        if tx_cache is not None:
+            tx = tx_cache.get_tx(txid)
+            if tx is not None:
+                return tx
 
-        raise ConnectionError('All APIs are unreachable.')
+        tx = cls.SINGLE_FLIGHT.do(('get_tx', txid), cls._call_apis, cls.GET_TX_MAIN, txid, hedge=True)
+        cls._see_heights((tx,))
+        if tx_cache is not None:
+            tx_cache.put_tx(tx)
+        return tx
 
     @classmethod
     def get_rawtx(cls, txid):
@@ -529,13 +1133,18 @@ class NetworkAPI:
         :rtype: ``str``
         """
 
-        for api_call in cls.GET_RAWTX_MAIN:
-            try:
-                return api_call(txid)
-            except cls.IGNORED_ERRORS:
-                pass
+        tx_cache = cls.TX_CACHE
+        if tx_cache is not None:
+            rawtx = tx_cache.get_rawtx(txid)
+            if rawtx is not None:
+                return rawtx
 
-        raise ConnectionError('All APIs are unreachable.')
+        rawtx = cls._call_apis(cls.GET_RAWTX_MAIN, txid)
+        # A raw tx carries no block height, so it is only kept once its
+        # tx dict has been cached as confirmed.
+        if tx_cache is not None and tx_cache.has_tx(txid):
+            tx_cache.put_rawtx(txid, rawtx)
+        return rawtx
 
     @classmethod
     def get_unspent(cls, address):
@@ -547,51 +1156,51 @@ class NetworkAPI:
         :rtype: ``list`` of :class:`~bitcash.network.meta.Unspent`
         """
 
-        for api_call in cls.GET_UNSPENT_MAIN:
-            try:
-                return api_call(address)
-            except cls.IGNORED_ERRORS:
-                pass
-
-        raise ConnectionError('All APIs are unreachable.')
+        return cls._cached('get_unspent', (address,),
+                           lambda: cls._call_apis(cls.GET_UNSPENT_MAIN, address, hedge=True))
 
     @classmethod
-    def get_transactions_by_addresses(cls,addresses):
+    def get_transactions_by_addresses(cls,addresses,start_index=0,stop_index=50):
         """Gets latest 50 transactions in dict related to an address.
+        Identical concurrent calls share one request and its result.
 
         :param addresses: bch addresse(s)
         :type addresses: ``str`` or ''list'' of ''str''
+        :param start_index: index of the first tx, newest tx is 0
+        :param stop_index: index after the last tx, at most start_index+50
         :raises ConnectionError: If all API services fail.
-        :rtype: ``list'' of ``dict``
-        :return: All transactions in dict related to the address
+        :rtype: ``int``, ``list'' of ``dict``
+        :return: Number of all transactions related to the address and
+            transactions in dict from start_index to stop_index
         """
 
-        for api_call in cls.GET_TXS_BY_ADDRESSES:
-            try:
-                return api_call(addresses)
-            except cls.IGNORED_ERRORS:
-                pass
+        key = (addresses if isinstance(addresses, str) else tuple(addresses), start_index, stop_index)
 
-        raise ConnectionError('All APIs are unreachable.')
+        def fetch():
+            response = cls.SINGLE_FLIGHT.do(('get_transactions_by_addresses',) + key, cls._call_apis,
+                                            cls.GET_TXS_BY_ADDRESSES, addresses, start_index, stop_index,
+                                            hedge=True)
+            cls._see_heights(response[1])
+            return response
+
+        if start_index != 0:
+            return fetch()
+        return cls._cached('get_transactions_by_addresses', key, fetch)
 
     @classmethod
-    def get_all_transactions_by_address(cls,address):
+    def get_all_transactions_by_address(cls,address,max_workers=None):
         """Gets all transactions in dict related to an address.
 
         :param address: bch address
         :type address: ``str``
+        :param max_workers: number of pages fetched concurrently per provider
+        :type max_workers: ``int``
         :raises ConnectionError: If all API services fail.
         :rtype: ``list'' of ``dict``
         :return: All transactions in dict related to the address
         """
 
-        for api_call in cls.GET_ALL_TXS_BY_ADDRESS:
-            try:
-                return api_call(address)
-            except cls.IGNORED_ERRORS:
-                pass
-
-        raise ConnectionError('All APIs are unreachable.')
+        return cls._call_apis(cls.GET_ALL_TXS_BY_ADDRESS, address, max_workers=max_workers)
 
     @classmethod
     def get_transactions_by_address_from(cls,address,t):
@@ -604,23 +1213,107 @@ class NetworkAPI:
         :return: All transactions in dict related to the address
         """
 
-        for api_call in cls.GET_TXS_BY_ADDRESS_FROM:
-            try:
-                return api_call(address,t)
-            except cls.IGNORED_ERRORS:
-                pass
+        return cls._call_apis(cls.GET_TXS_BY_ADDRESS_FROM, address, t)
 
-        raise ConnectionError('All APIs are unreachable.')
+    @classmethod
+    def iter_transactions_by_address(cls,address,start_index=0):
+        """Yields transactions in dict related to an address, newest first.
+
+        Pages are fetched one at a time as the generator is consumed, each
+        page with its own provider failover.
+
+        :param address: bch address(es)
+        :type address: ``str`` or ``list`` of ``str``
+        :param start_index: index of the first tx, newest tx is 0
+        :raises ConnectionError: If all API services fail.
+        :rtype: generator of ``dict``
+        """
+        return iter_address_pages(cls.get_transactions_by_addresses,address,start_index)
+
+    @classmethod
+    def iter_transactions_by_address_from(cls,address,t):
+        """Yields transactions in dict related to an address from time t,
+        newest first. Some transactions before t may be included.
+
+        :param address: bch address
+        :type address: ``str``
+        :param t: Unix timestamp
+        :raises ConnectionError: If all API services fail.
+        :rtype: generator of ``dict``
+        """
+        return iter_address_pages(cls.get_transactions_by_addresses,address,t=t)
+
+    @classmethod
+    def get_transactions_by_block(cls,block_hash,page_num=0):
+        """Gets one page of transactions in dict of a block.
+
+        :param block_hash: hash of the block
+        :type block_hash: ``str``
+        :param page_num: page number, first page is 0
+        :type page_num: ``int``
+        :raises ConnectionError: If all API services fail.
+        :rtype: ``int``, ``list`` of ``dict``
+        :return: number of pages and transactions of the page
+        """
+        return cls._call_apis(cls.GET_TXS_BY_BLOCK, block_hash, page_num, hedge=True)
+
+    @classmethod
+    def iter_transactions_by_block(cls,block_hash):
+        """Yields transactions in dict of a block, one page fetched at a time.
+
+        :param block_hash: hash of the block
+        :type block_hash: ``str``
+        :raises ConnectionError: If all API services fail.
+        :rtype: generator of ``dict``
+        """
+        return iter_block_pages(cls.get_transactions_by_block,block_hash)
+
+    @classmethod
+    def get_block_summaries_by_from_to(cls,t_start,t_stop):
+        """Gets summaries (hash, height, time, ...) of blocks mined between
+        two times, oldest first.
+
+        :param t_start: Unix timestamp
+        :param t_stop: Unix timestamp
+        :raises ConnectionError: If all API services fail.
+        :rtype: ``list`` of ``dict``
+        """
+        return cls._call_apis(cls.GET_BLOCK_SUMMARIES_BY_FROM_TO, t_start, t_stop)
 
     @classmethod
     def get_blockhash_by_height(cls,height):
-        for api_call in cls.BLOCKHASH_BY_HEIGHT:
-            try:
-                return api_call(height)
-            except cls.IGNORED_ERRORS:
-                pass
+        """Gets the hash of the block at a height.
 
-        raise ConnectionError('All APIs are unreachable.')
+        :raises ConnectionError: If all API services fail.
+        :rtype: ``str``
+        """
+        def fetch():
+            block_hash = cls._call_apis(cls.BLOCKHASH_BY_HEIGHT, height, hedge=True)
+            cls._see_height(height)
+            return block_hash
+
+        return cls._cached('get_blockhash_by_height', (height,), fetch,
+                           lambda block_hash: height <= cls._best_height - cls.REORG_DEPTH)
+
+    @classmethod
+    def get_block(cls,block_hash):
+        """Gets a block in dict (hash, height, time, tx, ...).
+
+        :raises ConnectionError: If all API services fail.
+        :rtype: ``dict``
+        """
+        return cls._call_apis(cls.GET_BLOCK, block_hash, hedge=True)
+
+    @classmethod
+    def get_block_count(cls):
+        """Gets the height of the best block.
+
+        :raises ConnectionError: If all API services fail.
+        :rtype: ``int``
+        """
+        height = cls._call_apis(cls.GET_BLOCK_COUNT, hedge=True)
+        cls._see_height(height)
+        return height
 
 
     @classmethod
@@ -634,13 +1327,7 @@ class NetworkAPI:
         :rtype: ``list`` of :class:`~bitcash.network.meta.Unspent`
         """
 
-        for api_call in cls.GET_UNSPENT_TEST:
-            try:
-                return api_call(address)
-            except cls.IGNORED_ERRORS:
-                pass
-
-        raise ConnectionError('All APIs are unreachable.')
+        return cls._call_apis(cls.GET_UNSPENT_TEST, address)
 
     @classmethod
     def broadcast_tx(cls, tx_hex):  # pragma: no cover
@@ -649,12 +1336,13 @@ class NetworkAPI:
         :param tx_hex: A signed transaction in hex form.
         :type tx_hex: ``str``
         :raises ConnectionError: If all API services fail.
+        :raises BroadcastRejected: If a service rejects the transaction.
         """
         success = None
 
-        for api_call in cls.BROADCAST_TX_MAIN:
+        for api_call in cls._order_apis(cls.BROADCAST_TX_MAIN):
             try:
-                success = api_call(tx_hex)
+                success = cls._tracked_call(api_call, tx_hex)
                 if not success:
                     continue
                 return
@@ -1,16 +1,17 @@
 import logging
 from collections import namedtuple
 
-from cashaddress import convert as cashaddress
 
 from bitcash.crypto import double_sha256, sha256
 from bitcash.exceptions import InsufficientFunds
-from bitcash.format import address_to_public_key_hash
 from bitcash.network.rates import currency_to_satoshi_cached
 from bitcash.utils import (
     bytes_to_hex, chunk_data, hex_to_bytes, int_to_unknown_bytes, int_to_varint
 )
 
+from bchmemo.addresses import address_to_public_key_hash
+from bchmemo.addresses import to_cash_address
+
 VERSION_1 = 0x01.to_bytes(4, byteorder='little')
 SEQUENCE = 0xffffffff.to_bytes(4, byteorder='little')
 LOCK_TIME = 0x00.to_bytes(4, byteorder='little')
@@ -106,7 +107,7 @@ def sanitize_tx_data(unspents, outputs, fee, leftover, combine=True, message=Non
         dest, amount, currency = output
         # LEGACYADDRESSDEPRECATION
         # FIXME: Will be removed in an upcoming release, breaking compatibility with legacy addresses.
-        dest = cashaddress.to_cash_address(dest)
+        dest = to_cash_address(dest)
         outputs[i] = (dest, currency_to_satoshi_cached(amount, currency))
 
     if not unspents:
@@ -167,7 +168,7 @@ def sanitize_tx_data(unspents, outputs, fee, leftover, combine=True, message=Non
 
 
 def construct_output_block(outputs):
-    output_block = b''
+    output_block = bytearray()
 
     for data in outputs:
         dest, amount = data
@@ -195,30 +196,39 @@ def construct_output_block(outputs):
 
         output_block += script
 
-    return output_block
+    return bytes(output_block)
 
 
-def construct_input_block(inputs):
-    input_block = b''
+def input_block_size(inputs):
+    return sum(36 + len(txin.script_len) + len(txin.script) + 4 for txin in inputs)
+
+
+def write_input_block(buffer, offset, inputs):
+    """Write the inputs into buffer at offset and return the end offset."""
     sequence = SEQUENCE
 
     for txin in inputs:
-        input_block += (
-            txin.txid +
-            txin.txindex +
-            txin.script_len +
-            txin.script +
-            sequence
-        )
+        for part in (txin.txid, txin.txindex, txin.script_len, txin.script, sequence):
+            end = offset + len(part)
+            buffer[offset:end] = part
+            offset = end
+
+    return offset
 
-    return input_block
+
+def construct_input_block(inputs):
+    input_block = bytearray(input_block_size(inputs))
+    write_input_block(input_block, 0, inputs)
+    return bytes(input_block)
 
 
 def create_p2pkh_transaction(private_key, unspents, outputs):
     public_key = private_key.public_key
     public_key_len = len(public_key).to_bytes(1, byteorder='little')
 
-    scriptCode = private_key.scriptcode
+    scriptCode = (OP_DUP + OP_HASH160 + OP_PUSH_20 +
+                  address_to_public_key_hash(private_key.address) +
+                  OP_EQUALVERIFY + OP_CHECKSIG)
     scriptCode_len = int_to_varint(len(scriptCode))
 
     version = VERSION_1
@@ -241,25 +251,32 @@ def create_p2pkh_transaction(private_key, unspents, outputs):
         inputs.append(TxIn(script, script_len, txid, txindex, amount))
 
     hashPrevouts = double_sha256(b''.join([i.txid + i.txindex for i in inputs]))
-    hashSequence = double_sha256(b''.join([SEQUENCE for i in inputs]))
+    hashSequence = double_sha256(SEQUENCE * len(inputs))
     hashOutputs = double_sha256(output_block)
 
+    # BIP-143 preimages only differ by the outpoint and the amount of the
+    # input, so one buffer holds the shared prefix and suffix and only
+    # those two fields are overwritten for every input.
     # scriptCode_len is part of the script.
-    for i, txin in enumerate(inputs):
-        to_be_hashed = (
-            version +
-            hashPrevouts +
-            hashSequence +
-            txin.txid +
-            txin.txindex +
-            scriptCode_len +
-            scriptCode +
-            txin.amount +
-            SEQUENCE +
-            hashOutputs +
-            lock_time +
-            hash_type
-        )
+    prefix = version + hashPrevouts + hashSequence
+    outpoint_at = len(prefix)
+    amount_at = outpoint_at + 36 + len(scriptCode_len) + len(scriptCode)
+    to_be_hashed = bytearray(
+        prefix +
+        bytes(36) +
+        scriptCode_len +
+        scriptCode +
+        bytes(8) +
+        SEQUENCE +
+        hashOutputs +
+        lock_time +
+        hash_type
+    )
+
+    for txin in inputs:
+        to_be_hashed[outpoint_at:outpoint_at + 32] = txin.txid
+        to_be_hashed[outpoint_at + 32:outpoint_at + 36] = txin.txindex
+        to_be_hashed[amount_at:amount_at + 8] = txin.amount
         hashed = sha256(to_be_hashed)  # BIP-143: Used for Bitcoin Cash
 
         # signature = private_key.sign(hashed) + b'\x01'
@@ -272,14 +289,20 @@ def create_p2pkh_transaction(private_key, unspents, outputs):
             public_key
         )
 
-        inputs[i].script = script_sig
-        inputs[i].script_len = int_to_unknown_bytes(len(script_sig), byteorder='little')
-
-    return bytes_to_hex(
-        version +
-        input_count +
-        construct_input_block(inputs) +
-        output_count +
-        output_block +
-        lock_time
-    )
\ No newline at end of file
+        txin.script = script_sig
+        txin.script_len = int_to_unknown_bytes(len(script_sig), byteorder='little')
+
+    # Serialize into one preallocated buffer.
+    size = (len(version) + len(input_count) + input_block_size(inputs) +
+            len(output_count) + len(output_block) + len(lock_time))
+    tx = bytearray(size)
+    offset = 0
+    for part in (version, input_count):
+        tx[offset:offset + len(part)] = part
+        offset += len(part)
+    offset = write_input_block(tx, offset, inputs)
+    for part in (output_count, output_block, lock_time):
+        tx[offset:offset + len(part)] = part
+        offset += len(part)
+
+    return tx.hex()
@@ -0,0 +1,142 @@
+import threading
+import time
+from bisect import bisect_left
+
+from bchmemo.bitcash_modified.services import NetworkAPI
+
+DEFAULT_TIP_TTL = 60  # seconds the best height is trusted
+
+
+class BlockTimeIndex:
+    """
+    Index from Unix timestamps to block heights.
+
+    A timestamp is found by binary search over heights; every block time
+    fetched on the way is kept in a height -> time table, so a cold lookup
+    costs O(log n) requests and a repeated one none. Block times
+    ``NetworkAPI.REORG_DEPTH`` blocks below the tip are kept for good; those
+    closer to the tip may still be reorganized and are kept for tip_ttl
+    seconds, like the best height.
+
+    Block times are only roughly increasing (a block may be stamped before
+    its parent), so a result may be a few blocks off around such blocks.
+    Once a known block time goes backwards, the known heights are no longer
+    bisected by time but scanned for the first one at or after t.
+
+    :param tip_ttl: seconds the best height and the block times near it are
+        trusted before they are refetched
+    :type tip_ttl: ``float``
+    """
+
+    def __init__(self, tip_ttl=DEFAULT_TIP_TTL):
+        self.tip_ttl = tip_ttl
+        self.requests = 0
+
+        self._lock = threading.Lock()
+        self._times = {}  # height -> block time
+        self._heights = []  # sorted heights of _times
+        self._height_times = []  # block times of _heights, in the same order
+        self._monotonic = True  # whether or not _height_times is sorted
+        self._recent = {}  # height -> (block time, expiry) of blocks near the tip
+        self._tip = None
+        self._tip_fetched_at = None
+
+    def tip_height(self):
+        """Return the height of the best block, refetched every tip_ttl seconds."""
+        with self._lock:
+            if self._tip is not None and time.monotonic() - self._tip_fetched_at < self.tip_ttl:
+                return self._tip
+        tip = NetworkAPI.get_block_count()
+        with self._lock:
+            self.requests += 1
+            self._tip = tip
+            self._tip_fetched_at = time.monotonic()
+        return tip
+
+    def block_time(self, height):
+        """Return the time of the block at a height."""
+        with self._lock:
+            block_time = self._times.get(height)
+            if block_time is None and height in self._recent:
+                recent_time, expiry = self._recent[height]
+                if time.monotonic() < expiry:
+                    block_time = recent_time
+        if block_time is not None:
+            return block_time
+
+        block_time = int(NetworkAPI.get_block(NetworkAPI.get_blockhash_by_height(height))['time'])
+        with self._lock:
+            self.requests += 2
+            if self._tip is not None and height <= self._tip - NetworkAPI.REORG_DEPTH:
+                self._recent.pop(height, None)
+                if height not in self._times:
+                    self._times[height] = block_time
+                    i = bisect_left(self._heights, height)
+                    if (i > 0 and self._height_times[i - 1] > block_time or
+                            i < len(self._height_times) and block_time > self._height_times[i]):
+                        self._monotonic = False
+                    self._heights.insert(i, height)
+                    self._height_times.insert(i, block_time)
+            else:
+                now = time.monotonic()
+                for expired in [h for h, (_, expiry) in self._recent.items() if expiry <= now]:
+                    del self._recent[expired]
+                self._recent[height] = (block_time, now + self.tip_ttl)
+        return block_time
+
+    def _known_bounds(self, t):
+        """Return the known heights around t: the last one with a time
+        before t and the first one with a time at or after t (None if not
+        known)."""
+        with self._lock:
+            if self._monotonic:
+                i = bisect_left(self._height_times, t)
+            else:
+                # Bisecting unsorted times may return bounds far above the
+                # first known height at or after t.
+                i = next((j for j, block_time in enumerate(self._height_times) if block_time >= t),
+                         len(self._height_times))
+            before = self._heights[i - 1] if i > 0 else None
+            after = self._heights[i] if i < len(self._heights) else None
+        return before, after
+
+    def first_height_at_or_after(self, t):
+        """Return the height of the first block with a time >= t, or None
+        if the best block is older than t.
+
+        :param t: Unix timestamp
+        :rtype: ``int``
+        """
+        before, after = self._known_bounds(t)
+        lo = -1 if before is None else before  # time(lo) < t
+        if after is None:
+            tip = self.tip_height()
+            if self.block_time(tip) < t:
+                return None
+            after = tip
+        hi = after  # time(hi) >= t
+
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self.block_time(mid) < t:
+                lo = mid
+            else:
+                hi = mid
+        return hi
+
+    def height_range(self, t_start, t_stop):
+        """Return the first and last heights of the blocks mined between two
+        Unix timestamps (both included); the range is empty if none was.
+
+        :rtype: ``int``, ``int``
+        """
+        start_height = self.first_height_at_or_after(t_start)
+        if start_height is None:
+            return 0, -1
+        after_stop = self.first_height_at_or_after(t_stop + 1)
+        stop_height = self.tip_height() if after_stop is None else after_stop - 1
+        return start_height, stop_height
+
+    def __len__(self):
+        with self._lock:
+            return len(self._times)
@@ -0,0 +1,226 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from bchmemo.bitcash_modified.services import BroadcastRejected
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.bitcash_modified.transaction import calc_txid
+
+DEFAULT_RETRIES = 3  # broadcast attempts after the first one
+DEFAULT_BACKOFF = 1  # seconds before the first retry, doubled after each one
+DEFAULT_MAX_BACKOFF = 30
+DEFAULT_HISTORY_SIZE = 1000  # finished broadcasts kept for results()
+
+_STOP = object()
+
+
+class DependencyFailed(Exception):
+    """A queued transaction was dropped because an earlier transaction of
+    its wallet, whose change it may spend, failed to broadcast."""
+
+    def __init__(self, txid):
+        super().__init__('Earlier transaction {} failed to broadcast.'.format(txid))
+        self.txid = txid
+
+
+class BroadcastFuture(Future):
+    """Future of a queued broadcast. Its txid is known before it is sent;
+    its result is the txid once the broadcast succeeded."""
+
+    def __init__(self, tx_hex, wallet):
+        super().__init__()
+        self.tx_hex = tx_hex
+        self.txid = calc_txid(tx_hex)
+        self.wallet = wallet
+        self.attempts = 0
+
+    def __repr__(self):
+        return '<BroadcastFuture txid={} state={}>'.format(self.txid, self._state)
+
+
+class BroadcastQueue:
+    """
+    Background broadcaster of signed transactions.
+
+    Every wallet gets its own FIFO queue and worker thread, so the
+    transactions of a wallet, which may spend each other's change, go out in
+    the order they were signed while wallets do not wait for each other.
+    Broadcasts failing on the transport are retried with exponential
+    backoff; a rejected one
+    (:class:`~bchmemo.bitcash_modified.services.BroadcastRejected`) fails at
+    once, unless it is a retry refused because an attempt that timed out did
+    reach the network (e.g. "txn-already-known"): the transaction is then
+    looked up and counted as sent if a provider knows it. When a broadcast fails, the transactions of its wallet queued
+    behind it fail with :class:`DependencyFailed` instead of being sent.
+
+    :param retries: attempts after the first one before giving up
+    :type retries: ``int``
+    :param backoff: seconds before the first retry, doubled after each one
+    :type backoff: ``float``
+    :param max_backoff: cap of the delay between two attempts
+    :type max_backoff: ``float``
+    """
+
+    def __init__(self, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, max_backoff=DEFAULT_MAX_BACKOFF,
+                 history_size=DEFAULT_HISTORY_SIZE):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+        self._lock = threading.Lock()
+        self._queues = {}  # wallet -> queue.Queue of BroadcastFuture
+        self._workers = {}
+        self._history = deque(maxlen=history_size)
+        self._closed = False
+
+    def submit(self, tx_hex, wallet=None):
+        """Queue a signed transaction for broadcast.
+
+        :param wallet: key of the FIFO queue, e.g. the sender address
+        :rtype: :class:`BroadcastFuture`
+        """
+        future = BroadcastFuture(tx_hex, wallet)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('BroadcastQueue is closed.')
+            if wallet not in self._queues:
+                self._queues[wallet] = queue.Queue()
+                worker = threading.Thread(target=self._work, args=(self._queues[wallet],),
+                                          name='broadcast-{}'.format(wallet), daemon=True)
+                self._workers[wallet] = worker
+                worker.start()
+            self._queues[wallet].put(future)
+        return future
+
+    def _work(self, tx_queue):
+        while True:
+            future = tx_queue.get()
+            try:
+                if future is _STOP:
+                    return
+                if future.set_running_or_notify_cancel() and not self._broadcast(future):
+                    self._fail_queued(tx_queue, future.txid)
+            finally:
+                tx_queue.task_done()
+
+    def _broadcast(self, future):
+        """Send a transaction; return whether or not it went out."""
+        delay = self.backoff
+        while True:
+            future.attempts += 1
+            try:
+                NetworkAPI.broadcast_tx(future.tx_hex)
+            except NetworkAPI.IGNORED_ERRORS as e:
+                if future.attempts > self.retries:
+                    self._fail(future, e)
+                    return False
+                with self._lock:
+                    self.retried += 1
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+            except BroadcastRejected as e:
+                if future.attempts > 1 and self._propagated(future):
+                    self._succeed(future)
+                    return True
+                self._fail(future, e)
+                return False
+            except Exception as e:  # a bug, retrying won't help
+                self._fail(future, e)
+                return False
+            else:
+                self._succeed(future)
+                return True
+
+    @staticmethod
+    def _propagated(future):
+        """Whether or not a provider knows a transaction, i.e. an earlier
+        attempt whose reply was lost did send it."""
+        try:
+            NetworkAPI.get_tx(future.txid)
+        except (ConnectionError, ValueError, KeyError):
+            return False
+        return True
+
+    def _succeed(self, future):
+        with self._lock:
+            self.sent += 1
+            self._history.append(future)
+        future.set_result(future.txid)
+
+    def _fail(self, future, error):
+        with self._lock:
+            self.failed += 1
+            self._history.append(future)
+        future.set_exception(error)
+
+    def _fail_queued(self, tx_queue, txid):
+        """Fail the transactions queued behind a failed one."""
+        stop = False
+        while True:
+            try:
+                future = tx_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if future is _STOP:
+                    stop = True
+                elif future.set_running_or_notify_cancel():
+                    self._fail(future, DependencyFailed(txid))
+            finally:
+                tx_queue.task_done()
+        if stop:
+            tx_queue.put(_STOP)
+
+    def depth(self, wallet=None):
+        """Return the number of queued or running broadcasts, of one wallet
+        or of all wallets."""
+        with self._lock:
+            if wallet is not None:
+                tx_queue = self._queues.get(wallet)
+                return 0 if tx_queue is None else tx_queue.unfinished_tasks
+            return sum(tx_queue.unfinished_tasks for tx_queue in self._queues.values())
+
+    def results(self):
+        """Return the latest finished broadcasts, oldest first.
+
+        :rtype: ``list`` of :class:`BroadcastFuture`
+        """
+        with self._lock:
+            return list(self._history)
+
+    def stats(self):
+        with self._lock:
+            return {'queued': sum(tx_queue.unfinished_tasks for tx_queue in self._queues.values()),
+                    'sent': self.sent,
+                    'failed': self.failed,
+                    'retried': self.retried}
+
+    def join(self):
+        """Block until every queued transaction is broadcast or failed."""
+        with self._lock:
+            queues = list(self._queues.values())
+        for tx_queue in queues:
+            tx_queue.join()
+
+    def close(self, wait=True):
+        """Stop the workers once their queues are drained."""
+        with self._lock:
+            self._closed = True
+            queues = list(self._queues.values())
+            workers = list(self._workers.values())
+        for tx_queue in queues:
+            tx_queue.put(_STOP)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,263 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # size cap of compressed payloads
+EVICTION_BATCH = 64  # rows dropped per eviction query
+
+DEFAULT_MAX_ENTRIES = 10000  # responses kept by a TTLCache
+
+TX = 'tx'
+RAWTX = 'rawtx'
+
+
+def is_confirmed(tx):
+    """Return whether or not a tx dict from an Insight API is in a block.
+
+    Insight reports ``blockheight`` -1 for unconfirmed txs.
+    """
+    blockheight = tx.get('blockheight')
+    return blockheight is not None and blockheight >= 0
+
+
+class TxCache:
+    """
+    SQLite store of confirmed transactions keyed by txid.
+
+    A confirmed transaction never changes, so it is kept until the size cap
+    is reached; then the least recently used ones are evicted. Payloads are
+    stored zlib compressed.
+
+    :param path: path of the sqlite database, ``':memory:'`` for a
+        process-local cache
+    :type path: ``str``
+    :param max_bytes: cap of the total compressed payload size
+    :type max_bytes: ``int``
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS txs ('
+                           'txid TEXT NOT NULL, '
+                           'kind TEXT NOT NULL, '
+                           'data BLOB NOT NULL, '
+                           'size INTEGER NOT NULL, '
+                           'accessed INTEGER NOT NULL, '
+                           'PRIMARY KEY (txid, kind))')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS txs_accessed ON txs (accessed)')
+
+        size, clock = self._conn.execute('SELECT COALESCE(SUM(size), 0), COALESCE(MAX(accessed), 0) '
+                                         'FROM txs').fetchone()
+        self._size = size
+        self._clock = clock
+
+    def _tick(self):
+        self._clock += 1
+        return self._clock
+
+    def _get(self, txid, kind):
+        with self._lock:
+            row = self._conn.execute('SELECT data FROM txs WHERE txid=? AND kind=?',
+                                     (txid, kind)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute('UPDATE txs SET accessed=? WHERE txid=? AND kind=?',
+                               (self._tick(), txid, kind))
+        return zlib.decompress(row[0]).decode()
+
+    def _put(self, txid, kind, payload):
+        data = zlib.compress(payload.encode())
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM txs WHERE txid=? AND kind=?',
+                                     (txid, kind)).fetchone()
+            self._conn.execute('INSERT OR REPLACE INTO txs (txid, kind, data, size, accessed) '
+                               'VALUES (?, ?, ?, ?, ?)',
+                               (txid, kind, data, len(data), self._tick()))
+            self._size += len(data) - (old[0] if old else 0)
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.max_bytes:
+            rows = self._conn.execute('SELECT txid, kind, size FROM txs ORDER BY accessed LIMIT ?',
+                                      (EVICTION_BATCH,)).fetchall()
+            if not rows:
+                self._size = 0
+                return
+            for txid, kind, size in rows:
+                self._conn.execute('DELETE FROM txs WHERE txid=? AND kind=?', (txid, kind))
+                self._size -= size
+                if self._size <= self.max_bytes:
+                    return
+
+    def get_tx(self, txid):
+        """Return the cached tx dict, or ``None``."""
+        payload = self._get(txid, TX)
+        return None if payload is None else json.loads(payload)
+
+    def put_tx(self, tx):
+        """Store a tx dict if it is confirmed.
+
+        :return: whether or not the tx was stored
+        :rtype: ``bool``
+        """
+        if not is_confirmed(tx):
+            return False
+        self._put(tx['txid'], TX, json.dumps(tx, separators=(',', ':')))
+        return True
+
+    def has_tx(self, txid):
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM txs WHERE txid=? AND kind=?',
+                                      (txid, TX)).fetchone() is not None
+
+    def get_rawtx(self, txid):
+        """Return the cached raw tx hex, or ``None``."""
+        return self._get(txid, RAWTX)
+
+    def put_rawtx(self, txid, rawtx):
+        """Store a raw tx hex. The caller must know that the tx is confirmed."""
+        self._put(txid, RAWTX, rawtx)
+
+    @property
+    def size(self):
+        """Total compressed payload size in bytes."""
+        return self._size
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM txs').fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM txs')
+            self._size = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TTLCache:
+    """
+    In-memory cache of responses, each entry with its own time to live.
+
+    Expired entries are dropped when read; beyond ``max_entries`` the least
+    recently used ones are evicted. Safe to use from concurrent threads.
+
+    :param max_entries: number of entries kept
+    :type max_entries: ``int``
+    """
+
+    MISSING = object()  # returned by get for absent or expired keys
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key):
+        """Return the value of a key, or ``TTLCache.MISSING``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return self.MISSING
+
+    def put(self, key, value, ttl):
+        """Keep a value for ttl seconds."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries),
+                    'hits': self.hits,
+                    'misses': self.misses}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class BlockSummaryCache:
+    """
+    SQLite store of the block summaries of completed UTC days, keyed by
+    date. Those never change, so they are kept forever.
+
+    :param path: path of the sqlite database, ``':memory:'`` for a
+        process-local cache
+    :type path: ``str``
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS block_summaries ('
+                           'day TEXT PRIMARY KEY, '
+                           'data BLOB NOT NULL)')
+
+    def get_day(self, datestr):
+        """Return the block summaries of a day (``2018-04-20``), or ``None``."""
+        with self._lock:
+            row = self._conn.execute('SELECT data FROM block_summaries WHERE day=?',
+                                     (datestr,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]).decode())
+
+    def put_day(self, datestr, block_summaries):
+        """Store the block summaries of a day. The caller must know that the
+        day is over."""
+        data = zlib.compress(json.dumps(block_summaries, separators=(',', ':')).encode())
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO block_summaries (day, data) VALUES (?, ?)',
+                               (datestr, data))
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM block_summaries').fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM block_summaries')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
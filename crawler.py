@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.memo import MemoRecord
+
+DEFAULT_CRAWL_WORKERS = 8  # concurrent page fetches
+BLOCKS_IN_FLIGHT_PER_WORKER = 2  # read-ahead window of blocks per worker
+
+
+class CrawlProgress:
+    """
+    Counters of a crawl. ``blocks_total`` is None until the range is known.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.blocks_total = None
+        self.blocks = 0
+        self.pages = 0
+        self.txs = 0
+        self.memos = 0
+        self.height = None  # height of the last block emitted
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def txs_per_second(self):
+        return self.txs / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def memos_per_second(self):
+        return self.memos / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return 'CrawlProgress(blocks={}/{}, height={}, pages={}, txs={}, memos={}, ' \
+               '{:.0f} txs/s, {:.0f} memos/s)'.format(self.blocks, self.blocks_total, self.height,
+                                                      self.pages, self.txs, self.memos,
+                                                      self.txs_per_second, self.memos_per_second)
+
+
+class _BlockJob:
+    """
+    Pages of one block being fetched. The first page is fetched first as it
+    tells the number of pages; the others are then submitted at once.
+    """
+
+    def __init__(self, crawler, height=None, block_hash=None):
+        self.height = height
+        self.block_hash = block_hash
+        self.pages = []
+        self.submit_error = None  # raised by records() if the pages could not be submitted
+        self.pages_submitted = threading.Event()
+        self.first_page = crawler._executor.submit(self.fetch_first_page, crawler)
+        self.first_page.add_done_callback(lambda future: self.submit_other_pages(crawler, future))
+
+    def fetch_first_page(self, crawler):
+        if self.block_hash is None:
+            self.block_hash = NetworkAPI.get_blockhash_by_height(self.height)
+        return crawler._fetch_page(self.block_hash, 0)
+
+    def submit_other_pages(self, crawler, future):
+        try:
+            # Cancelled by _crawl when the consumer stops early.
+            if future.cancelled():
+                return
+            if future.exception() is None:
+                pages_total = future.result()[0]
+                self.pages = [crawler._executor.submit(crawler._fetch_page, self.block_hash, page_num)
+                              for page_num in range(1, pages_total)]
+        except Exception as e:  # e.g. the executor was shut down
+            self.submit_error = e
+        finally:
+            self.pages_submitted.set()
+
+    def records(self):
+        """Return the memo records of the block in order, waiting for its pages."""
+        records = list(self.first_page.result()[1])
+        self.pages_submitted.wait()
+        if self.submit_error is not None:
+            raise self.submit_error
+        for page in self.pages:
+            records.extend(page.result()[1])
+        return records, 1 + len(self.pages)
+
+
+class BlockCrawler:
+    """
+    Crawler of memos in a range of blocks.
+
+    Blocks and their pages are fetched by a bounded pool of workers. Every
+    page is filtered down to memo records as soon as it arrives, so tx
+    dicts do not pile up; records are emitted in block order.
+
+    :param max_workers: number of pages fetched concurrently
+    :type max_workers: ``int``
+    :param callback: called with every :class:`~bchmemo.memo.MemoRecord`
+        emitted
+    :param progress: called with the :class:`CrawlProgress` after every
+        block
+    :param names: :class:`~bchmemo.names.NameRegistry` fed with the
+        ``Set name`` memos of every block
+    """
+
+    def __init__(self, max_workers=DEFAULT_CRAWL_WORKERS, callback=None, progress=None, names=None):
+        self.max_workers = max_workers
+        self.callback = callback
+        self.progress_callback = progress
+        self.names = names
+        self.progress = CrawlProgress()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _fetch_page(self, block_hash, page_num):
+        pages_total, txs = NetworkAPI.get_transactions_by_block(block_hash, page_num)
+        records = list(MemoRecord.iter_records(txs))
+        with self._lock:
+            self.progress.pages += 1
+            self.progress.txs += len(txs)
+        return pages_total, records
+
+    def _crawl(self, blocks, blocks_total):
+        """
+        :param blocks: iterable of (height, block_hash) with either one known
+        """
+        self.progress = CrawlProgress()
+        self.progress.blocks_total = blocks_total
+
+        blocks = iter(blocks)
+        window = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            try:
+                while True:
+                    while len(window) < self.max_workers * BLOCKS_IN_FLIGHT_PER_WORKER:
+                        block = next(blocks, None)
+                        if block is None:
+                            break
+                        window.append(_BlockJob(self, *block))
+                    if not window:
+                        break
+
+                    job = window.popleft()
+                    records, pages = job.records()
+                    self.progress.blocks += 1
+                    self.progress.memos += len(records)
+                    self.progress.height = job.height
+                    if self.names is not None:
+                        self.names.update_from_memos(records)
+                    for record in records:
+                        if self.callback is not None:
+                            self.callback(record)
+                        yield record
+                    if self.progress_callback is not None:
+                        self.progress_callback(self.progress)
+            finally:
+                for job in window:
+                    job.first_page.cancel()
+                    job.pages_submitted.wait()
+                    for page in job.pages:
+                        page.cancel()
+                self._executor = None
+
+    def crawl_heights(self, start_height, stop_height):
+        """Yield memo records of blocks from start_height to stop_height
+        (both included) in block order.
+
+        :rtype: generator of :class:`~bchmemo.memo.MemoRecord`
+        """
+        heights = range(start_height, stop_height + 1)
+        return self._crawl(((height, None) for height in heights), len(heights))
+
+    def crawl_time(self, t_start, t_stop, block_index=None):
+        """Yield memo records of blocks mined between two Unix timestamps in
+        block order.
+
+        :param block_index: find the blocks by binary search over heights
+            instead of by daily block summaries
+        :type block_index: :class:`~bchmemo.blocktime.BlockTimeIndex`
+        :rtype: generator of :class:`~bchmemo.memo.MemoRecord`
+        """
+        if block_index is not None:
+            return self.crawl_heights(*block_index.height_range(t_start, t_stop))
+        block_summaries = NetworkAPI.get_block_summaries_by_from_to(t_start, t_stop)
+        return self._crawl(((block['height'], block['hash']) for block in block_summaries),
+                           len(block_summaries))
+
+    def run_heights(self, start_height, stop_height):
+        """Crawl blocks by height, sending records to the callback only.
+
+        :rtype: :class:`CrawlProgress`
+        """
+        for _ in self.crawl_heights(start_height, stop_height):
+            pass
+        return self.progress
+
+    def run_time(self, t_start, t_stop, block_index=None):
+        """Crawl blocks by time, sending records to the callback only.
+
+        :rtype: :class:`CrawlProgress`
+        """
+        for _ in self.crawl_time(t_start, t_stop, block_index):
+            pass
+        return self.progress
@@ -0,0 +1,142 @@
+import threading
+
+from bchmemo.memo import PRIFIX_BY_ACTION_NAME
+
+FOLLOW_USER = PRIFIX_BY_ACTION_NAME['Follow user']
+UNFOLLOW_USER = PRIFIX_BY_ACTION_NAME['Unfollow user']
+
+UNCONFIRMED_HEIGHT = float('inf')  # unconfirmed memos are the newest
+
+EMPTY = frozenset()
+
+
+def _memo_order(memo):
+    """Sort key of a memo on the chain: block height, then time, then txid.
+
+    The txid comes last, so two orders of the same memo, e.g. before and
+    after it is confirmed, only differ by their height and time.
+    """
+    blockheight = memo.blockheight
+    if blockheight is None or blockheight < 0:
+        blockheight = UNCONFIRMED_HEIGHT
+    return blockheight, int(memo.transaction_time or 0), memo.transaction_hash or ''
+
+
+def _same_memo(order, other):
+    return len(order) > 2 and bool(order[2]) and order[2:] == other[2:]
+
+
+class FollowGraph:
+    """
+    Network-wide follow graph with forward (following) and reverse
+    (followers) adjacency.
+
+    Follow / unfollow memos are applied in O(1) and may arrive in any
+    order: for every (follower, followed) pair only the newest memo on the
+    chain counts, so an unfollow without a follow is simply a no-op.
+    """
+
+    def __init__(self):
+        self._following = {}
+        self._followers = {}
+        self._edges = {}  # (follower, followed) -> (order of newest memo, follows)
+        self._lock = threading.Lock()
+
+    def apply(self, memo):
+        """Apply a follow or unfollow memo; other memos are ignored.
+
+        :param memo: :class:`~bchmemo.memo.Memo` or
+            :class:`~bchmemo.memo.MemoRecord`
+        :return: whether or not the graph changed
+        :rtype: ``bool``
+        """
+        if memo.prefix == FOLLOW_USER:
+            follows = True
+        elif memo.prefix == UNFOLLOW_USER:
+            follows = False
+        else:
+            return False
+        return self.set_edge(memo.sender, memo.address, follows, _memo_order(memo))
+
+    def apply_many(self, memos):
+        """Apply memos, e.g. the records of a crawl.
+
+        :return: number of memos that changed the graph
+        """
+        return sum(self.apply(memo) for memo in memos)
+
+    def set_edge(self, follower, followed, follows, order):
+        """Set whether follower follows followed, unless a newer memo
+        (greater order) already decided it.
+
+        The memo that decided the edge coming back with another order, e.g.
+        once confirmed, moves the edge to that order, so that memos newer
+        than its block can still replace it.
+        """
+        key = (follower, followed)
+        with self._lock:
+            edge = self._edges.get(key)
+            if edge is not None and _same_memo(edge[0], order):
+                self._edges[key] = (order, edge[1])
+                return False
+            if edge is not None and edge[0] >= order:
+                return False
+            self._edges[key] = (order, follows)
+            if follows == (edge is not None and edge[1]):
+                return False
+            if follows:
+                self._following.setdefault(follower, set()).add(followed)
+                self._followers.setdefault(followed, set()).add(follower)
+            else:
+                self._discard(self._following, follower, followed)
+                self._discard(self._followers, followed, follower)
+            return True
+
+    @staticmethod
+    def _discard(adjacency, address, other):
+        addresses = adjacency.get(address)
+        if addresses is not None:
+            addresses.discard(other)
+            if not addresses:
+                del adjacency[address]
+
+    def following(self, address):
+        """Return the addresses followed by an address.
+
+        :rtype: ``frozenset``
+        """
+        with self._lock:
+            return frozenset(self._following.get(address, EMPTY))
+
+    def followers(self, address):
+        """Return the addresses following an address.
+
+        :rtype: ``frozenset``
+        """
+        with self._lock:
+            return frozenset(self._followers.get(address, EMPTY))
+
+    def mutuals(self, address):
+        """Return the addresses that an address follows and that follow it back.
+
+        :rtype: ``frozenset``
+        """
+        with self._lock:
+            return frozenset(self._following.get(address, EMPTY) & self._followers.get(address, EMPTY))
+
+    def is_following(self, follower, followed):
+        with self._lock:
+            return followed in self._following.get(follower, EMPTY)
+
+    def following_count(self, address):
+        with self._lock:
+            return len(self._following.get(address, EMPTY))
+
+    def followers_count(self, address):
+        with self._lock:
+            return len(self._followers.get(address, EMPTY))
+
+    def __len__(self):
+        """Number of follow edges."""
+        with self._lock:
+            return sum(len(followed) for followed in self._following.values())
@@ -0,0 +1,161 @@
+import sqlite3
+import threading
+
+from bchmemo.memo import MemoRecord
+from bchmemo.memo import PRIFIX_BY_ACTION_NAME
+
+SET_NAME = PRIFIX_BY_ACTION_NAME['Set name']
+POST_MEMO = PRIFIX_BY_ACTION_NAME['Post memo']
+LIKE_MEMO = PRIFIX_BY_ACTION_NAME['Like / tip memo']
+FOLLOW_USER = PRIFIX_BY_ACTION_NAME['Follow user']
+UNFOLLOW_USER = PRIFIX_BY_ACTION_NAME['Unfollow user']
+
+# Newest first; unconfirmed memos (blockheight -1) are the newest.
+NEWEST_FIRST = 'ORDER BY blockheight < 0 DESC, blockheight DESC, time DESC, txid DESC'
+
+MEMO_COLUMNS = 'txid, blockheight, time, sender, prefix, value'
+
+SQL_VARIABLES_LIMIT = 500  # bound parameters per query
+
+
+class MemoIndex:
+    """
+    Local SQLite index of memo actions.
+
+    It is fed with :class:`~bchmemo.memo.MemoRecord` objects, e.g. from
+    :class:`~bchmemo.crawler.BlockCrawler` or ``MemoUser.sync``, and answers
+    queries by sender, by action, by liked txhash and by followed address
+    without any network request.
+
+    :param path: path of the sqlite database, ``':memory:'`` for a
+        process-local index
+    :type path: ``str``
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS memos ('
+                               'txid TEXT PRIMARY KEY, '
+                               'blockheight INTEGER NOT NULL, '
+                               'time INTEGER NOT NULL, '
+                               'sender TEXT NOT NULL, '
+                               'prefix TEXT NOT NULL, '
+                               'value TEXT NOT NULL)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS transfers ('
+                               'txid TEXT NOT NULL, '
+                               'address TEXT NOT NULL, '
+                               'value TEXT NOT NULL)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS memos_sender ON memos (sender, prefix)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS memos_value ON memos (prefix, value)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS transfers_txid ON transfers (txid)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS transfers_address ON transfers (address)')
+
+    def add(self, record):
+        """Add or update (e.g. once confirmed) one memo record."""
+        self.add_records((record,))
+
+    def add_records(self, records):
+        """Add or update memo records in one transaction.
+
+        :param records: iterable of :class:`~bchmemo.memo.MemoRecord`
+        :return: number of records
+        """
+        records = list(records)
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO memos (' + MEMO_COLUMNS + ') '
+                                   'VALUES (?, ?, ?, ?, ?, ?)',
+                                   [record[:6] for record in records])
+            self._conn.executemany('DELETE FROM transfers WHERE txid=?',
+                                   [(record.transaction_hash,) for record in records])
+            self._conn.executemany('INSERT INTO transfers (txid, address, value) VALUES (?, ?, ?)',
+                                   [(record.transaction_hash, address, value)
+                                    for record in records for address, value in record.transfer])
+        return len(records)
+
+    def add_transactions(self, transactions):
+        """Add the memos of dict format transactions.
+
+        :return: number of memos added
+        """
+        return self.add_records(MemoRecord.iter_records(transactions))
+
+    def _records(self, where, parameters, limit=None):
+        query = 'SELECT ' + MEMO_COLUMNS + ' FROM memos WHERE ' + where + ' ' + NEWEST_FIRST
+        if limit is not None:
+            query += ' LIMIT {:d}'.format(limit)
+        transfers = {}
+        with self._lock:
+            rows = self._conn.execute(query, parameters).fetchall()
+            txids = [row[0] for row in rows]
+            for i in range(0, len(txids), SQL_VARIABLES_LIMIT):
+                chunk = txids[i:i + SQL_VARIABLES_LIMIT]
+                for txid, address, value in self._conn.execute(
+                        'SELECT txid, address, value FROM transfers WHERE txid IN ({}) ORDER BY rowid'
+                        .format(', '.join('?' * len(chunk))), chunk):
+                    transfers.setdefault(txid, []).append((address, value))
+        return [MemoRecord(*row, tuple(transfers.get(row[0], ()))) for row in rows]
+
+    def get(self, txhash):
+        """Return the record of a memo by its txhash, or None."""
+        records = self._records('txid=?', (txhash,))
+        return records[0] if records else None
+
+    def memos_by(self, sender, prefix=None, limit=None):
+        """Return memos sent by an address, newest first.
+
+        :param prefix: only memos of this action prefix
+        :rtype: ``list`` of :class:`~bchmemo.memo.MemoRecord`
+        """
+        if prefix is None:
+            return self._records('sender=?', (sender,), limit)
+        return self._records('sender=? AND prefix=?', (sender, prefix), limit)
+
+    def posts_by(self, sender, limit=None):
+        return self.memos_by(sender, POST_MEMO, limit)
+
+    def memos_received_by(self, address, limit=None):
+        """Return memos of other senders transferring BCH to an address
+        (e.g. tips), newest first."""
+        return self._records('sender!=? AND txid IN (SELECT txid FROM transfers WHERE address=?)',
+                             (address, address), limit)
+
+    def likes_of(self, txhash, limit=None):
+        """Return like / tip memos of a memo, newest first."""
+        return self._records('prefix=? AND value=?', (LIKE_MEMO, txhash), limit)
+
+    def name_of(self, address):
+        """Return the latest name set by an address, or None."""
+        records = self.memos_by(address, SET_NAME, limit=1)
+        return records[0].value if records else None
+
+    def _follow_state(self, column, address):
+        """Replay follow / unfollow memos oldest first and return the followed side."""
+        other = 'value' if column == 'sender' else 'sender'
+        with self._lock:
+            rows = self._conn.execute('SELECT ' + other + ', prefix FROM memos '
+                                      'WHERE ' + column + '=? AND prefix IN (?, ?) '
+                                      + NEWEST_FIRST, (address, FOLLOW_USER, UNFOLLOW_USER)).fetchall()
+        state = {}
+        for other_address, prefix in reversed(rows):
+            state[other_address] = prefix == FOLLOW_USER
+        return {other_address for other_address, follows in state.items() if follows}
+
+    def following_of(self, address):
+        """Return the set of addresses an address follows."""
+        return self._follow_state('sender', address)
+
+    def followers_of(self, address):
+        """Return the set of addresses following an address."""
+        return self._follow_state('value', address)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM memos').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,11 +1,15 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import re
 
-from bitcash.format import address_to_public_key_hash
-from cashaddress.convert import Address
-from cashaddress.convert import to_cash_address
+from bitcash.network import currency_to_satoshi
 
+from bchmemo.addresses import address_to_public_key_hash
+from bchmemo.addresses import public_key_hash_to_cash_address
+from bchmemo.addresses import to_cash_address
 from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.names import NameRegistry
 
 import bitcash.wallet
 import bchmemo.bitcash_modified.transaction as transaction_modified
@@ -23,11 +27,18 @@ PrivateKey=bitcash.wallet.PrivateKey
 SUPPORTED_PREFIX=['6d01','6d02','6d04','6d06','6d07']
 ACTION_NAME=['Set name','Post memo','Like / tip memo','Follow user','Unfollow user']
 PRIFIX_BY_ACTION_NAME=dict(zip(ACTION_NAME,SUPPORTED_PREFIX))
+ACTION_NAME_BY_PREFIX=dict(zip(SUPPORTED_PREFIX,ACTION_NAME))
 
-USER_NAME_DICT={}
+OP_RETURN_HEX='6a'
+MEMO_PREFIXES=tuple(SUPPORTED_PREFIX)  # str.startswith takes a tuple
+
+NAME_REGISTRY=NameRegistry()  # call NAME_REGISTRY.open(path) to persist names
 
 MIN_TRANSFER_FEE=1 # satoshi per Byte
 
+DEFAULT_LIKE_WORKERS=8  # liked txs fetched concurrently
+DEFAULT_LIKE_DEPTH=3  # levels of likes of likes resolved
+
 class Memo:
     """
     This class represents a single memo and provides function including
@@ -67,54 +78,111 @@ class Memo:
         :type transaction: dict
 
         """
-        for vout in transaction['vout']:
-            if vout['scriptPubKey']['hex'][0:2] == '6a' \
-                    and vout['scriptPubKey']['hex'][4:8] in SUPPORTED_PREFIX:
-                return True
-        else:
-            return False
+        return find_memo_output(transaction) is not None
 
     @classmethod
-    def form_transaction_dict(cls, transaction):
-        if not cls.is_memo(transaction):
-            raise ValueError('Not valid transaction dict!')
+    def iter_memos(cls, transactions):
+        """Yield memos of memo transactions, parsing them as they are consumed.
+
+        :param transactions: iterable of dict format transactions, e.g. a
+            generator of ``NetworkAPI.iter_transactions_by_address``
+        :rtype: generator of ``Memo``
+        """
+        for transaction in transactions:
+            memo=cls.parse(transaction)
+            if memo is not None:
+                yield memo
+
+    @classmethod
+    def parse(cls, transaction):
+        """Return the memo of a transaction (dict format), or None if it is
+        not a memo transaction.
+
+        The vouts are scanned once; use this instead of ``is_memo`` followed
+        by ``form_transaction_dict``.
+
+        :rtype: ``Memo`` or ``None``
+        """
+        memo_output=find_memo_output(transaction)
+        if memo_output is None:
+            return None
 
         memo=Memo()
         memo.transaction_dict=transaction
         memo.transaction_hash=transaction['txid']
         memo.blockheight=transaction['blockheight']
-        # memo.transaction_time=transaction['time']
+        memo.transaction_time=transaction['time']
 
         memo.__get_transfer()
-        for vout in transaction['vout']:
-            if vout['scriptPubKey']['hex'][0:2] == '6a' \
-                    and vout['scriptPubKey']['hex'][4:8] in SUPPORTED_PREFIX:
-                memo.prefix= vout['scriptPubKey']['hex'][4:8]
-                memo.values= vout['scriptPubKey']['hex'][10:]
-                break
-        else:
-            raise NotMemoTransaction('No OP_RETURN data in the transaction or none memo supported data.')
+        memo.__decode_values(*memo_output)
 
-        addr_vin = []
         for vin in transaction['vin']:  # type:dict
             if 'addr' in vin:
-                addr_vin.append(to_cash_address(vin['addr']))
-        if len(addr_vin)>=1:
-            memo.sender=addr_vin[0]
+                memo.sender=to_cash_address(vin['addr'])
+                break
 
-        memo.transaction_time=transaction['time']
+        return memo
 
+    @classmethod
+    def form_transaction_dict(cls, transaction):
+        memo=cls.parse(transaction)
+        if memo is None:
+            raise ValueError('Not valid transaction dict!')
         return memo
 
+    def __decode_values(self,prefix,values):
+        """
+        Set prefix and values read from OP_RETURN data, with the checks of
+        the property setters but without going through them.
+        """
+        self._prefix=prefix
+        self.__action_name=ACTION_NAME_BY_PREFIX[prefix]
+        self._values=values
+
+        value=decode_memo_value(prefix,values)
+        if prefix==PRIFIX_BY_ACTION_NAME['Post memo']:
+            self._message=value
+        elif prefix==PRIFIX_BY_ACTION_NAME['Like / tip memo']:
+            self._txhash_of_liked_memo=value
+        elif prefix==PRIFIX_BY_ACTION_NAME['Set name']:
+            self._name=value
+        else:
+            self._address=value
+
+    def to_record(self):
+        """Return the decoded fields of this memo as a :class:`MemoRecord`."""
+        if self._prefix==PRIFIX_BY_ACTION_NAME['Post memo']:
+            value=self._message
+        elif self._prefix==PRIFIX_BY_ACTION_NAME['Like / tip memo']:
+            value=self._txhash_of_liked_memo
+        elif self._prefix==PRIFIX_BY_ACTION_NAME['Set name']:
+            value=self._name
+        else:
+            value=self._address
+        return MemoRecord(self.transaction_hash,self.blockheight,self.transaction_time,
+                          self.sender,self._prefix,value,
+                          tuple((addr,amount) for addr,amount,*_ in self.transfer))
+
     def __get_transfer(self):
         """
-        generate transfer form transaction dict
+        generate transfer form transaction dict, addresses left as sent by the
+        provider until transfer is read
         """
-        transfer=[]
-        for vout in self.transaction_dict['vout']:
-            if 'addresses' in vout['scriptPubKey']:
-                transfer.append((to_cash_address(vout['scriptPubKey']['addresses'][0]),vout['value']))
-        self.transfer=transfer
+        self._raw_transfer=[(vout['scriptPubKey']['addresses'][0],vout['value'])
+                            for vout in self.transaction_dict['vout'] if 'addresses' in vout['scriptPubKey']]
+
+    @property
+    def transfer(self):
+        """(address, amount) outputs; amounts of a parsed memo are in BCH."""
+        if self._raw_transfer is not None:
+            self._transfer=[(to_cash_address(addr),value) for addr,value in self._raw_transfer]
+            self._raw_transfer=None
+        return self._transfer
+
+    @transfer.setter
+    def transfer(self,transfer):
+        self._transfer=transfer
+        self._raw_transfer=None
 
     @property
     def prefix(self):
@@ -144,7 +212,7 @@ class Memo:
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Post memo']:
             self.message=value_bytes.decode()
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Like / tip memo']:
-            self.txhash_of_liked_memo=value_bytes.hex()
+            self.txhash_of_liked_memo=value_bytes[::-1].hex()
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Follow user']:
             self.address=value_bytes.hex()
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Unfollow user']:
@@ -189,7 +257,7 @@ class Memo:
         if len(txhash)!=64:
             raise ValueError('txhash("{}") should be 64 bytes long'.format(txhash))
         else:
-            self._txhash_of_liked_memo=bytes(reversed(bytes.fromhex(txhash))).hex()
+            self._txhash_of_liked_memo=bytes.fromhex(txhash).hex()
             # self.__get_like_memo()
 
     @property
@@ -207,15 +275,12 @@ class Memo:
         """
         Get memo liked by this memo and calc tip amount
         """
-        try:
-            tx_like=NetworkAPI.get_tx(self._txhash_of_liked_memo)
-        except:
-            return
-        if Memo.is_memo(tx_like):
-            self.liked_memo=Memo.form_transaction_dict(tx_like)  # FIXME: Long runtime for multi-nesting like type memo
-            for addr,amount in self.transfer:
-                if addr==self.liked_memo.sender:
-                    self._tip_amount+=int(float(amount) * 100000000)
+        resolve_likes([self])
+
+    @property
+    def tip_amount(self):
+        """Tip in satoshi, known once the like is resolved (see resolve_likes)."""
+        return self._tip_amount
 
     @property
     def address(self):
@@ -228,7 +293,7 @@ class Memo:
         if len(address)!=40:
             raise ValueError('"{}" is not a public key hash',address)
         else:
-            self._address=Address(payload=list(bytes.fromhex(address)),version= 'P2PKH').cash_address()
+            self._address=public_key_hash_to_cash_address(bytes.fromhex(address))
 
     def content(self):
         if self.sender and self._prefix and self._values:
@@ -245,9 +310,9 @@ class Memo:
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Like / tip memo']:
             line_message = self.__action_name + ': ' + self.txhash_of_liked_memo
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Follow user']:
-            line_message = self.__action_name + ': ' + Address('P2PKH', list(bytes.fromhex(self.address))).cash_address()
+            line_message = self.__action_name + ': ' + self.address
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Unfollow user']:
-            line_message = self.__action_name + ': ' + Address('P2PKH', list(bytes.fromhex(self.address))).cash_address()
+            line_message = self.__action_name + ': ' + self.address
 
         return line_sender+'\n'+line_message+'\n'
 
@@ -265,22 +330,24 @@ class Memo:
         if self.prefix!=PRIFIX_BY_ACTION_NAME['Like / tip memo']:
             raise TypeError('This is not a like / tip memo!')
 
-        # if self.like_memo is None:
-        #     presentation_of_liked_memo='Not a memo'
-        # elif self.like_memo.sender=='':
-        #     presentation_of_liked_memo='No sender address'
-        # else:
-        #     presentation_of_liked_memo=get_name_from_address(self.like_memo.sender)+'\'s post'
-        #
-        # line='Liked '\
-        #      +presentation_of_liked_memo \
-        #      +' ('+self.txhash+')'\
-        #      +'- '+ '{0:,d}'.format(self._tip_aount) + ' satoshis' \
-        #      +' at '+datetime.fromtimestamp(int(self.time)).strftime('%Y-%m-%d %H:%M:%S')
+        sender_of_liked_memo=getattr(self,'_sender_of_liked_memo','')
+        if not sender_of_liked_memo:
+            line='Liked '\
+                 +' ('+self.txhash_of_liked_memo + ')'\
+                 +' at '+datetime.fromtimestamp(int(self.transaction_time)).strftime('%Y-%m-%d %H:%M:%S')
+            return line
+
+        if self.liked_memo is None:
+            presentation_of_liked_memo='Not a memo of '+get_name_from_address(sender_of_liked_memo)
+        else:
+            presentation_of_liked_memo=get_name_from_address(sender_of_liked_memo)+'\'s post'
 
         line='Liked '\
-             +' ('+self.txhash_of_liked_memo + ')'\
-             +' at '+datetime.fromtimestamp(int(self.transaction_time)).strftime('%Y-%m-%d %H:%M:%S')
+             +presentation_of_liked_memo \
+             +' ('+self.txhash_of_liked_memo+')'
+        if self._tip_amount:
+            line+=' - '+'{0:,d}'.format(self._tip_amount)+' satoshis'
+        line+=' at '+datetime.fromtimestamp(int(self.transaction_time)).strftime('%Y-%m-%d %H:%M:%S')
 
         return line
 
@@ -293,11 +360,12 @@ class Memo:
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Post memo']:
             self._values=self.message.encode().hex()
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Like / tip memo']:
-            self._values=self.txhash_of_liked_memo
+            # OP_RETURN data holds the txhash in byte order, not display order
+            self._values=bytes.fromhex(self.txhash_of_liked_memo)[::-1].hex()
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Follow user']:
-            self._values=self.address
+            self._values=address_to_public_key_hash(self.address).hex()
         elif self._prefix==PRIFIX_BY_ACTION_NAME['Unfollow user']:
-            self._values=self.address
+            self._values=address_to_public_key_hash(self.address).hex()
 
     @classmethod
     def set_name(cls,name,sender):
@@ -369,28 +437,41 @@ class Memo:
         memo.__create_values()
         return memo
 
-    def create_signed_transaction(self,private_key,leftover=None):
+    def create_signed_transaction(self,private_key,leftover=None,unspents=None,utxos=None):
         """
 
         :param private_key:
         :param leftover: address for receiving left bch. Default is sender.
+        :param unspents: unspents to spend instead of fetching them
+        :type unspents: ``list`` of :class:`~bitcash.network.meta.Unspent`
+        :param utxos: tracker of the sender's unspents, updated with the
+            signed transaction
+        :type utxos: :class:`~bchmemo.wallet.UTXOTracker`
         :return:
         """
-        pk=PrivateKey(private_key)
+        pk=private_key if isinstance(private_key,PrivateKey) else PrivateKey(private_key)
         if pk.address != self.sender:
             raise ValueError('Wrong Private Key!')
 
+        data_bytes=self.op_return_data()
+
+        if utxos is not None:
+            self.signed_transaction=utxos.create_transaction(pk,self.transfer,MIN_TRANSFER_FEE,leftover=leftover,message=data_bytes)
+            return self.signed_transaction
+        if unspents is None:
+            unspents=pk.get_unspents()
+        self.signed_transaction=pk.create_transaction(message=data_bytes,outputs=self.transfer,fee=MIN_TRANSFER_FEE,leftover=leftover,unspents=unspents)
+
+        return self.signed_transaction
+
+    def op_return_data(self):
+        """Return the pushes of the OP_RETURN output: prefix, then values."""
         prefix_bytes=bytes.fromhex(self.prefix)
         len_prefix_bytes=len(prefix_bytes).to_bytes(1,byteorder='little')
         values_bytes=bytes.fromhex(self._values)
         len_values_bytes=len(values_bytes).to_bytes(1,byteorder='little')
 
-        data_bytes=len_prefix_bytes+prefix_bytes+len_values_bytes+values_bytes
-
-        pk.get_unspents()
-        self.signed_transaction=pk.create_transaction(message=data_bytes,outputs=self.transfer,fee=MIN_TRANSFER_FEE,leftover=leftover)
-
-        return self.signed_transaction
+        return len_prefix_bytes+prefix_bytes+len_values_bytes+values_bytes
 
     def send_transaction(self):
         NetworkAPI.broadcast_tx(self.signed_transaction)
@@ -401,11 +482,191 @@ class Memo:
         tx_dict=NetworkAPI.get_tx(txhash)
         return Memo.form_transaction_dict(tx_dict)
 
+class MemoRecord(namedtuple('MemoRecord',('transaction_hash','blockheight','transaction_time',
+                                            'sender','prefix','value','transfer'))):
+    """
+    Compact, immutable memo read from a transaction.
+
+    It holds only the decoded fields, not the transaction dict, so that
+    large memo collections stay small in memory. ``value`` is the name,
+    message, txhash of liked memo or followed address, depending on the
+    prefix; ``transfer`` is a tuple of (address, value) outputs.
+    """
+    __slots__=()
+
+    @classmethod
+    def parse(cls,transaction):
+        """Return the record of a transaction (dict format), or None if it is
+        not a memo transaction.
+
+        :rtype: ``MemoRecord`` or ``None``
+        """
+        memo_output=find_memo_output(transaction)
+        if memo_output is None:
+            return None
+        prefix,values=memo_output
+
+        sender=''
+        for vin in transaction['vin']:
+            if 'addr' in vin:
+                sender=to_cash_address(vin['addr'])
+                break
+
+        transfer=tuple((to_cash_address(vout['scriptPubKey']['addresses'][0]),vout['value'])
+                       for vout in transaction['vout'] if 'addresses' in vout['scriptPubKey'])
+
+        return cls(transaction['txid'],transaction['blockheight'],transaction['time'],
+                   sender,prefix,decode_memo_value(prefix,values),transfer)
+
+    @classmethod
+    def iter_records(cls,transactions):
+        """Yield records of memo transactions, parsing them as they are consumed.
+
+        :rtype: generator of ``MemoRecord``
+        """
+        for transaction in transactions:
+            record=cls.parse(transaction)
+            if record is not None:
+                yield record
+
+    @property
+    def action_name(self):
+        return ACTION_NAME_BY_PREFIX[self.prefix]
+
+    @property
+    def name(self):
+        return self.value if self.prefix==PRIFIX_BY_ACTION_NAME['Set name'] else ''
+
+    @property
+    def message(self):
+        return self.value if self.prefix==PRIFIX_BY_ACTION_NAME['Post memo'] else ''
+
+    @property
+    def txhash_of_liked_memo(self):
+        return self.value if self.prefix==PRIFIX_BY_ACTION_NAME['Like / tip memo'] else ''
+
+    @property
+    def address(self):
+        return self.value if self.prefix in (PRIFIX_BY_ACTION_NAME['Follow user'],
+                                             PRIFIX_BY_ACTION_NAME['Unfollow user']) else ''
+
+    content_post=Memo.content_post
+    content_like=Memo.content_like
+
 class NotMemoTransaction(Exception):
     pass
 
+def find_memo_output(transaction):
+    """Return (prefix, values) hex strings of the memo OP_RETURN output of a
+    transaction (dict format), or None if there is none.
+
+    The script is matched in place with ``startswith`` so that no substring
+    is built for outputs that are not memos.
+    """
+    for vout in transaction['vout']:
+        script=vout['scriptPubKey']['hex']
+        if script.startswith(OP_RETURN_HEX) and script.startswith(MEMO_PREFIXES,4):
+            return script[4:8],script[10:]
+    return None
+
+def resolve_likes(memos,max_workers=DEFAULT_LIKE_WORKERS,max_depth=DEFAULT_LIKE_DEPTH):
+    """Resolve the memos liked by a batch of like / tip memos.
+
+    Every distinct liked txhash is fetched once, concurrently. Liked memos
+    that are likes themselves are resolved too, up to max_depth levels.
+    For each like ``Memo`` the liked memo (None if the liked tx is not a
+    memo), its sender and the tip amount are set, so ``content_like``
+    needs no further request. Likes of txs that cannot be fetched or
+    parsed are left unresolved.
+
+    :param memos: memos of any kind; only like / tip memos are resolved
+    :param max_workers: number of txs fetched concurrently
+    :param max_depth: levels of likes of likes to follow, 1 for direct
+        likes only
+    :return: liked txhash to ``Memo`` (or None if not a memo), for every
+        tx fetched
+    :rtype: ``dict``
+    """
+    liked_memos={}
+    senders={}
+    likes=[memo for memo in memos if memo.prefix==PRIFIX_BY_ACTION_NAME['Like / tip memo']]
+
+    def fetch(txhash):
+        try:
+            return NetworkAPI.get_tx(txhash)
+        except (ConnectionError,ValueError,KeyError):
+            # Unreachable providers or a malformed response: left unresolved.
+            return None
+
+    to_fetch={memo.txhash_of_liked_memo for memo in likes}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in range(max_depth):
+            to_fetch-=liked_memos.keys()
+            if not to_fetch:
+                break
+            next_level=set()
+            for txhash,tx in zip(to_fetch,executor.map(fetch,to_fetch)):
+                if tx is None:
+                    continue
+                try:
+                    liked_memo=Memo.parse(tx)
+                    sender=next((to_cash_address(vin['addr']) for vin in tx['vin'] if 'addr' in vin),'')
+                except (ValueError,KeyError):
+                    # A malformed liked tx is left unresolved, like a missing one.
+                    continue
+                liked_memos[txhash]=liked_memo
+                senders[txhash]=sender
+                if liked_memo is not None and liked_memo.prefix==PRIFIX_BY_ACTION_NAME['Like / tip memo']:
+                    likes.append(liked_memo)
+                    next_level.add(liked_memo.txhash_of_liked_memo)
+            to_fetch=next_level
+
+    for memo in likes:
+        txhash=memo.txhash_of_liked_memo
+        if txhash not in liked_memos or not isinstance(memo,Memo):
+            continue
+        memo.liked_memo=liked_memos[txhash]
+        memo._sender_of_liked_memo=senders[txhash]
+        # Only parsed memos have BCH amounts; the transfer of a memo built
+        # with like_memo is in satoshi and its tip already set.
+        if memo.transaction_dict is not None and memo.sender!=memo._sender_of_liked_memo:
+            memo._tip_amount=sum(currency_to_satoshi(amount,'bch') for addr,amount,*unit in memo.transfer
+                                 if addr==memo._sender_of_liked_memo and 'satoshi' not in unit)
+    return liked_memos
+
+def decode_memo_value(prefix,values):
+    """Decode the hex values of OP_RETURN data of a memo.
+
+    :return: name or message for a name or post memo, txhash for a like
+        memo, cash address for a follow or unfollow memo
+    :rtype: ``str``
+    :raises ValueError: if values do not fit the prefix
+    """
+    value_bytes=bytes.fromhex(values)
+    if prefix==PRIFIX_BY_ACTION_NAME['Post memo']:
+        message=value_bytes.decode()
+        if len(message)>76:
+            raise ValueError('"{}" is too long.Max length of memo message is 76 bytes',message)
+        return message
+    elif prefix==PRIFIX_BY_ACTION_NAME['Like / tip memo']:
+        if len(value_bytes)!=32:
+            raise ValueError('txhash("{}") should be 64 bytes long'.format(values))
+        return value_bytes[::-1].hex()
+    elif prefix==PRIFIX_BY_ACTION_NAME['Set name']:
+        name=value_bytes.decode()
+        if len(name)>75:
+            raise ValueError('"{}" is too long.Max length of memo name is 75 bytes',name)
+        return name
+    elif prefix in (PRIFIX_BY_ACTION_NAME['Follow user'],PRIFIX_BY_ACTION_NAME['Unfollow user']):
+        if len(value_bytes)!=20:
+            raise ValueError('"{}" is not a public key hash',values)
+        return public_key_hash_to_cash_address(value_bytes)
+    else:
+        raise ValueError('"{}" is not a supported memo prefix!',prefix)
+
 def get_name_from_address(address):
-    if address in USER_NAME_DICT:
-        return USER_NAME_DICT[address]
+    name=NAME_REGISTRY.get(address)
+    if name is not None:
+        return name
     else:
         return address[-6:]
\ No newline at end of file
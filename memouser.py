@@ -1,14 +1,24 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from bitcash.wallet import PrivateKey
-from cashaddress.convert import is_valid, to_cash_address
+from cashaddress.convert import is_valid
 
+from bchmemo.addresses import to_cash_address
+from bchmemo.bitcash_modified.services import BroadcastRejected
 from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.bitcash_modified.services import remove_duplicate_txs
 from bchmemo.memo import Memo
 from bchmemo.memo import PRIFIX_BY_ACTION_NAME
-from bchmemo.memo import USER_NAME_DICT
+from bchmemo.memo import NAME_REGISTRY
 from bchmemo.memo import get_name_from_address
+from bchmemo.memo import resolve_likes
+from bchmemo.wallet import UTXOTracker
 
 PROMPT=True  # Prompt or not
 
+DEFAULT_BULK_BATCH_SIZE=20  # addresses per multi-address request
+DEFAULT_BULK_WORKERS=4  # multi-address batches fetched concurrently
+
 class MemoUser:
     """
     This class represents  a memo user and provides functions about read and send memos
@@ -32,10 +42,14 @@ class MemoUser:
         self.memos_receive=[]   # list of memos that are not sent by user but transfer BCH to user
 
         self._private_key=None
+        self.utxos=UTXOTracker(self._address)  # unspents of the user, seeded on first send
+        self.broadcast_queue=None  # BroadcastQueue, actions then return a BroadcastFuture
 
         self.name=None
         self.following=set()
 
+        self._cursor={'txid':None,'blockheight':-1,'txids':[]}  # see cursor
+
     @classmethod
     def from_private_key(cls,private_key):
         """
@@ -53,50 +67,212 @@ class MemoUser:
         memouser.private_key=pk.to_wif()
         return memouser
 
-    def get_memos(self):
+    def get_memos(self,index=None):
         """
         Get 1)memos sent by user, 2)memos that transfer BCH to user (tip memos to user)
+
+        The memos, name and following known so far and the sync cursor are
+        replaced.
+
+        :param index: read all memos of the user from this local index
+            instead of the latest txs from the network. The memos are then
+            :class:`~bchmemo.memo.MemoRecord` objects.
+        :type index: :class:`~bchmemo.index.MemoIndex`
         """
+        self.__reset_memos()
+        if index is not None:
+            self.__apply_memos(index.memos_by(self._address)+index.memos_received_by(self._address))
+            return
         total_txs,txs=NetworkAPI.get_transactions_by_addresses(self._address)
-        memos=[Memo.form_transaction_dict(tx) for tx in txs if Memo.is_memo(tx)]
-        self.memos_send=[memo for memo in memos if memo.sender==self._address]
-        self.memos_receive=[memo for memo in memos if memo.sender!=self._address]
+        self.__apply_memos(list(Memo.iter_memos(txs)))
 
-        self.memos_post=[memo for memo in self.memos_send if memo.prefix == PRIFIX_BY_ACTION_NAME['Post memo']]
-        self.memos_like=[memo for memo in self.memos_send if memo.prefix == PRIFIX_BY_ACTION_NAME['Like / tip memo']]
-        for memo in reversed(self.memos_send):
-            if memo.prefix==PRIFIX_BY_ACTION_NAME['Set name']:
-                self.name=memo.name
-                USER_NAME_DICT[memo.sender]=memo.name
-            if memo.prefix==PRIFIX_BY_ACTION_NAME['Follow user']:
-                self.following.add(memo.address)
-            if memo.prefix==PRIFIX_BY_ACTION_NAME['Unfollow user']:
-                self.following.remove(memo.address)
+    @classmethod
+    def get_memos_of_users(cls,users,batch_size=DEFAULT_BULK_BATCH_SIZE,max_workers=DEFAULT_BULK_WORKERS):
+        """
+        Fill many users with the memos of their whole history, packing
+        batch_size addresses into each multi-address request instead of
+        fetching users one by one.
+
+        Every tx of a batch is parsed once and given to each user of the
+        batch it involves, as input or output.
+
+        :param users: users to fill
+        :type users: ``list`` of ``MemoUser``
+        :param batch_size: addresses per request
+        :param max_workers: batches fetched concurrently
+        """
+        users_by_address={}
+        for user in users:
+            users_by_address.setdefault(user._address,[]).append(user)
+        addresses=list(users_by_address)
+        batches=[addresses[i:i+batch_size] for i in range(0,len(addresses),batch_size)]
+
+        def fetch_batch(batch):
+            memos_by_address={address:[] for address in batch}
+            for tx in NetworkAPI.iter_transactions_by_address(batch):
+                memo=Memo.parse(tx)
+                if memo is None:
+                    continue
+                involved={to_cash_address(vin['addr']) for vin in tx['vin'] if 'addr' in vin}
+                involved.update(addr for addr,amount in memo.transfer)
+                for address in involved.intersection(memos_by_address):
+                    memos_by_address[address].append(memo)
+            return memos_by_address
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for memos_by_address in executor.map(fetch_batch,batches):
+                for address,memos in memos_by_address.items():
+                    for user in users_by_address[address]:
+                        user.__reset_memos()
+                        user.__apply_memos(memos)
+
+    def get_memos_from(self,t,block_index=None):
+        """
+        Get memos related to user since Unix timestamp t, replacing the
+        memos, name and following known so far and the sync cursor.
 
-    def get_memos_from(self,t):
+        :param block_index: turn t into the first block height mined at or
+            after it, and keep exactly the memos of that block and later
+            ones (and unconfirmed ones)
+        :type block_index: :class:`~bchmemo.blocktime.BlockTimeIndex`
+        """
+        if block_index is None:
+            txs=NetworkAPI.get_transactions_by_address_from(self._address,t)
+        else:
+            start_height=block_index.first_height_at_or_after(t)
+            txs=[]
+            for tx in NetworkAPI.iter_transactions_by_address(self._address):
+                blockheight=tx.get('blockheight',-1)
+                if blockheight>=0 and (start_height is None or blockheight<start_height):
+                    break
+                txs.append(tx)
+        self.__reset_memos()
+        self.__apply_memos(list(Memo.iter_memos(txs)))
+
+    def iter_memos(self):
         """
+        Yield memos related to the user, newest first, fetching and parsing
+        one page of txs at a time instead of loading the whole history.
 
+        :rtype: generator of ``Memo``
         """
-        txs=NetworkAPI.get_transactions_by_address_from(self._address,t)
-        memos=[Memo.form_transaction_dict(tx) for tx in txs if Memo.is_memo(tx)]
-        self.memos_send=[memo for memo in memos if memo.sender==self._address]
-        self.memos_receive=[memo for memo in memos if memo.sender!=self._address]
+        return Memo.iter_memos(NetworkAPI.iter_transactions_by_address(self._address))
 
-        self.memos_post=[memo for memo in self.memos_send if memo.prefix == PRIFIX_BY_ACTION_NAME['Post memo']]
-        self.memos_like=[memo for memo in self.memos_send if memo.prefix == PRIFIX_BY_ACTION_NAME['Like / tip memo']]
-        for memo in reversed(self.memos_send):
+    def sync(self,index=None):
+        """
+        Fetch only the txs newer than the sync cursor and apply their memos
+        on top of the memos, name and following already known. Without a
+        cursor, the whole history replaces them.
+
+        :param index: also add the new memos to this local index
+        :type index: :class:`~bchmemo.index.MemoIndex`
+        :return: number of new memos
+        :rtype: ``int``
+        """
+        if self._cursor['txid'] is None and not self._cursor['txids']:
+            self.__reset_memos()
+        cursor_height=self._cursor['blockheight']
+        synced_txids=set(self._cursor['txids'])
+
+        txs_after_cursor=[]
+        for tx in NetworkAPI.iter_transactions_by_address(self._address):
+            if 0<=tx['blockheight']<cursor_height:
+                break
+            txs_after_cursor.append(tx)
+
+        txs_after_cursor=remove_duplicate_txs(txs_after_cursor)
+        memos=list(Memo.iter_memos(tx for tx in txs_after_cursor if tx['txid'] not in synced_txids))
+        self.__apply_memos(memos)
+        if index is not None:
+            index.add_records(memo.to_record() for memo in memos)
+        self.__advance_cursor(txs_after_cursor)
+        return len(memos)
+
+    def __advance_cursor(self,txs):
+        """
+        :param txs: all txs at or after the cursor, already applied or not
+        """
+        cursor=self._cursor
+        confirmed=[tx for tx in txs if tx['blockheight']>=0]
+        if not confirmed:
+            cursor['txids']=sorted(set(cursor['txids']).union(tx['txid'] for tx in txs))
+            return
+        newest_height=max(tx['blockheight'] for tx in confirmed)
+        cursor['blockheight']=newest_height
+        cursor['txid']=next(tx['txid'] for tx in confirmed if tx['blockheight']==newest_height)
+        cursor['txids']=sorted(tx['txid'] for tx in txs
+                               if tx['blockheight']<0 or tx['blockheight']==newest_height)
+
+    @property
+    def cursor(self):
+        """
+        Sync cursor of the user: newest processed txid and block height,
+        txids already processed at that height or unconfirmed, plus the
+        name and following they produced. It is JSON serializable, so a
+        restarted process can set it back and resume ``sync``.
+
+        :rtype: ``dict``
+        """
+        cursor=dict(self._cursor)
+        cursor['txids']=list(cursor['txids'])
+        cursor['name']=self.name
+        cursor['following']=sorted(self.following)
+        return cursor
+
+    @cursor.setter
+    def cursor(self,cursor):
+        self._cursor={'txid':cursor['txid'],
+                      'blockheight':cursor['blockheight'],
+                      'txids':list(cursor['txids'])}
+        self.name=cursor['name']
+        self.following=set(cursor['following'])
+        if self.name is not None:
+            NAME_REGISTRY.set(self._address,self.name)
+
+    def __reset_memos(self):
+        """
+        Forget the memos and everything derived from them: name, following
+        and sync cursor.
+        """
+        self.memos_send=[]
+        self.memos_receive=[]
+        self.memos_post=[]
+        self.memos_like=[]
+        self.name=None
+        self.following=set()
+        self._cursor={'txid':None,'blockheight':-1,'txids':[]}  # see cursor
+
+    def __apply_memos(self,memos):
+        """
+        Add memos (newest first) in front of the known memos and replay
+        their name and follow actions.
+        """
+        memos_send=[memo for memo in memos if memo.sender==self._address]
+        self.memos_send[:0]=memos_send
+        self.memos_receive[:0]=[memo for memo in memos if memo.sender!=self._address]
+
+        self.memos_post[:0]=[memo for memo in memos_send if memo.prefix == PRIFIX_BY_ACTION_NAME['Post memo']]
+        self.memos_like[:0]=[memo for memo in memos_send if memo.prefix == PRIFIX_BY_ACTION_NAME['Like / tip memo']]
+        for memo in reversed(memos_send):
             if memo.prefix==PRIFIX_BY_ACTION_NAME['Set name']:
                 self.name=memo.name
-                USER_NAME_DICT[memo.sender]=memo.name
+                NAME_REGISTRY.apply(memo)
             if memo.prefix==PRIFIX_BY_ACTION_NAME['Follow user']:
                 self.following.add(memo.address)
             if memo.prefix==PRIFIX_BY_ACTION_NAME['Unfollow user']:
-                self.following.remove(memo.address)
+                self.following.discard(memo.address)
 
     def list_posts(self):
         for memo in self.memos_post:
             print(memo.content_post())
 
+    def resolve_likes(self):
+        """
+        Fetch the memos liked by the user's like / tip memos in one batch,
+        so that list_likes shows their senders and tip amounts.
+        """
+        resolve_likes(self.memos_like)
+
     def list_likes(self):
         for memo in self.memos_like:
             print(memo.content_like())
@@ -124,18 +300,40 @@ class MemoUser:
         self._private_key=private_key
 
     def __send_new_memo(self,memo):
-        memo.create_signed_transaction(self._private_key)
-        txid=memo.send_transaction()
+        memo.create_signed_transaction(self._private_key,utxos=self.utxos)
+        if self.broadcast_queue is not None:
+            future=self.broadcast_queue.submit(memo.signed_transaction,wallet=self._address)
+            future.add_done_callback(self.__broadcast_done)
+            return future
+        try:
+            txid=memo.send_transaction()
+        except (ConnectionError,BroadcastRejected):
+            # Unspents were already used or the tx never left: forget the
+            # local view of them.
+            self.utxos.resync()
+            raise
         if PROMPT:
             print('Successfully sent! txid={}'.format(txid))
             print('Check it on: https://explorer.bitcoin.com/bch/tx/{}'.format(txid))
         return txid
 
+    def __broadcast_done(self,future):
+        # Runs on the broadcast worker: no request here, the next action
+        # refetches the unspents.
+        if future.exception() is not None:
+            self.utxos.mark_stale()
+            if PROMPT:
+                print('Failed to send txid={}: {}'.format(future.txid,future.exception()))
+        elif PROMPT:
+            print('Successfully sent! txid={}'.format(future.txid))
+            print('Check it on: https://explorer.bitcoin.com/bch/tx/{}'.format(future.txid))
+
     def set_name(self, name):
         """
         :param name: no more than 76 bytes
         :type name: ``str``
-        :return: transaction id
+        :return: transaction id, or a :class:`~bchmemo.broadcast.BroadcastFuture`
+            if broadcast_queue is set
         """
         memo=Memo.set_name(name,self._address)
         return self.__send_new_memo(memo)
@@ -144,7 +342,8 @@ class MemoUser:
         """
         :param message: no more than 76 bytes
         :type message: ``str``
-        :return: transaction id
+        :return: transaction id, or a :class:`~bchmemo.broadcast.BroadcastFuture`
+            if broadcast_queue is set
         """
         memo=Memo.post_memo(message,self._address)
         return self.__send_new_memo(memo)
@@ -182,7 +381,8 @@ class MemoUser:
         """
         :param address:
         :type address: ``str``
-        :return: transaction id
+        :return: transaction id, or a :class:`~bchmemo.broadcast.BroadcastFuture`
+            if broadcast_queue is set
         """
 
         memo=Memo.follow(address,self._address)
@@ -192,7 +392,8 @@ class MemoUser:
         """
         :param address: no more than 76 bytes
         :type address: ``str``
-        :return: transaction id
+        :return: transaction id, or a :class:`~bchmemo.broadcast.BroadcastFuture`
+            if broadcast_queue is set
         """
         memo=Memo.unfollow(address,self._address)
         return self.__send_new_memo(memo)
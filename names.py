@@ -0,0 +1,172 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+
+DEFAULT_NAME_CACHE_SIZE = 100000  # addresses kept in memory
+
+UNCONFIRMED_HEIGHT = 2 ** 62  # unconfirmed names are the newest
+
+_MISSING = object()
+
+
+class NameRegistry:
+    """
+    Names of memo users with latest-``Set name``-wins semantics.
+
+    A name only replaces the known one if its memo is newer on the chain
+    (block height, then time). An unconfirmed name ranks above every block
+    but is provisional: the same memo coming back confirmed moves it to its
+    block, and any confirmed name replaces it (if it is still the newest it
+    is seen again once mined). Names are kept in an LRU-bounded in-memory
+    layer, optionally backed by a SQLite store that survives restarts.
+    All methods are safe to call from concurrent threads.
+
+    :param path: path of the sqlite store, None to keep names in memory only
+    :type path: ``str``
+    :param max_size: number of addresses kept in memory
+    :type max_size: ``int``
+    """
+
+    def __init__(self, path=None, max_size=DEFAULT_NAME_CACHE_SIZE):
+        self.max_size = max_size
+        self._cache = OrderedDict()  # address -> (order, name, txid), None if unknown
+        self._lock = threading.Lock()
+        self._conn = None
+        if path is not None:
+            self.open(path)
+
+    def open(self, path):
+        """Back the registry with the sqlite store at path."""
+        conn = sqlite3.connect(path, check_same_thread=False)
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS names ('
+                         'address TEXT PRIMARY KEY, '
+                         'name TEXT NOT NULL, '
+                         'txid TEXT, '
+                         'blockheight INTEGER NOT NULL, '
+                         'time INTEGER NOT NULL)')
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = conn
+            self._cache.clear()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _order(blockheight, transaction_time):
+        if blockheight is None:
+            blockheight = -1
+        elif blockheight < 0:
+            blockheight = UNCONFIRMED_HEIGHT
+        return blockheight, int(transaction_time or 0)
+
+    @staticmethod
+    def _replaces(order, txid, entry):
+        """Return whether a name memo replaces a known entry."""
+        if entry is None:
+            return True
+        known_order, _, known_txid = entry
+        if txid is not None and txid == known_txid:
+            return order != known_order
+        if known_order[0] == UNCONFIRMED_HEIGHT and order[0] != UNCONFIRMED_HEIGHT:
+            return order[0] >= 0
+        return order > known_order
+
+    def _lookup(self, address):
+        """Return (order, name, txid) of an address; the lock must be held."""
+        entry = self._cache.get(address, _MISSING)
+        if entry is not _MISSING:
+            self._cache.move_to_end(address)
+            return entry
+        entry = None
+        if self._conn is not None:
+            row = self._conn.execute('SELECT name, blockheight, time, txid FROM names WHERE address=?',
+                                     (address,)).fetchone()
+            if row is not None:
+                entry = ((row[1], row[2]), row[0], row[3])
+        self._remember(address, entry)
+        return entry
+
+    def _remember(self, address, entry):
+        self._cache[address] = entry
+        self._cache.move_to_end(address)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def get(self, address, default=None):
+        """Return the name of an address, or default. Never fetches."""
+        with self._lock:
+            entry = self._lookup(address)
+        return default if entry is None else entry[1]
+
+    def set(self, address, name, blockheight=None, transaction_time=None, transaction_hash=None):
+        """Set the name of an address unless a newer one is known.
+
+        :param blockheight: block height of the ``Set name`` memo, -1 if
+            unconfirmed, None if unknown (only sets a missing name)
+        :param transaction_hash: txid of the ``Set name`` memo
+        :return: whether or not the name was set
+        :rtype: ``bool``
+        """
+        order = self._order(blockheight, transaction_time)
+        with self._lock:
+            if not self._replaces(order, transaction_hash, self._lookup(address)):
+                return False
+            self._store([(address, name, transaction_hash) + order])
+        return True
+
+    def _store(self, rows):
+        """Keep (address, name, txid, blockheight, time) rows; the lock must be held."""
+        for address, name, txid, blockheight, transaction_time in rows:
+            self._remember(address, ((blockheight, transaction_time), name, txid))
+        if self._conn is not None and rows:
+            with self._conn:
+                self._conn.executemany('INSERT OR REPLACE INTO names (address, name, txid, blockheight, time) '
+                                       'VALUES (?, ?, ?, ?, ?)', rows)
+
+    def apply(self, memo):
+        """Set the name of a ``Set name`` memo; other memos are ignored.
+
+        :param memo: :class:`~bchmemo.memo.Memo` or
+            :class:`~bchmemo.memo.MemoRecord`
+        :rtype: ``bool``
+        """
+        from bchmemo.memo import PRIFIX_BY_ACTION_NAME  # bchmemo.memo imports this module
+
+        if memo.prefix != PRIFIX_BY_ACTION_NAME['Set name']:
+            return False
+        return self.set(memo.sender, memo.name, memo.blockheight, memo.transaction_time,
+                        memo.transaction_hash)
+
+    def update_from_memos(self, memos):
+        """Apply the ``Set name`` memos of a batch, e.g. of a crawl or of the
+        txs of a user, in one store transaction. Within the batch the newest
+        memo of every sender wins, unconfirmed ones included.
+
+        :return: number of names set
+        """
+        from bchmemo.memo import PRIFIX_BY_ACTION_NAME  # bchmemo.memo imports this module
+
+        newest = {}
+        for memo in memos:
+            if memo.prefix != PRIFIX_BY_ACTION_NAME['Set name']:
+                continue
+            order = self._order(memo.blockheight, memo.transaction_time)
+            if memo.sender not in newest or newest[memo.sender][0] < order:
+                newest[memo.sender] = (order, memo.name, memo.transaction_hash)
+
+        changed = []
+        with self._lock:
+            for address, (order, name, txid) in newest.items():
+                if self._replaces(order, txid, self._lookup(address)):
+                    changed.append((address, name, txid) + order)
+            self._store(changed)
+        return len(changed)
+
+    def __contains__(self, address):
+        return self.get(address) is not None
@@ -0,0 +1,16 @@
+"""
+The repository root is the ``bchmemo`` package itself, so it is registered
+under that name before the tests import it.
+"""
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'bchmemo' not in sys.modules:
+    spec = importlib.util.spec_from_file_location('bchmemo', os.path.join(ROOT, '__init__.py'),
+                                                  submodule_search_locations=[ROOT])
+    bchmemo = importlib.util.module_from_spec(spec)
+    sys.modules['bchmemo'] = bchmemo
+    spec.loader.exec_module(bchmemo)
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+
+from bchmemo.bitcash_modified.async_services import AsyncBCCBlockAPI
+from bchmemo.bitcash_modified.async_services import AsyncBlockdozerAPI
+from bchmemo.bitcash_modified.async_services import AsyncNetworkAPI
+
+TXID = 'ab' * 32
+ADDRESS = 'bitcoincash:qqplzy4l2uxzwa5k3zc2mftkw3q6340a4cfy4kd3nf'
+TOTAL_TXS = 120
+
+
+class StandIn:
+    """Local Insight API stand-in; failing ones answer 500 to everything."""
+
+    def __init__(self, failing=False):
+        self.failing = failing
+        self.requests = []
+
+    async def handle(self, request):
+        self.requests.append(request.path_qs)
+        if self.failing:
+            return web.Response(status=500)
+        if request.path.startswith('/api/tx/'):
+            return web.json_response({'txid': request.match_info['tail'].split('/')[-1]})
+        start, stop = int(request.query['from']), int(request.query['to'])
+        items = [{'txid': '%064x' % i} for i in range(start, min(stop, TOTAL_TXS))]
+        return web.json_response({'totalItems': TOTAL_TXS, 'items': items})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/api/{tail:.*}', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        return 'http://127.0.0.1:{}/api/'.format(self.runner.addresses[0][1])
+
+
+@pytest.fixture(autouse=True)
+def endpoints(monkeypatch):
+    for provider in AsyncNetworkAPI.PROVIDERS:
+        monkeypatch.setattr(provider, 'MAIN_ENDPOINT', provider.MAIN_ENDPOINT)
+    AsyncNetworkAPI.reset_health()
+    yield
+    AsyncNetworkAPI.reset_health()
+
+
+def run(*stand_ins, coroutine):
+    async def main():
+        AsyncNetworkAPI.set_endpoints(*[await stand_in.start() for stand_in in stand_ins])
+        try:
+            return await coroutine()
+        finally:
+            await AsyncNetworkAPI.close()
+            for stand_in in stand_ins:
+                await stand_in.runner.cleanup()
+    return asyncio.run(main())
+
+
+def test_failover_to_next_provider():
+    failing, working = StandIn(failing=True), StandIn()
+    tx = run(failing, working, coroutine=lambda: AsyncNetworkAPI.get_tx(TXID))
+    assert tx == {'txid': TXID}
+    assert len(failing.requests) == len(working.requests) == 1
+
+
+def test_pages_are_fetched_concurrently():
+    stand_in = StandIn()
+    txs = run(stand_in, StandIn(),
+              coroutine=lambda: AsyncNetworkAPI.get_all_transactions_by_address(ADDRESS))
+    assert len(txs) == TOTAL_TXS
+    assert sorted(request.split('?')[1] for request in stand_in.requests) == \
+        ['from=0&to=50', 'from=100&to=120', 'from=50&to=100']
+
+
+def test_one_session_per_event_loop():
+    async def session():
+        return AsyncBCCBlockAPI.get_session()
+
+    first = asyncio.run(session())
+    second = asyncio.run(session())  # drops the session of the closed first loop
+    assert first is not second and first.closed and not second.closed
+
+    asyncio.run(AsyncNetworkAPI.close())
+    assert second.closed
+    assert not AsyncBCCBlockAPI._sessions and not AsyncBlockdozerAPI._sessions
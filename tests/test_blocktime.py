@@ -0,0 +1,54 @@
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.blocktime import BlockTimeIndex
+
+TIP = 1023
+GENESIS_TIME = 1500000000
+
+
+def block_time(height):
+    return GENESIS_TIME + 600 * height
+
+
+def test_lookups_cost_log_n_then_nothing(monkeypatch):
+    monkeypatch.setattr(NetworkAPI, 'get_block_count', classmethod(lambda cls: TIP))
+    monkeypatch.setattr(NetworkAPI, 'get_blockhash_by_height', classmethod(lambda cls, height: height))
+    monkeypatch.setattr(NetworkAPI, 'get_block', classmethod(lambda cls, height: {'time': block_time(height)}))
+    index = BlockTimeIndex()
+
+    old = block_time(100) - 1
+    assert index.first_height_at_or_after(old) == 100
+    cold_requests = index.requests
+    assert cold_requests <= 1 + 2 * (TIP.bit_length() + 1)
+    assert index.first_height_at_or_after(old) == 100
+    assert index.requests == cold_requests
+
+    recent = block_time(TIP - 2)
+    assert index.first_height_at_or_after(recent) == TIP - 2
+    warm_requests = index.requests
+    assert index.first_height_at_or_after(recent) == TIP - 2
+    assert index.requests == warm_requests
+
+    assert index.height_range(block_time(10), block_time(20)) == (10, 20)
+    assert index.first_height_at_or_after(block_time(TIP) + 1) is None
+
+
+def test_block_stamped_before_its_parent(monkeypatch):
+    # Block 20 is stamped just above the median time of its past 11 blocks,
+    # i.e. before blocks 15 to 19.
+    times = {height: block_time(height) for height in range(TIP + 1)}
+    times[20] = block_time(14) + 1
+    monkeypatch.setattr(NetworkAPI, 'get_block_count', classmethod(lambda cls: TIP))
+    monkeypatch.setattr(NetworkAPI, 'get_blockhash_by_height', classmethod(lambda cls, height: height))
+    monkeypatch.setattr(NetworkAPI, 'get_block', classmethod(lambda cls, height: {'time': times[height]}))
+    index = BlockTimeIndex()
+    index.tip_height()
+    for height in (15, 20, 30):
+        index.block_time(height)
+
+    assert index.first_height_at_or_after(block_time(15)) == 15
+    assert index.first_height_at_or_after(block_time(25)) == 25
+    # Without block 16 to 19 known, a block after the backwards one is
+    # found, still a few blocks away and with times around t.
+    height = index.first_height_at_or_after(block_time(17))
+    assert 17 <= height <= 21
+    assert times[height - 1] < block_time(17) <= times[height]
@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+
+from bchmemo.bitcash_modified.services import BroadcastRejected
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.bitcash_modified.transaction import calc_txid
+from bchmemo.broadcast import BroadcastQueue
+from bchmemo.broadcast import DependencyFailed
+
+
+def test_rejection_fails_queued_txs_of_the_wallet(monkeypatch):
+    all_queued = threading.Event()
+    sent = []
+
+    def broadcast_tx(cls, tx_hex):
+        all_queued.wait(5)
+        sent.append(tx_hex)
+        if tx_hex == '01':
+            raise BroadcastRejected(b'txn-mempool-conflict')
+
+    monkeypatch.setattr(NetworkAPI, 'broadcast_tx', classmethod(broadcast_tx))
+    with BroadcastQueue(backoff=0) as broadcast_queue:
+        rejected = broadcast_queue.submit('01', wallet='a')
+        dependent = broadcast_queue.submit('02', wallet='a')
+        other_wallet = broadcast_queue.submit('03', wallet='b')
+        all_queued.set()
+
+        with pytest.raises(BroadcastRejected):
+            rejected.result(5)
+        with pytest.raises(DependencyFailed):
+            dependent.result(5)
+        assert other_wallet.result(5) == other_wallet.txid
+        assert rejected.attempts == 1
+        assert broadcast_queue.submit('04', wallet='a').result(5)
+
+    assert sorted(sent) == ['01', '03', '04']
+    assert broadcast_queue.stats()['failed'] == 2
+
+
+def test_transport_errors_are_retried(monkeypatch):
+    attempts = []
+
+    def broadcast_tx(cls, tx_hex):
+        attempts.append(tx_hex)
+        if len(attempts) < 3:
+            raise ConnectionError('All APIs are unreachable.')
+
+    monkeypatch.setattr(NetworkAPI, 'broadcast_tx', classmethod(broadcast_tx))
+    with BroadcastQueue(retries=3, backoff=0) as broadcast_queue:
+        future = broadcast_queue.submit('01')
+        assert future.result(5) == future.txid
+    assert future.attempts == 3
+    assert broadcast_queue.stats()['retried'] == 2
+
+
+def test_retry_refused_as_already_known_is_a_success(monkeypatch):
+    attempts = []
+
+    def broadcast_tx(cls, tx_hex):
+        attempts.append(tx_hex)
+        if tx_hex == '01' and len(attempts) == 1:
+            raise ConnectionError('Read timed out.')  # sent, but the reply was lost
+        if tx_hex == '01':
+            raise BroadcastRejected(b'258: txn-already-known')
+
+    def get_tx(cls, txid):
+        if txid != calc_txid('01'):
+            raise ConnectionError('All APIs are unreachable.')
+        return {'txid': txid}
+
+    monkeypatch.setattr(NetworkAPI, 'broadcast_tx', classmethod(broadcast_tx))
+    monkeypatch.setattr(NetworkAPI, 'get_tx', classmethod(get_tx))
+    with BroadcastQueue(backoff=0) as broadcast_queue:
+        future = broadcast_queue.submit('01', wallet='a')
+        dependent = broadcast_queue.submit('02', wallet='a')
+        assert future.result(5) == future.txid
+        assert dependent.result(5) == dependent.txid
+    assert future.attempts == 2
+    assert broadcast_queue.stats()['failed'] == 0
+
+
+def test_retry_refused_for_an_unknown_tx_fails(monkeypatch):
+    attempts = []
+
+    def broadcast_tx(cls, tx_hex):
+        attempts.append(tx_hex)
+        if len(attempts) == 1:
+            raise ConnectionError('Read timed out.')
+        raise BroadcastRejected(b'258: txn-mempool-conflict')
+
+    def get_tx(cls, txid):
+        raise ConnectionError('All APIs are unreachable.')
+
+    monkeypatch.setattr(NetworkAPI, 'broadcast_tx', classmethod(broadcast_tx))
+    monkeypatch.setattr(NetworkAPI, 'get_tx', classmethod(get_tx))
+    with BroadcastQueue(backoff=0) as broadcast_queue:
+        future = broadcast_queue.submit('01')
+        with pytest.raises(BroadcastRejected):
+            future.result(5)
+    assert future.attempts == 2
@@ -0,0 +1,48 @@
+import pytest
+
+from bchmemo.bitcash_modified.services import BCCBlockAPI
+from bchmemo.bitcash_modified.services import BlockdozerAPI
+from bchmemo.bitcash_modified.services import BroadcastRejected
+from bchmemo.bitcash_modified.services import NetworkAPI
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.content = b'status %d' % status_code
+
+
+class FakeSession:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.posts = 0
+
+    def post(self, *args, **kwargs):
+        self.posts += 1
+        return FakeResponse(self.status_code)
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    def install(bccblock_status, blockdozer_status):
+        bccblock, blockdozer = FakeSession(bccblock_status), FakeSession(blockdozer_status)
+        monkeypatch.setattr(BCCBlockAPI, 'get_session', classmethod(lambda cls: bccblock))
+        monkeypatch.setattr(BlockdozerAPI, 'get_session', classmethod(lambda cls: blockdozer))
+        NetworkAPI.reset_health()
+        return bccblock, blockdozer
+    yield install
+    NetworkAPI.reset_health()
+
+
+def test_rejected_tx_is_not_sent_to_other_providers(sessions):
+    bccblock, blockdozer = sessions(400, 200)
+    with pytest.raises(BroadcastRejected):
+        NetworkAPI.broadcast_tx('00')
+    assert bccblock.posts + blockdozer.posts == 1
+
+
+def test_server_error_fails_over(sessions):
+    bccblock, blockdozer = sessions(503, 503)
+    with pytest.raises(ConnectionError):
+        NetworkAPI.broadcast_tx('00')
+    assert bccblock.posts == blockdozer.posts == 1
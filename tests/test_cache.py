@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from bchmemo.bitcash_modified import services
+from bchmemo.bitcash_modified.services import BCCBlockAPI
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.cache import BlockSummaryCache
+from bchmemo.cache import TxCache
+
+CONFIRMED = 'aa' * 32
+UNCONFIRMED = 'bb' * 32
+
+
+class Txs:
+    calls = 0
+
+    @classmethod
+    def get_tx(cls, txid):
+        cls.calls += 1
+        return {'txid': txid, 'blockheight': 530000 if txid == CONFIRMED else -1, 'vout': []}
+
+
+@pytest.fixture
+def tx_cache(tmp_path, monkeypatch):
+    tx_cache = TxCache(str(tmp_path / 'txs.sqlite'))
+    monkeypatch.setattr(NetworkAPI, 'TX_CACHE', tx_cache)
+    monkeypatch.setattr(NetworkAPI, 'GET_TX_MAIN', [Txs.get_tx])
+    monkeypatch.setattr(Txs, 'calls', 0)
+    NetworkAPI.reset_health()
+    yield tx_cache
+    NetworkAPI.reset_health()
+    tx_cache.close()
+
+
+def test_only_confirmed_txs_are_persisted(tx_cache):
+    for _ in range(2):
+        assert NetworkAPI.get_tx(CONFIRMED)['txid'] == CONFIRMED
+        assert NetworkAPI.get_tx(UNCONFIRMED)['txid'] == UNCONFIRMED
+    assert Txs.calls == 3
+    assert tx_cache.has_tx(CONFIRMED) and not tx_cache.has_tx(UNCONFIRMED)
+
+    reopened = TxCache(tx_cache.path)
+    assert reopened.get_tx(CONFIRMED)['blockheight'] == 530000
+    assert reopened.get_tx(UNCONFIRMED) is None
+    reopened.close()
+
+
+def test_a_day_is_stored_once_past_the_block_time_drift(monkeypatch):
+    fetched = []
+
+    def get_block_summaries_by_date(cls, datestr=None):
+        fetched.append(datestr)
+        return [{'hash': datestr, 'time': 0}]
+
+    summary_cache = BlockSummaryCache()
+    monkeypatch.setattr(BCCBlockAPI, 'BLOCK_SUMMARY_CACHE', summary_cache)
+    monkeypatch.setattr(BCCBlockAPI, 'get_block_summaries_by_date', classmethod(get_block_summaries_by_date))
+    # 2018-04-20 ended an hour ago, less than MAX_BLOCK_TIME_DRIFT
+    now = datetime(2018, 4, 21, 1, tzinfo=timezone.utc).timestamp()
+    monkeypatch.setattr(services.time, 'time', lambda: now)
+
+    days = ['2018-04-19', '2018-04-20']
+    for _ in range(2):
+        assert BCCBlockAPI.get_block_summaries_by_dates(days, max_workers=1) == \
+            [[{'hash': day, 'time': 0}] for day in days]
+    assert fetched == ['2018-04-19', '2018-04-20', '2018-04-20']
+    assert len(summary_cache) == 1
+
+    now += services.MAX_BLOCK_TIME_DRIFT
+    BCCBlockAPI.get_block_summaries_by_dates(days, max_workers=1)
+    BCCBlockAPI.get_block_summaries_by_dates(days, max_workers=1)
+    assert fetched[3:] == ['2018-04-20']
+    assert len(summary_cache) == 2
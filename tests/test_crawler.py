@@ -0,0 +1,98 @@
+import random
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from bchmemo.addresses import to_legacy_address
+from bchmemo.bitcash_modified.services import BCCBlockAPI
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.crawler import BlockCrawler
+from bchmemo.crawler import _BlockJob
+
+SENDER = 'bitcoincash:qqplzy4l2uxzwa5k3zc2mftkw3q6340a4cfy4kd3nf'
+PAGES = 3  # pages per block, one post memo per page
+
+
+def post_tx(height, page_num):
+    message = '{}/{}'.format(height, page_num).encode()
+    return {'txid': '{:060x}{:04x}'.format(height, page_num), 'blockheight': height, 'time': 1500000000,
+            'vin': [{'addr': to_legacy_address(SENDER)}],
+            'vout': [{'value': '0.00000000',
+                      'scriptPubKey': {'hex': '6a026d02{:02x}'.format(len(message)) + message.hex()}}]}
+
+
+@pytest.fixture
+def blocks(monkeypatch):
+    fetched = []
+    failing = set()  # (height, page_num) raising ConnectionError
+
+    def get_transactions_by_block(cls, block_hash, page_num=0):
+        height = int(block_hash)
+        fetched.append((height, page_num))
+        time.sleep(random.random() / 100)
+        if (height, page_num) in failing:
+            raise ConnectionError('All APIs are unreachable.')
+        return PAGES, [post_tx(height, page_num)]
+
+    monkeypatch.setattr(NetworkAPI, 'get_blockhash_by_height', classmethod(lambda cls, height: str(height)))
+    monkeypatch.setattr(NetworkAPI, 'get_transactions_by_block', classmethod(get_transactions_by_block))
+    return fetched, failing
+
+
+def test_records_are_emitted_in_block_order(blocks):
+    records = list(BlockCrawler(max_workers=4).crawl_heights(100, 119))
+    assert [record.message for record in records] == \
+        ['{}/{}'.format(height, page_num) for height in range(100, 120) for page_num in range(PAGES)]
+
+
+def test_early_stop_cancels_the_read_ahead(blocks):
+    fetched, _ = blocks
+    crawler = BlockCrawler(max_workers=2)
+    crawl = crawler.crawl_heights(0, 999)
+    assert next(crawl).message == '0/0'
+    crawl.close()
+    assert crawler.progress.blocks == 1
+    assert len(fetched) < 100 * PAGES
+
+
+def test_failed_page_fails_the_crawl(blocks):
+    _, failing = blocks
+    failing.add((105, 2))
+    crawl = BlockCrawler(max_workers=4).crawl_heights(100, 110)
+    messages = []
+    with pytest.raises(ConnectionError):
+        for record in crawl:
+            messages.append(record.message)
+    assert messages[-1] == '104/2'  # a block is emitted once all its pages are in
+
+
+class ShutDownExecutor:
+    """Runs the first submitted call, then refuses like a shut down executor."""
+
+    def __init__(self):
+        self.submitted = 0
+
+    def submit(self, fn, *args):
+        self.submitted += 1
+        if self.submitted > 1:
+            raise RuntimeError('cannot schedule new futures after shutdown')
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def test_pages_that_cannot_be_submitted_raise(blocks):
+    crawler = BlockCrawler()
+    crawler._executor = ShutDownExecutor()
+    job = _BlockJob(crawler, height=7)
+    with pytest.raises(RuntimeError):
+        job.records()
+
+
+def test_block_summaries_are_filtered_by_time(monkeypatch):
+    day = [{'hash': str(t), 'time': t} for t in (1524182400, 1524200000, 1524268799)]
+    monkeypatch.setattr(BCCBlockAPI, 'get_block_summaries_by_dates',
+                        classmethod(lambda cls, datestrs, max_workers=None: [day for _ in datestrs]))
+    summaries = BCCBlockAPI.get_block_summaries_by_from_to(1524182400, 1524200000)
+    assert [summary['time'] for summary in summaries] == [1524182400, 1524200000]
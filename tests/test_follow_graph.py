@@ -0,0 +1,32 @@
+from bchmemo.follow_graph import FollowGraph
+from bchmemo.memo import MemoRecord
+from bchmemo.memo import PRIFIX_BY_ACTION_NAME
+
+FOLLOWER = 'bitcoincash:qqplzy4l2uxzwa5k3zc2mftkw3q6340a4cfy4kd3nf'
+FOLLOWED = 'bitcoincash:qzdxp2z5yuxzlskafh2d8wsq7grg7rt46csg3qcn80'
+
+
+def record(txid, action, blockheight, transaction_time=1525000000):
+    return MemoRecord(txid, blockheight, transaction_time, FOLLOWER,
+                      PRIFIX_BY_ACTION_NAME[action], FOLLOWED, ())
+
+
+def test_newest_memo_wins_in_any_order():
+    graph = FollowGraph()
+    graph.apply(record('b' * 64, 'Unfollow user', 510))
+    graph.apply(record('a' * 64, 'Follow user', 500))
+    assert not graph.is_following(FOLLOWER, FOLLOWED)
+
+
+def test_unconfirmed_follow_then_confirmed_then_unfollow():
+    graph = FollowGraph()
+    assert graph.apply(record('a' * 64, 'Follow user', -1))
+    assert graph.is_following(FOLLOWER, FOLLOWED)
+
+    # The same follow, now mined at 500.
+    assert not graph.apply(record('a' * 64, 'Follow user', 500))
+    assert graph.is_following(FOLLOWER, FOLLOWED)
+
+    assert graph.apply(record('b' * 64, 'Unfollow user', 510))
+    assert not graph.is_following(FOLLOWER, FOLLOWED)
+    assert graph.followers(FOLLOWED) == frozenset()
@@ -0,0 +1,65 @@
+from bchmemo.addresses import address_to_public_key_hash
+from bchmemo.addresses import to_legacy_address
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.index import MemoIndex
+from bchmemo.memouser import MemoUser
+
+A = 'bitcoincash:qqplzy4l2uxzwa5k3zc2mftkw3q6340a4cfy4kd3nf'
+B = 'bitcoincash:qr95sy3j9xwd2ap32xkykttr4cvcu7as4y0qverfuy'
+
+
+def memo_tx(n, sender, prefix, data, height, to=None, value='0.00001000'):
+    script = '6a02' + prefix + '{:02x}'.format(len(data)) + data.hex()
+    receiver = to_legacy_address(to or sender)
+    return {'txid': '{:064x}'.format(n), 'blockheight': height, 'time': 1500000000 + n,
+            'vin': [{'addr': to_legacy_address(sender)}],
+            'vout': [{'value': '0.00000000', 'scriptPubKey': {'hex': script}},
+                     {'value': value, 'scriptPubKey': {'hex': '76a914' + '00' * 20 + '88ac',
+                                                       'addresses': [receiver]}}]}
+
+
+LIKED = '{:064x}'.format(2)
+TXS = [memo_tx(5, B, '6d04', bytes.fromhex(LIKED)[::-1], -1, to=A, value='0.00050000'),
+       memo_tx(4, A, '6d07', address_to_public_key_hash(B), 103),
+       memo_tx(3, A, '6d06', address_to_public_key_hash(B), 102),
+       memo_tx(2, A, '6d02', b'hello', 101),
+       memo_tx(1, A, '6d01', b'alice', 100)]
+
+
+def test_records_round_trip_through_a_sqlite_file(tmp_path):
+    path = str(tmp_path / 'memos.sqlite')
+    index = MemoIndex(path)
+    assert index.add_transactions(TXS) == 5
+    index.close()
+
+    index = MemoIndex(path)
+    assert len(index) == 5
+    assert [record.transaction_hash for record in index.memos_by(A)] == [tx['txid'] for tx in TXS[1:]]
+    assert index.name_of(A) == 'alice'
+    assert [record.message for record in index.posts_by(A)] == ['hello']
+    assert index.following_of(A) == set()
+    assert index.followers_of(B) == set()
+
+    tip, = index.memos_received_by(A)
+    assert (tip.sender, tip.blockheight, tip.txhash_of_liked_memo) == (B, -1, LIKED)
+    assert tip.transfer == ((A, '0.00050000'),)
+    assert index.likes_of(LIKED) == [tip]
+    assert index.get(TXS[3]['txid']).transfer == ((A, '0.00001000'),)
+    index.close()
+
+
+def test_get_memos_reads_from_the_index(tmp_path, monkeypatch):
+    def no_network(cls, *args, **kwargs):
+        raise AssertionError('get_memos(index=) must not reach the network')
+
+    monkeypatch.setattr(NetworkAPI, 'get_transactions_by_addresses', classmethod(no_network))
+    index = MemoIndex(str(tmp_path / 'memos.sqlite'))
+    index.add_transactions(TXS)
+
+    user = MemoUser(A)
+    user.get_memos(index=index)
+    assert [memo.transaction_hash for memo in user.memos_send] == [tx['txid'] for tx in TXS[1:]]
+    assert [memo.transaction_hash for memo in user.memos_receive] == [TXS[0]['txid']]
+    assert [memo.message for memo in user.memos_post] == ['hello']
+    assert (user.name, user.following) == ('alice', set())
+    index.close()
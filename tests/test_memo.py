@@ -0,0 +1,51 @@
+from bitcash.network.meta import Unspent
+from bitcash.wallet import PrivateKey
+
+from bchmemo import memo as memo_module
+from bchmemo.addresses import address_to_public_key_hash
+from bchmemo.memo import Memo
+from bchmemo.wallet import p2pkh_script
+from bchmemo.wallet import sign_memos
+
+KEY = PrivateKey()
+FOLLOWED = 'bitcoincash:qr95sy3j9xwd2ap32xkykttr4cvcu7as4y0qverfuy'
+SENDER = '1KXrWXciRDZUpQwQmuM1DbwsKDLYAYsVLR'
+SENDER_CASH = 'bitcoincash:qr95sy3j9xwd2ap32xkykttr4cvcu7as4y0qverfuy'
+
+
+def post_tx(outputs):
+    vout = [{'value': '0.00000000', 'scriptPubKey': {'hex': '6a026d0202' + 'hi'.encode().hex()}}]
+    vout += [{'value': '0.00001000', 'scriptPubKey': {'hex': '76a914' + '00' * 20 + '88ac',
+                                                      'addresses': [SENDER]}}] * outputs
+    return {'txid': 'ab' * 32, 'blockheight': 530000, 'time': 1525000000,
+            'vin': [{'addr': SENDER}], 'vout': vout}
+
+
+def test_follow_memos_encode_the_public_key_hash():
+    public_key_hash = address_to_public_key_hash(FOLLOWED)
+    follow = Memo.follow(FOLLOWED, KEY.address)
+    unfollow = Memo.unfollow(FOLLOWED, KEY.address)
+    assert follow.op_return_data() == bytes.fromhex('026d0614') + public_key_hash
+    assert unfollow.op_return_data() == bytes.fromhex('026d0714') + public_key_hash
+
+    unspents = [Unspent(100000, 1, p2pkh_script(KEY.address), '11' * 32, 0)]
+    tx_hex, = sign_memos(KEY, [follow], unspents)
+    assert public_key_hash.hex() in tx_hex
+
+
+def test_transfer_addresses_are_converted_when_read(monkeypatch):
+    converted = []
+
+    def to_cash_address(address):
+        converted.append(address)
+        return SENDER_CASH
+
+    monkeypatch.setattr(memo_module, 'to_cash_address', to_cash_address)
+    memo = Memo.parse(post_tx(outputs=3))
+    assert memo.message == 'hi'
+    assert converted == [SENDER]  # the sender only
+
+    assert memo.transfer == [(SENDER_CASH, '0.00001000')] * 3
+    assert len(converted) == 4
+    memo.transfer
+    assert len(converted) == 4
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from bchmemo.addresses import address_to_public_key_hash
+from bchmemo.addresses import to_legacy_address
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.memouser import MemoUser
+
+A = 'bitcoincash:qqplzy4l2uxzwa5k3zc2mftkw3q6340a4cfy4kd3nf'
+B = 'bitcoincash:qr95sy3j9xwd2ap32xkykttr4cvcu7as4y0qverfuy'
+
+
+def memo_tx(n, sender, prefix, data, height):
+    script = '6a02' + prefix + '{:02x}'.format(len(data)) + data.hex()
+    return {'txid': '{:064x}'.format(n), 'blockheight': height, 'time': 1500000000 + n,
+            'vin': [{'addr': to_legacy_address(sender)}],
+            'vout': [{'value': '0.00000000', 'scriptPubKey': {'hex': script}},
+                     {'value': '0.01000000', 'scriptPubKey': {'hex': '76a914' + '00' * 20 + '88ac',
+                                                              'addresses': [to_legacy_address(sender)]}}]}
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    """Txs of the network, newest first."""
+    txs = []
+
+    def get_transactions_by_addresses(cls, addresses, start_index=0, stop_index=50):
+        return len(txs), txs[start_index:stop_index]
+
+    monkeypatch.setattr(NetworkAPI, 'get_transactions_by_addresses', classmethod(get_transactions_by_addresses))
+    return txs
+
+
+def test_sync_resumes_from_a_saved_cursor(chain):
+    chain[:0] = [memo_tx(3, A, '6d02', b'hello', 102),
+                 memo_tx(2, A, '6d06', address_to_public_key_hash(B), 101),
+                 memo_tx(1, A, '6d01', b'alice', 100)]
+    user = MemoUser(A)
+    assert user.sync() == 3
+    assert (user.name, user.following) == ('alice', {B})
+    saved = json.loads(json.dumps(user.cursor))
+
+    chain[:0] = [memo_tx(5, A, '6d02', b'again', 103),
+                 memo_tx(4, A, '6d07', address_to_public_key_hash(B), 103)]
+    resumed = MemoUser(A)
+    resumed.cursor = saved
+    assert resumed.sync() == 2
+    assert (resumed.name, resumed.following) == ('alice', set())
+    assert [memo.message for memo in resumed.memos_post] == ['again']
+    assert resumed.sync() == 0
+
+
+def test_get_memos_resets_the_state_of_a_resumed_cursor(chain):
+    chain[:0] = [memo_tx(6, A, '6d02', b'only a post', 104)]
+    user = MemoUser(A)
+    user.cursor = {'txid': '{:064x}'.format(3), 'blockheight': 102, 'txids': [],
+                   'name': 'alice', 'following': [B]}
+    user.get_memos()
+    assert (user.name, user.following) == (None, set())
+    assert [memo.message for memo in user.memos_post] == ['only a post']
+    assert user.cursor['blockheight'] == -1
+
+    assert user.sync() == 1  # no cursor: the whole history replaces the memos
+    assert [memo.message for memo in user.memos_post] == ['only a post']
+
+
+def test_get_memos_of_users_fetches_batches(monkeypatch):
+    c = 'bitcoincash:qzdxp2z5yuxzlskafh2d8wsq7grg7rt46csg3qcn80'
+    tip = memo_tx(8, A, '6d02', b'tip to b', 105)
+    tip['vout'].append({'value': '0.00001000', 'scriptPubKey': {'hex': '76a914' + '00' * 20 + '88ac',
+                                                                'addresses': [to_legacy_address(B)]}})
+    txs = [tip, memo_tx(7, c, '6d01', b'carol', 104)]
+    requests = []
+
+    def get_transactions_by_addresses(cls, addresses, start_index=0, stop_index=50):
+        requests.append(tuple(addresses))
+        legacy = {to_legacy_address(address) for address in addresses}
+        involved = [tx for tx in txs if legacy.intersection(
+            [vin['addr'] for vin in tx['vin']] +
+            [vout['scriptPubKey']['addresses'][0] for vout in tx['vout'] if 'addresses' in vout['scriptPubKey']])]
+        return len(involved), involved[start_index:stop_index]
+
+    monkeypatch.setattr(NetworkAPI, 'get_transactions_by_addresses', classmethod(get_transactions_by_addresses))
+    users = [MemoUser(A), MemoUser(B), MemoUser(c)]
+    MemoUser.get_memos_of_users(users, batch_size=2, max_workers=1)
+
+    assert requests == [(A, B), (c,)]
+    assert [memo.message for memo in users[0].memos_post] == ['tip to b']
+    assert [memo.message for memo in users[1].memos_receive] == ['tip to b']
+    assert users[2].name == 'carol'
+
+
+class StartHeight:
+    """Stand-in for a BlockTimeIndex with a fixed answer."""
+
+    def __init__(self, height):
+        self.height = height
+
+    def first_height_at_or_after(self, t):
+        return self.height
+
+
+def test_get_memos_from_block_index_stops_at_the_start_height(monkeypatch):
+    txs = ([memo_tx(100, A, '6d02', b'unconfirmed', -1),
+            memo_tx(99, A, '6d02', b'at 102', 102),
+            memo_tx(98, A, '6d01', b'alice', 101),
+            memo_tx(97, A, '6d02', b'at 101', 101),
+            memo_tx(96, A, '6d02', b'at 100', 100)] +
+           [memo_tx(n, A, '6d02', b'older', 90) for n in range(95, 35, -1)])
+    requests = []
+
+    def get_transactions_by_addresses(cls, addresses, start_index=0, stop_index=50):
+        requests.append(start_index)
+        return len(txs), txs[start_index:stop_index]
+
+    monkeypatch.setattr(NetworkAPI, 'get_transactions_by_addresses', classmethod(get_transactions_by_addresses))
+    user = MemoUser(A)
+    user.get_memos_from(1500000000, block_index=StartHeight(101))
+    assert [memo.message for memo in user.memos_post] == ['unconfirmed', 'at 102', 'at 101']
+    assert user.name == 'alice'
+    assert requests == [0]
+
+    user.get_memos_from(1500000000, block_index=StartHeight(None))
+    assert [memo.message for memo in user.memos_post] == ['unconfirmed']
+    assert user.name is None
@@ -0,0 +1,34 @@
+from bchmemo.memo import Memo
+from bchmemo.names import NameRegistry
+
+ADDRESS = 'bitcoincash:qzs02v05l7qs5s24srqju498qu55dwuj0cx5ehjm2c'
+
+
+def test_confirmed_name_replaces_unconfirmed(tmp_path):
+    path = str(tmp_path / 'names.sqlite')
+    registry = NameRegistry(path)
+    assert registry.set(ADDRESS, 'old', -1, 1000, 'aa' * 32)
+    assert registry.set(ADDRESS, 'new', 600, 900, 'bb' * 32)
+    assert registry.get(ADDRESS) == 'new'
+    # an older confirmed name still does not win
+    assert not registry.set(ADDRESS, 'older', 500, 800, 'cc' * 32)
+    registry.close()
+
+    assert NameRegistry(path).get(ADDRESS) == 'new'
+
+
+def test_same_memo_moves_to_its_block():
+    registry = NameRegistry()
+    assert registry.set(ADDRESS, 'old', -1, 1000, 'aa' * 32)
+    assert registry.set(ADDRESS, 'old', 601, 1000, 'aa' * 32)
+    assert registry.set(ADDRESS, 'new', 602, 1100, 'bb' * 32)
+    assert registry.get(ADDRESS) == 'new'
+    assert not registry.set(ADDRESS, 'unknown')
+
+
+
+def test_apply_only_takes_set_name_memos():
+    registry = NameRegistry()
+    assert not registry.apply(Memo.post_memo('hi', ADDRESS))
+    assert registry.apply(Memo.set_name('bob', ADDRESS))
+    assert registry.get(ADDRESS) == 'bob'
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from bchmemo.bitcash_modified.services import NetworkAPI
+
+
+class Provider:
+    """Stand-in for an InsightAPI provider, one class per test provider."""
+    calls = 0
+    answer = None
+    error = None
+    release = None
+
+    @classmethod
+    def get_tx(cls, txid):
+        cls.calls += 1
+        if cls.release is not None:
+            cls.release.wait(5)
+        if cls.error is not None:
+            raise cls.error
+        return cls.answer
+
+
+def provider(name, answer=None, error=None, release=None):
+    return type(name, (Provider,), {'answer': answer, 'error': error, 'release': release})
+
+
+@pytest.fixture(autouse=True)
+def health(monkeypatch):
+    monkeypatch.setattr(NetworkAPI, 'HEDGE_DELAY', 0.05)
+    NetworkAPI.reset_health()
+    yield
+    NetworkAPI.reset_health()
+
+
+def test_fast_secondary_wins_over_slow_primary():
+    release = threading.Event()
+    slow, fast = provider('Slow', answer='slow', release=release), provider('Fast', answer='fast')
+    started = time.monotonic()
+    try:
+        assert NetworkAPI._call_apis([slow.get_tx, fast.get_tx], 'ab', hedge=True) == 'fast'
+        assert time.monotonic() - started < 1
+    finally:
+        release.set()
+    assert slow.calls == fast.calls == 1
+
+
+@pytest.mark.parametrize('hedge', [False, True])
+def test_all_providers_failing_raise_connection_error(hedge):
+    first = provider('First', error=ConnectionError('down'))
+    second = provider('Second', error=ConnectionError('down'))
+    with pytest.raises(ConnectionError):
+        NetworkAPI._call_apis([first.get_tx, second.get_tx], 'ab', hedge=hedge)
+    assert first.calls == second.calls == 1
+
+
+def test_circuit_opens_after_failures_and_half_opens_after_cooldown(monkeypatch):
+    monkeypatch.setattr(NetworkAPI, 'FAILURE_THRESHOLD', 2)
+    monkeypatch.setattr(NetworkAPI, 'CIRCUIT_RESET_TIMEOUT', 0.05)
+    NetworkAPI.reset_health()
+    flaky = provider('Flaky', answer='tx', error=ConnectionError('down'))
+    health = NetworkAPI.get_health(flaky.get_tx)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            NetworkAPI._call_apis([flaky.get_tx], 'ab')
+    assert health.state == health.OPEN
+    with pytest.raises(ConnectionError):
+        NetworkAPI._call_apis([flaky.get_tx], 'ab')
+    assert flaky.calls == 2  # skipped while open
+
+    time.sleep(0.06)
+    assert health.acquire()
+    assert health.state == health.HALF_OPEN
+    assert not health.acquire()  # a single probe at a time
+    health.record_failure()
+    assert health.state == health.OPEN
+
+    time.sleep(0.06)
+    flaky.error = None
+    assert NetworkAPI._call_apis([flaky.get_tx], 'ab') == 'tx'
+    assert health.state == health.CLOSED
+    assert flaky.calls == 3
@@ -0,0 +1,55 @@
+from bchmemo.bitcash_modified.services import iter_address_pages
+from bchmemo.bitcash_modified.services import iter_block_pages
+
+
+def history(n):
+    """Fake address history of n txs, newest first, one per second."""
+    return [{'txid': '{:064x}'.format(i), 'time': 1500000000 + i} for i in reversed(range(n))]
+
+
+def pages_of(txs, fetched):
+    def get_transactions_by_addresses(addresses, start_index, stop_index):
+        fetched.append(start_index)
+        return len(txs), txs[start_index:stop_index]
+    return get_transactions_by_addresses
+
+
+def test_address_pages_are_fetched_as_consumed():
+    txs, fetched = history(120), []
+    pages = iter_address_pages(pages_of(txs, fetched), 'address')
+    assert [next(pages) for _ in range(50)] == txs[:50]
+    assert fetched == [0]
+    assert list(pages) == txs[50:]
+    assert fetched == [0, 50, 100]
+
+
+def test_address_pages_skip_txs_shifted_by_a_new_tx():
+    txs, fetched = history(100), []
+    get_page = pages_of(txs, fetched)
+
+    def get_transactions_by_addresses(addresses, start_index, stop_index):
+        if start_index == 50:  # a new tx arrived after the first page
+            txs.insert(0, {'txid': 'ff' * 32, 'time': 1600000000})
+        return get_page(addresses, start_index, stop_index)
+
+    yielded = list(iter_address_pages(get_transactions_by_addresses, 'address'))
+    assert len(yielded) == len({tx['txid'] for tx in yielded}) == 100
+
+
+def test_address_pages_stop_after_reaching_t():
+    txs, fetched = history(200), []
+    yielded = list(iter_address_pages(pages_of(txs, fetched), 'address', t=1500000000 + 120))
+    assert fetched == [0, 50]
+    assert yielded == txs[:100]
+
+
+def test_block_pages():
+    pages = {0: ['a', 'b'], 1: ['c'], 2: ['d']}
+    fetched = []
+
+    def get_transactions_by_block(block_hash, page_num):
+        fetched.append(page_num)
+        return len(pages), pages[page_num]
+
+    assert list(iter_block_pages(get_transactions_by_block, 'hash')) == ['a', 'b', 'c', 'd']
+    assert fetched == [0, 1, 2]
@@ -0,0 +1,67 @@
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.memo import Memo
+from bchmemo.memo import resolve_likes
+
+SENDER = 'bitcoincash:qqplzy4l2uxzwa5k3zc2mftkw3q6340a4cfy4kd3nf'
+LIKED_SENDER = '1KXrWXciRDZUpQwQmuM1DbwsKDLYAYsVLR'
+LIKED_SENDER_CASH = 'bitcoincash:qr95sy3j9xwd2ap32xkykttr4cvcu7as4y0qverfuy'
+# Not palindromes, so a txhash used in the wrong byte order is not found.
+GOOD = bytes(range(32)).hex()
+MALFORMED = bytes(range(32, 64)).hex()
+BAD_RESPONSE = bytes(range(64, 96)).hex()
+
+
+def liked_tx(txid, script):
+    return {'txid': txid, 'blockheight': 530000, 'time': 1525000000,
+            'vin': [{'addr': LIKED_SENDER}],
+            'vout': [{'value': '0.00000000', 'scriptPubKey': {'hex': script}}]}
+
+
+def fake_get_tx(monkeypatch):
+    txs = {GOOD: liked_tx(GOOD, '6a026d0202' + 'hi'.encode().hex()),
+           # A like whose liked txhash is not 32 bytes.
+           MALFORMED: liked_tx(MALFORMED, '6a026d0402abcd')}
+
+    def get_tx(cls, txid):
+        if txid == BAD_RESPONSE:
+            raise ValueError('Expecting value: line 1 column 1 (char 0)')
+        return txs[txid]
+
+    monkeypatch.setattr(NetworkAPI, 'get_tx', classmethod(get_tx))
+
+
+def test_malformed_liked_tx_is_left_unresolved(monkeypatch):
+    fake_get_tx(monkeypatch)
+    good_like = Memo.like_memo(GOOD, SENDER, sender_of_liked_memo=None)
+    bad_like = Memo.like_memo(MALFORMED, SENDER, sender_of_liked_memo=None)
+    bad_response_like = Memo.like_memo(BAD_RESPONSE, SENDER, sender_of_liked_memo=None)
+    liked_memos = resolve_likes([good_like, bad_like, bad_response_like])
+
+    assert liked_memos[GOOD].message == 'hi'
+    assert good_like.liked_memo is liked_memos[GOOD]
+    assert MALFORMED not in liked_memos and BAD_RESPONSE not in liked_memos
+    assert bad_like.liked_memo is None and bad_response_like.liked_memo is None
+
+
+def test_outgoing_like_keeps_its_satoshi_tip(monkeypatch):
+    fake_get_tx(monkeypatch)
+    like = Memo.like_memo(GOOD, SENDER, tip_amount=1000, sender_of_liked_memo=LIKED_SENDER_CASH)
+    assert like.values == bytes(range(32))[::-1].hex()
+
+    resolve_likes([like])
+    assert like.liked_memo.message == 'hi'
+    assert like.tip_amount == 1000
+
+
+def test_parsed_like_tip_is_converted_from_bch(monkeypatch):
+    fake_get_tx(monkeypatch)
+    like_tx = liked_tx('ff' * 32, '6a026d0420' + bytes(range(32))[::-1].hex())
+    like_tx['vin'] = [{'addr': SENDER}]
+    like_tx['vout'].append({'value': '0.00001000',
+                            'scriptPubKey': {'hex': '76a914' + '00' * 20 + '88ac',
+                                             'addresses': [LIKED_SENDER]}})
+    like = Memo.parse(like_tx)
+    assert like.txhash_of_liked_memo == GOOD
+
+    resolve_likes([like])
+    assert like.tip_amount == 1000
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from bchmemo.bitcash_modified.services import BCCBlockAPI
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.cache import TTLCache
+
+
+class Blocks:
+    calls = 0
+
+    @classmethod
+    def get_blockhash_by_heigth(cls, height):
+        cls.calls += 1
+        return '{:064x}'.format(height)
+
+
+@pytest.fixture
+def response_cache(monkeypatch):
+    response_cache = TTLCache()
+    monkeypatch.setattr(NetworkAPI, 'RESPONSE_CACHE', response_cache)
+    monkeypatch.setattr(NetworkAPI, 'BLOCKHASH_BY_HEIGHT', [Blocks.get_blockhash_by_heigth])
+    monkeypatch.setattr(NetworkAPI, '_best_height', 1000)
+    monkeypatch.setattr(Blocks, 'calls', 0)
+    NetworkAPI.reset_health()
+    yield response_cache
+    NetworkAPI.reset_health()
+
+
+def test_entries_expire():
+    response_cache = TTLCache()
+    response_cache.put('key', 'value', 0.05)
+    assert response_cache.get('key') == 'value'
+    time.sleep(0.06)
+    assert response_cache.get('key') is TTLCache.MISSING
+    assert len(response_cache) == 0
+
+
+def test_block_hashes_near_the_tip_are_not_cached(response_cache):
+    deep = 1000 - NetworkAPI.REORG_DEPTH
+    for _ in range(2):
+        NetworkAPI.get_blockhash_by_height(deep)
+    assert Blocks.calls == 1
+
+    for _ in range(2):
+        NetworkAPI.get_blockhash_by_height(deep + 1)
+    assert Blocks.calls == 3
+
+
+def test_transactions_from_to_use_the_cached_block_hashes(response_cache, monkeypatch):
+    class HeightRange:
+        def height_range(self, t_start, t_stop):
+            return 10, 12
+
+    def unreachable(cls, height):
+        raise ConnectionError('unreachable')
+
+    monkeypatch.setattr(BCCBlockAPI, 'get_blockhash_by_heigth', classmethod(unreachable))
+    monkeypatch.setattr(BCCBlockAPI, 'get_all_transactions_by_block',
+                        classmethod(lambda cls, block_hash: [{'blockhash': block_hash}]))
+    for _ in range(2):
+        txs = BCCBlockAPI.get_transactions_from_to(0, 1, block_index=HeightRange())
+        assert [tx['blockhash'] for tx in txs] == ['{:064x}'.format(height) for height in (10, 11, 12)]
+    assert Blocks.calls == 3
+
+
+def test_best_height_only_rises(monkeypatch):
+    monkeypatch.setattr(NetworkAPI, '_best_height', -1)
+    heights = list(range(1000))
+    threads = [threading.Thread(target=lambda part=heights[i::8]: [NetworkAPI._see_height(h) for h in part])
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert NetworkAPI._best_height == 999
+    NetworkAPI._see_height(5)
+    assert NetworkAPI._best_height == 999
@@ -0,0 +1,62 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bchmemo.bitcash_modified.services import SingleFlight
+
+CALLERS = 8
+
+
+def wait_for_followers(single_flight, followers):
+    deadline = time.monotonic() + 5
+    while single_flight.stats()['collapsed'] < followers:
+        assert time.monotonic() < deadline, 'callers did not join the call in flight'
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_run_once_and_share_the_result():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn(txid):
+        calls.append(txid)
+        release.wait(5)
+        return {'txid': txid}
+
+    with ThreadPoolExecutor(CALLERS) as executor:
+        futures = [executor.submit(single_flight.do, ('get_tx', 'aa'), fn, 'aa') for _ in range(CALLERS)]
+        wait_for_followers(single_flight, CALLERS - 1)
+        release.set()
+        results = [future.result(5) for future in futures]
+
+    assert calls == ['aa']
+    assert all(result is results[0] for result in results)
+    assert results[0] == {'txid': 'aa'}
+    assert single_flight.stats() == {'calls': 1, 'collapsed': CALLERS - 1, 'in_flight': 0}
+
+
+def test_exception_reaches_every_caller_and_clears_the_key():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        raise ConnectionError('All APIs are unreachable.')
+
+    with ThreadPoolExecutor(CALLERS) as executor:
+        futures = [executor.submit(single_flight.do, 'key', fn) for _ in range(CALLERS)]
+        wait_for_followers(single_flight, CALLERS - 1)
+        release.set()
+        for future in futures:
+            with pytest.raises(ConnectionError):
+                future.result(5)
+
+    assert len(calls) == 1
+    assert single_flight.stats()['in_flight'] == 0
+    assert single_flight.do('key', lambda: 'retried') == 'retried'
+    assert single_flight.stats()['calls'] == 2
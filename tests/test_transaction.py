@@ -0,0 +1,74 @@
+import bitcash.transaction
+from bitcash.network.meta import Unspent
+from bitcash.wallet import PrivateKey
+
+import bchmemo.bitcash_modified.transaction
+from bchmemo.bitcash_modified.transaction import create_p2pkh_transaction
+from bchmemo.wallet import p2pkh_script
+
+KEY = PrivateKey('KwDiBf89QgGbjEhKnhXJuH7LrciVrZi3qYjgd9M7rFU73sVHnoWn')
+
+
+def test_signatures_match_bitcash():
+    unspents = [Unspent(100000, 1, p2pkh_script(KEY.address), '11' * 32, 0),
+                Unspent(50000, 1, p2pkh_script(KEY.address), '22' * 32, 3)]
+    outputs = [(KEY.address, 140000)]
+    assert create_p2pkh_transaction(KEY, unspents, outputs) == \
+        bitcash.transaction.create_p2pkh_transaction(KEY, unspents, outputs)
+
+
+# Output of the serializer before it wrote into preallocated buffers, for
+# the unspents and outputs of test_signed_tx_and_preimages_match_fixed_vectors.
+SIGNED_TX = (
+    '0100000002'
+    '1111111111111111111111111111111111111111111111111111111111111111000000006b'
+    '483045022100d52e64f5913f3fbda669f2504175ae33476bb138608c92768ae77158ee132bca'
+    '0220405a31764bb64553f13f103cc7b44a56364fcba32b6128a653605d9d7591e19541'
+    '210279be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798ffffffff'
+    '2222222222222222222222222222222222222222222222222222222222222222030000006b'
+    '483045022100e9207eec9e3a479d4a9e49b3a93a83e936fa6b5028e5c4a23c58c590d49af667'
+    '022077fbe8c8d318ffa8bd4ca2873a0e07e7c3877a2de7f7667728fb96ac6579e37a41'
+    '210279be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798ffffffff'
+    '02'
+    'e0220200000000001976a914751e76e8199196d454941c45d1b3a323f1433bd688ac'
+    '00000000000000000a6a026d020568656c6c6f'
+    '00000000'
+)
+PREIMAGES = [
+    '01000000'
+    '7a3b83701b5619aaaf58090a108d358728608af23c9721902c4c0ac5f2c87731'
+    '752adad0a7b9ceca853768aebb6965eca126a62965f698a0c1bc43d83db632ad'
+    '111111111111111111111111111111111111111111111111111111111111111100000000'
+    '1976a914751e76e8199196d454941c45d1b3a323f1433bd688ac'
+    'a086010000000000'
+    'ffffffff'
+    '6570571185a15663971c79a8285f71af2e1a5ed90617a7934215152648e535b3'
+    '00000000'
+    '41000000',
+    '01000000'
+    '7a3b83701b5619aaaf58090a108d358728608af23c9721902c4c0ac5f2c87731'
+    '752adad0a7b9ceca853768aebb6965eca126a62965f698a0c1bc43d83db632ad'
+    '222222222222222222222222222222222222222222222222222222222222222203000000'
+    '1976a914751e76e8199196d454941c45d1b3a323f1433bd688ac'
+    '50c3000000000000'
+    'ffffffff'
+    '6570571185a15663971c79a8285f71af2e1a5ed90617a7934215152648e535b3'
+    '00000000'
+    '41000000',
+]
+
+
+def test_signed_tx_and_preimages_match_fixed_vectors(monkeypatch):
+    preimages = []
+    sha256 = bchmemo.bitcash_modified.transaction.sha256
+
+    def recording_sha256(data):
+        preimages.append(bytes(data).hex())
+        return sha256(data)
+
+    monkeypatch.setattr(bchmemo.bitcash_modified.transaction, 'sha256', recording_sha256)
+    unspents = [Unspent(100000, 1, p2pkh_script(KEY.address), '11' * 32, 0),
+                Unspent(50000, 1, p2pkh_script(KEY.address), '22' * 32, 3)]
+    outputs = [(KEY.address, 140000), (bytes.fromhex('026d0205') + b'hello', 0)]
+    assert create_p2pkh_transaction(KEY, unspents, outputs) == SIGNED_TX
+    assert preimages == PREIMAGES
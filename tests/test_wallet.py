@@ -0,0 +1,26 @@
+import pytest
+from bitcash.network.meta import Unspent
+from bitcash.wallet import PrivateKey
+
+from bchmemo.memo import Memo
+from bchmemo.wallet import p2pkh_script
+from bchmemo.wallet import sign_memos
+
+KEY = PrivateKey()
+OTHER = PrivateKey().address
+
+
+def unspents():
+    return [Unspent(100000, 1, p2pkh_script(KEY.address), '11' * 32, 0)]
+
+
+def test_sign_memos_chains_the_change():
+    memos = [Memo.post_memo('one', KEY.address), Memo.post_memo('two', KEY.address)]
+    txs = sign_memos(KEY, memos, unspents(), leftover=KEY.address)
+    assert len(txs) == 2
+    assert [memo.signed_transaction for memo in memos] == txs
+
+
+def test_sign_memos_rejects_foreign_leftover():
+    with pytest.raises(ValueError):
+        sign_memos(KEY, [Memo.post_memo('one', KEY.address)], unspents(), leftover=OTHER)
@@ -0,0 +1,167 @@
+import threading
+
+from bitcash.exceptions import InsufficientFunds
+from bitcash.network.meta import Unspent
+
+from bchmemo.addresses import address_to_public_key_hash
+from bchmemo.addresses import to_cash_address
+from bchmemo.bitcash_modified.services import NetworkAPI
+from bchmemo.bitcash_modified.transaction import calc_txid
+from bchmemo.bitcash_modified.transaction import create_p2pkh_transaction
+from bchmemo.bitcash_modified.transaction import sanitize_tx_data
+from bchmemo.memo import MIN_TRANSFER_FEE
+
+
+def p2pkh_script(address):
+    """Return the hex locking script paying to an address."""
+    return '76a914' + address_to_public_key_hash(address).hex() + '88ac'
+
+
+class UTXOTracker:
+    """
+    Wallet-side set of the unspent outputs of an address.
+
+    It is seeded from the network once, then updated locally from every
+    transaction it signs: the spent inputs are removed and the outputs paying
+    back to the address (the change) are added with 0 confirmations. Memo
+    transactions can so be chained back to back without waiting for the
+    indexer of a provider. Call :meth:`resync` when the local set turns out
+    to be wrong, e.g. when a broadcast is rejected, or :meth:`mark_stale`
+    where no request should be made.
+
+    :param address: the address whose outputs are tracked
+    :type address: ``str``
+    :param unspents: known unspents, None to fetch them on first use
+    :type unspents: ``list`` of :class:`~bitcash.network.meta.Unspent`
+    :param offline: never fetch unspents; signing then only spends the
+        given unspents and the change of previously signed transactions
+    :type offline: ``bool``
+    """
+
+    def __init__(self, address, unspents=None, offline=False):
+        self.address = to_cash_address(address)
+        self.script = p2pkh_script(self.address)
+        self.offline = offline
+        self.resyncs = 0
+        self._lock = threading.RLock()
+        self._unspents = None if unspents is None else list(unspents)
+
+    def resync(self):
+        """Replace the local set with the unspents reported by the network."""
+        if self.offline:
+            raise ConnectionError('UTXOTracker of {} is offline.'.format(self.address))
+        NetworkAPI.invalidate_response('get_unspent', self.address)
+        unspents = NetworkAPI.get_unspent(self.address)
+        with self._lock:
+            self._unspents = list(unspents)
+            self.resyncs += 1
+        return list(unspents)
+
+    def mark_stale(self):
+        """Forget the local set without a request; the next use resyncs it."""
+        with self._lock:
+            self._unspents = None
+
+    def get_unspents(self):
+        """Return the tracked unspents, fetching them on first use."""
+        with self._lock:
+            if self._unspents is None:
+                self.resync()
+            return list(self._unspents)
+
+    @property
+    def balance(self):
+        return sum(unspent.amount for unspent in self.get_unspents())
+
+    def apply(self, tx_hex, unspents, outputs):
+        """Update the set from a signed transaction.
+
+        :param unspents: inputs of the transaction
+        :param outputs: ``(destination, satoshi)`` outputs of the transaction
+            in order, as returned by ``sanitize_tx_data``
+        :return: txid of the transaction
+        """
+        txid = calc_txid(tx_hex)
+        spent = {(unspent.txid, unspent.txindex) for unspent in unspents}
+        with self._lock:
+            if self._unspents is None:
+                self._unspents = []
+            self._unspents = [unspent for unspent in self._unspents
+                              if (unspent.txid, unspent.txindex) not in spent]
+            for txindex, (dest, amount) in enumerate(outputs):
+                if amount and dest == self.address:
+                    self._unspents.append(Unspent(amount, 0, self.script, txid, txindex))
+        return txid
+
+    def create_transaction(self, private_key, outputs, fee, leftover=None, combine=True, message=None):
+        """Sign a transaction spending tracked unspents and apply it.
+
+        Unless offline, the set is resynced and the transaction retried once
+        if the tracked funds are insufficient.
+
+        :param private_key: key of the tracked address
+        :type private_key: ``PrivateKey``
+        :param outputs: ``(destination, amount, currency)`` outputs
+        :param fee: satoshi per byte
+        :param message: data of the OP_RETURN output
+        :type message: ``bytes``
+        :returns: The signed transaction as hex.
+        :rtype: ``str``
+        """
+        if private_key.address != self.address:
+            raise ValueError('Wrong Private Key!')
+        leftover = leftover or self.address
+
+        with self._lock:
+            try:
+                unspents, tx_outputs = sanitize_tx_data(self.get_unspents(), outputs, fee, leftover,
+                                                        combine=combine, message=message)
+            except (InsufficientFunds, ValueError):
+                if self.offline:
+                    raise
+                self.resync()
+                unspents, tx_outputs = sanitize_tx_data(self.get_unspents(), outputs, fee, leftover,
+                                                        combine=combine, message=message)
+            tx_hex = create_p2pkh_transaction(private_key, unspents, tx_outputs)
+            self.apply(tx_hex, unspents, tx_outputs)
+        return tx_hex
+
+    def __len__(self):
+        return len(self.get_unspents())
+
+
+def sign_memos(private_key, memos, unspents, leftover=None, fee=None):
+    """
+    Sign memo actions offline as a chain of transactions.
+
+    Every transaction spends the change of the previous one, starting from
+    the given unspents; no network request is made. Broadcast the result in
+    order, e.g. with :class:`~bchmemo.broadcast.BroadcastQueue`.
+
+    :param private_key: key of the sender of all memos
+    :type private_key: ``PrivateKey``
+    :param memos: memo actions, e.g. from ``Memo.post_memo``
+    :type memos: iterable of :class:`~bchmemo.memo.Memo`
+    :param unspents: unspents of the sender to start from
+    :type unspents: ``list`` of :class:`~bitcash.network.meta.Unspent`
+    :param leftover: address of the change, the sender's own address; the
+        chain spends the change, so no other address is accepted
+    :param fee: satoshi per byte, ``MIN_TRANSFER_FEE`` by default
+    :returns: The signed transactions as hex, in order.
+    :rtype: ``list`` of ``str``
+    :raises InsufficientFunds: if the unspents cannot pay for all memos
+    :raises ValueError: if leftover is not the sender's address
+    """
+    fee = MIN_TRANSFER_FEE if fee is None else fee
+    tracker = UTXOTracker(private_key.address, unspents, offline=True)
+    if leftover is not None and to_cash_address(leftover) != tracker.address:
+        raise ValueError('The change of chained memos must go back to {}.'.format(tracker.address))
+    txs = []
+    for memo in memos:
+        if memo.sender != tracker.address:
+            raise ValueError('Wrong Private Key!')
+        tx_hex = tracker.create_transaction(private_key, memo.transfer, fee, leftover=leftover,
+                                            message=memo.op_return_data())
+        memo.signed_transaction = tx_hex
+        txs.append(tx_hex)
+    return txs